@@ -29,14 +29,14 @@ DOCS = load_texts_as_documents(["examples/data/sample.txt"])
 def evaluate(config_path: str) -> Tuple[str, Dict[str, float]]:
     cfg = load_config(config_path)
     selection = select_pipeline(config_path, DOCS, cfg)
-    chain = selection.chain
-    debug = selection.debug
+    traced = selection.traced
 
     scores: List[Dict[str, float]] = []
     for qa in QA_EXAMPLES:
-        answer = chain.invoke(qa["question"])
+        out = traced.invoke(qa["question"])
+        answer = out["answer"]
+        dbg = out["debug"]
         retrieved = ""
-        dbg = debug()
         if dbg.get("retrieved"):
             retrieved = "\n".join(item.get("preview", "") for item in dbg["retrieved"])
         elif dbg.get("candidates"):
@@ -1,6 +1,8 @@
-from importlib.metadata import PackageNotFoundError, version
+import sys
+from functools import lru_cache
+from typing import Any, List
 
-# Apply device policy at import time (before anything imports torch)
+# Apply device policy at import time (before anything imports torch). It only sets environment variables.
 try:
     from .utils.hardware import apply_process_wide_policy
 
@@ -8,17 +10,38 @@ try:
 except Exception:
     _EFFECTIVE_DEVICE = "auto"
 
-try:
-    __version__ = version("rag-bencher")
-except PackageNotFoundError:
-    __version__ = "0.0.0"
+# Public API surface. Resolved on access so ``import rag_bencher`` stays cheap for short-lived CLIs
+# and worker processes: no package metadata lookup, no pydantic/yaml and no filesystem access.
+# ``__all__`` is resolved lazily too and lists only the names that actually import.
+_PUBLIC = ("__version__", "load_config")
 
-# Public API surface (can expand later)
-__all__ = ["__version__"]
 
-try:
-    from .config import load_config as load_config  # noqa: F401
-except Exception:
-    globals().pop("load_config", None)
-else:
-    __all__ = ["__version__", "load_config"]
+@lru_cache(maxsize=1)
+def _version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("rag-bencher")
+    except PackageNotFoundError:
+        return "0.0.0"
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve ``__version__``, ``load_config`` and ``__all__``; later lookups hit the import cache."""
+    if name == "__all__":
+        module = sys.modules[__name__]
+        return [n for n in _PUBLIC if hasattr(module, n)]
+    if name == "__version__":
+        return _version()
+    if name == "load_config":
+        try:
+            from .config import load_config
+        except Exception as e:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from e
+        return load_config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    """List the lazily resolved public names along with the module globals."""
+    return sorted(set(globals()) | set(sys.modules[__name__].__all__))
@@ -0,0 +1,179 @@
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from rich.console import Console
+from rich.table import Table
+
+from rag_bencher.config import BenchConfig, FaissIndexCfg, load_config
+from rag_bencher.eval.dataset_loader import load_texts_as_documents
+from rag_bencher.pipelines.utils import CHUNK_OVERLAP, CHUNK_SIZE, DEFAULT_EMBEDDING_MODEL
+from rag_bencher.providers.base import build_embeddings_adapter
+from rag_bencher.utils.factories import make_hf_embeddings
+from rag_bencher.utils.io import save_json
+from rag_bencher.vector.embedding_cache import with_embed_cache
+from rag_bencher.vector.faiss_index import make_faiss_index
+from rag_bencher.vector.numpy_store import FloatMatrix, top_k
+
+console = Console()
+# Corpus rows scored per block when computing exact neighbours.
+_ROW_BLOCK = 8192
+
+
+def default_sweep(n_vectors: int, dim: int) -> List[FaissIndexCfg]:
+    """Return a small grid spanning flat, IVF, HNSW and IVF-PQ for a corpus of ``n_vectors``."""
+    nlist = max(1, int(4 * np.sqrt(n_vectors)))
+    grid: List[FaissIndexCfg] = [FaissIndexCfg(index="flat")]
+    grid += [FaissIndexCfg(index="ivf", nlist=nlist, nprobe=p) for p in (1, 4, 16, 64) if p <= nlist]
+    grid += [FaissIndexCfg(index="hnsw", m=32, ef_search=ef) for ef in (16, 64, 256)]
+    pq_m = next((m for m in (16, 8, 4, 2, 1) if dim % m == 0), 1)
+    if n_vectors >= 256:
+        grid += [FaissIndexCfg(index="ivf_pq", nlist=nlist, nprobe=p, pq_m=pq_m) for p in (4, 16) if p <= nlist]
+    return grid
+
+
+def exact_neighbours(vectors: FloatMatrix, queries: FloatMatrix, k: int) -> np.ndarray:
+    """Ground-truth L2 neighbours, ranked by ``2 q.x - |x|^2`` (monotone in negative L2 distance).
+
+    Scores one block of ``_ROW_BLOCK`` vectors at a time and keeps a running top-k per query, so memory stays
+    bounded by ``queries x (k + _ROW_BLOCK)`` instead of the full query x corpus score matrix.
+    """
+    k = min(k, vectors.shape[0])
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    best_idx = np.empty((queries.shape[0], 0), dtype=np.intp)
+    best = np.empty((queries.shape[0], 0), dtype=np.float32)
+    for start in range(0, vectors.shape[0], _ROW_BLOCK):
+        block = vectors[start : start + _ROW_BLOCK]
+        scores = (2.0 * (queries @ block.T) - norms[None, start : start + _ROW_BLOCK]).astype(np.float32)
+        idx, vals = top_k(scores, k)
+        best_idx, best = _merge(best_idx, best, idx + start, vals, k)
+    return best_idx
+
+
+def _merge(
+    idx_a: np.ndarray, vals_a: FloatMatrix, idx_b: np.ndarray, vals_b: FloatMatrix, k: int
+) -> Tuple[np.ndarray, FloatMatrix]:
+    idx = np.concatenate([idx_a, idx_b], axis=1)
+    pos, vals = top_k(np.concatenate([vals_a, vals_b], axis=1), k)
+    return np.take_along_axis(idx, pos, axis=1), vals
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the exact top-k that the approximate search returned."""
+    if truth.size == 0:
+        return 0.0
+    hits = [len(set(f[f >= 0].tolist()) & set(t.tolist())) / len(t) for f, t in zip(found, truth, strict=True)]
+    return float(np.mean(hits))
+
+
+def run_sweep(
+    vectors: FloatMatrix,
+    queries: FloatMatrix,
+    settings: List[FaissIndexCfg],
+    k: int,
+) -> List[Dict[str, Any]]:
+    """Build every index in ``settings`` over ``vectors`` and measure recall@k and per-query latency."""
+    k = min(k, vectors.shape[0])
+    truth = exact_neighbours(vectors, queries, k)
+    results: List[Dict[str, Any]] = []
+    for cfg in settings:
+        t0 = time.perf_counter()
+        index = make_faiss_index(vectors.shape[1], cfg, vectors)
+        index.add(vectors)
+        build_s = time.perf_counter() - t0
+        found = np.empty((queries.shape[0], k), dtype=np.int64)
+        latencies: List[float] = []
+        for n in range(queries.shape[0]):
+            t0 = time.perf_counter()
+            _, ids = index.search(queries[n : n + 1], k)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            found[n] = ids[0]
+        p50, p99 = np.percentile(latencies, [50, 99]) if latencies else (0.0, 0.0)
+        results.append(
+            {
+                "setting": _label(cfg),
+                "params": cfg.model_dump(),
+                f"recall@{k}": recall_at_k(found, truth),
+                "p50_ms": float(p50),
+                "p99_ms": float(p99),
+                "build_s": build_s,
+            }
+        )
+    return results
+
+
+def _label(cfg: FaissIndexCfg) -> str:
+    if cfg.index == "ivf":
+        return f"ivf nlist={cfg.nlist} nprobe={cfg.nprobe}"
+    if cfg.index == "hnsw":
+        return f"hnsw M={cfg.m} efSearch={cfg.ef_search}"
+    if cfg.index == "ivf_pq":
+        return f"ivf_pq nlist={cfg.nlist} nprobe={cfg.nprobe} m={cfg.pq_m}x{cfg.pq_nbits}b"
+    return "flat"
+
+
+def _load_sweep(path: Optional[str]) -> Optional[List[FaissIndexCfg]]:
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as fh:
+        raw = yaml.safe_load(fh) or []
+    return [FaissIndexCfg.model_validate(item) for item in raw]
+
+
+def _embeddings_for(cfg: BenchConfig) -> Embeddings:
+    provider = cfg.provider.model_dump() if cfg.provider else None
+    adapter = build_embeddings_adapter(provider) if provider else None
+    if adapter is not None:
+        return with_embed_cache(adapter.to_langchain())
+    return with_embed_cache(
+        make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL, backend=cfg.runtime.embeddings_backend)
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Sweep FAISS index types: recall@k vs exact search and query latency")
+    ap.add_argument("--config", required=True, help="Config whose data.paths (and provider embeddings) to index")
+    ap.add_argument("--qa", required=True, help="QA jsonl whose questions are used as queries")
+    ap.add_argument("--k", type=int, default=None, help="Neighbours per query (default: retriever.k)")
+    ap.add_argument("--sweep", default=None, help="YAML list of FAISS index settings (default: built-in grid)")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    k = args.k or cfg.retriever.k
+    docs = load_texts_as_documents(cfg.data.paths)
+    splits = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP).split_documents(docs)
+    with open(args.qa, "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+
+    emb = _embeddings_for(cfg)
+    vectors = np.asarray(emb.embed_documents([d.page_content for d in splits]), dtype=np.float32)
+    queries = np.asarray([emb.embed_query(q) for q in questions], dtype=np.float32)
+    settings = _load_sweep(args.sweep) or default_sweep(vectors.shape[0], vectors.shape[1])
+
+    results = run_sweep(vectors, queries, settings, k)
+
+    recall_key = f"recall@{min(k, vectors.shape[0])}"
+    table = Table(title=f"ANN sweep: {len(splits)} chunks, {len(questions)} queries")
+    for col in ["Setting", recall_key, "p50 ms", "p99 ms", "Build s"]:
+        table.add_column(col)
+    for r in results:
+        table.add_row(
+            r["setting"], f"{r[recall_key]:.3f}", f"{r['p50_ms']:.3f}", f"{r['p99_ms']:.3f}", f"{r['build_s']:.2f}"
+        )
+    console.print(table)
+
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out = Path("reports") / f"ann-sweep-{ts}.json"
+    save_json({"config": args.config, "chunks": len(splits), "queries": len(questions), "results": results}, out)
+    console.print(f"[green]Wrote {out}[/green]")
+
+
+if __name__ == "__main__":  # pragma: no cover - script entrypoint
+    main()
@@ -1,5 +1,6 @@
 import argparse
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from statistics import mean
 from typing import Any, Dict
@@ -9,8 +10,10 @@ from rich.console import Console
 from rag_bencher.config import load_config
 from rag_bencher.eval.dataset_loader import load_texts_as_documents
 from rag_bencher.eval.metrics import bow_cosine, context_recall, lexical_f1
-from rag_bencher.eval.report import write_simple_report
+from rag_bencher.eval.report import cache_assisted, write_simple_report
 from rag_bencher.pipelines.selector import PipelineSelection, select_pipeline
+from rag_bencher.pipelines.semantic_cache import semantic_cache_stats
+from rag_bencher.utils.cache import cache_stats
 
 console = Console()
 
@@ -19,37 +22,55 @@ def main() -> None:
     ap = argparse.ArgumentParser(description="Evaluate a RAG pipeline on a QA set")
     ap.add_argument("--config", required=True)
     ap.add_argument("--qa", required=True)
+    ap.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Questions evaluated in parallel (default 1). Raise it for remote LLMs to use the provider rate limit.",
+    )
+    ap.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="Reuse answers cached by earlier runs of the same config and corpus; the report is marked cache-assisted.",
+    )
     args = ap.parse_args()
+    if args.concurrency < 1:
+        ap.error("--concurrency must be at least 1")
 
     cfg = load_config(args.config)
     docs = load_texts_as_documents(cfg.data.paths)
 
-    selection: PipelineSelection = select_pipeline(args.config, docs, cfg)
-    chain = selection.chain
-    debug = selection.debug
+    selection: PipelineSelection = select_pipeline(args.config, docs, cfg, answer_cache=args.answer_cache)
+    traced = selection.traced
     pipe_id = selection.pipeline_id
 
-    rows: list[Dict[str, float]] = []
     with open(args.qa, "r", encoding="utf-8") as f:
-        for line in f:
-            ex = json.loads(line)
-            q = ex["question"]
-            ref = ex["reference_answer"]
-            ans = chain.invoke(q)
-            dbg = debug()
-            retrieved = ""
-            if dbg.get("retrieved"):
-                retrieved = "\n".join(r.get("preview", "") for r in dbg["retrieved"])
-            elif dbg.get("candidates"):
-                retrieved = "\n".join(r.get("preview", "") for r in dbg["candidates"][:5])
-            metrics: Dict[str, float] = {
-                "lexical_f1": lexical_f1(ans, ref),
-                "bow_cosine": bow_cosine(ans, ref),
-                "context_recall": context_recall(ref, retrieved) if retrieved else 0.0,
-            }
+        examples = [json.loads(line) for line in f if line.strip()]
+
+    def evaluate(ex: Dict[str, Any]) -> Dict[str, float]:
+        q = ex["question"]
+        ref = ex["reference_answer"]
+        out = traced.invoke(q)
+        ans = out["answer"]
+        dbg = out["debug"]
+        retrieved = ""
+        if dbg.get("retrieved"):
+            retrieved = "\n".join(r.get("preview", "") for r in dbg["retrieved"])
+        elif dbg.get("candidates"):
+            retrieved = "\n".join(r.get("preview", "") for r in dbg["candidates"][:5])
+        return {
+            "lexical_f1": lexical_f1(ans, ref),
+            "bow_cosine": bow_cosine(ans, ref),
+            "context_recall": context_recall(ref, retrieved) if retrieved else 0.0,
+        }
+
+    rows: list[Dict[str, float]] = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        # map() yields in submission order, so the output matches the QA file whatever finishes first.
+        for ex, metrics in zip(examples, pool.map(evaluate, examples), strict=True):
             rows.append(metrics)
             console.print(
-                f"[bold cyan]{q}[/bold cyan] -> F1={metrics['lexical_f1']:.3f} "
+                f"[bold cyan]{ex['question']}[/bold cyan] -> F1={metrics['lexical_f1']:.3f} "
                 f"Cos={metrics['bow_cosine']:.3f} "
                 f"Ctx={metrics['context_recall']:.3f}"
             )
@@ -58,12 +79,20 @@ def main() -> None:
     }
     console.rule("[bold green]Averages")
     console.print(avg)
+    stats: Dict[str, Any] = {**cache_stats(), **semantic_cache_stats()}
+    semantic = getattr(selection.config, "semantic_cache", None)
+    if semantic is not None:
+        stats["semantic_threshold"] = semantic.threshold
+    console.print(f"Cache: {stats}")
     summary: Dict[str, Any] = {"pipeline": pipe_id, "avg_metrics": avg, "num_examples": len(rows)}
+    if args.answer_cache:
+        summary["answer_cache"] = cache_assisted(stats, len(rows))
+        console.print(f"[yellow]{summary['answer_cache']}[/yellow]")
     report_path = write_simple_report(
         question=f"Benchmark: {pipe_id} on {Path(args.qa).name}",
         answer=json.dumps(summary, indent=2),
         cfg=selection.config.model_dump(),
-        extras={"pipeline": pipe_id},
+        extras={"pipeline": pipe_id, "cache": stats},
     )
     console.print(f"[green]Benchmark report written to {report_path}[/green]")
 
@@ -1,67 +1,208 @@
 import argparse
 import glob
 import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from statistics import mean
-from typing import Any, Dict, Iterator
+from typing import Any, Dict, Iterator, List, Tuple
 
+from langchain_core.documents import Document
 from rich.console import Console
 
-from rag_bencher.config import load_config
+from rag_bencher.config import BenchConfig, load_config
 from rag_bencher.eval.dataset_loader import load_texts_as_documents
 from rag_bencher.eval.metrics import bow_cosine, context_recall, lexical_f1
-from rag_bencher.pipelines.selector import PipelineSelection, select_pipeline
+from rag_bencher.eval.report import cache_assisted, render_cache_stats
+from rag_bencher.pipelines.selector import (
+    IndexKey,
+    PipelineSelection,
+    SharedIndexes,
+    select_pipeline,
+    shared_index_key,
+)
+from rag_bencher.pipelines.semantic_cache import SEMANTIC_COUNTERS, semantic_cache_stats, semantic_rates
+from rag_bencher.utils.cache import COUNTER_NAMES, cache_stats
+from rag_bencher.utils.hardware import pin_threads, thread_env
 
 console = Console()
 
 
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class _Sweep:
+    """Work shared by the configs evaluated in one process: corpora per ``data.paths`` and built indexes."""
+
+    def __init__(self, answer_cache: bool = False) -> None:
+        self.answer_cache = answer_cache
+        self.docs: Dict[Tuple[str, ...], List[Document]] = {}
+        self.indexes = SharedIndexes()
+
+    def documents(self, cfg: BenchConfig) -> List[Document]:
+        key = tuple(cfg.data.paths)
+        if key not in self.docs:
+            self.docs[key] = load_texts_as_documents(list(key))
+        return self.docs[key]
+
+
+def _evaluate_config(path: str, qa_path: str, sweep: _Sweep) -> Dict[str, Any]:
+    """Run every QA example through the pipeline of one config and return its averaged metrics."""
+    before = {**cache_stats(), **semantic_cache_stats()}
+    cfg = load_config(path)
+    selection: PipelineSelection = select_pipeline(
+        path, sweep.documents(cfg), cfg, indexes=sweep.indexes, answer_cache=sweep.answer_cache
+    )
+    traced = selection.traced
+    rows: list[Dict[str, float]] = []
+    for ex in _iter_jsonl(qa_path):
+        q = ex["question"]
+        ref = ex["reference_answer"]
+        result = traced.invoke(q)
+        ans = result["answer"]
+        dbg = result["debug"]
+        retrieved = ""
+        if dbg.get("retrieved"):
+            retrieved = "\n".join(r.get("preview", "") for r in dbg["retrieved"])
+        elif dbg.get("candidates"):
+            retrieved = "\n".join(r.get("preview", "") for r in dbg["candidates"][:5])
+        m = {
+            "lexical_f1": lexical_f1(ans, ref),
+            "bow_cosine": bow_cosine(ans, ref),
+            "context_recall": context_recall(ref, retrieved) if retrieved else 0.0,
+        }
+        rows.append(m)
+    avg = {k: mean(r[k] for r in rows) if rows else 0.0 for k in ["lexical_f1", "bow_cosine", "context_recall"]}
+    after = {**cache_stats(), **semantic_cache_stats()}
+    cache: Dict[str, Any] = {k: after[k] - before[k] for k in COUNTER_NAMES + SEMANTIC_COUNTERS}
+    semantic = getattr(cfg, "semantic_cache", None)
+    if semantic is not None:
+        cache["semantic_threshold"] = semantic.threshold
+    return {"config": Path(path).name, "pipeline": selection.pipeline_id, **avg, "cache": cache}
+
+
+@contextmanager
+def _environ(env: Dict[str, str]) -> Iterator[None]:
+    """Set ``env`` while worker processes start so they inherit it before importing numpy/torch."""
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _evaluate_group(paths: List[str], qa_path: str, answer_cache: bool = False) -> Dict[str, Dict[str, Any]]:
+    sweep = _Sweep(answer_cache)
+    return {p: _evaluate_config(p, qa_path, sweep) for p in paths}
+
+
+def _plan_groups(paths: List[str], workers: int) -> List[List[str]]:
+    """Group configs that share an index, splitting the largest groups until every worker gets one.
+
+    Each group runs in one worker and builds its index once; a split costs one extra build.
+    """
+    by_key: Dict[IndexKey, List[str]] = {}
+    for p in paths:
+        by_key.setdefault(shared_index_key(load_config(p)), []).append(p)
+    groups = list(by_key.values())
+    while groups and len(groups) < workers:
+        largest = max(groups, key=len)
+        if len(largest) < 2:
+            break
+        groups.remove(largest)
+        half = len(largest) // 2
+        groups.extend([largest[:half], largest[half:]])
+    return groups
+
+
+def _run_configs(
+    paths: List[str], qa_path: str, workers: int, threads: int, answer_cache: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Yield each config's result in ``paths`` order, evaluating up to ``workers`` groups of configs at once."""
+    if workers <= 1:
+        sweep = _Sweep(answer_cache)
+        for p in paths:
+            yield _evaluate_config(p, qa_path, sweep)
+        return
+    groups = _plan_groups(paths, workers)
+    # spawn: forked children would inherit the parent's torch/OpenMP thread pools in an undefined state.
+    with (
+        _environ(thread_env(threads)),
+        ProcessPoolExecutor(
+            max_workers=min(workers, len(groups)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=pin_threads,
+            initargs=(threads,),
+        ) as pool,
+    ):
+        futures: Dict[str, Future[Dict[str, Dict[str, Any]]]] = {}
+        for group in groups:
+            fut = pool.submit(_evaluate_group, group, qa_path, answer_cache)
+            futures.update((p, fut) for p in group)
+        for p in paths:
+            yield futures[p].result()[p]
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Run multiple configs and produce a combined HTML report")
     ap.add_argument("--configs", required=True)
     ap.add_argument("--qa", required=True)
+    ap.add_argument("--workers", type=int, default=1, help="Configs evaluated in parallel worker processes.")
+    ap.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="Compute threads per worker (default: CPU count divided by --workers).",
+    )
+    ap.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="Reuse answers cached by earlier runs of the same config and corpus; the report is marked cache-assisted.",
+    )
     args = ap.parse_args()
+    if args.workers < 1:
+        ap.error("--workers must be at least 1")
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
 
-    first = sorted(glob.glob(args.configs))[0]
-    cfg = load_config(first)
-    docs = load_texts_as_documents(cfg.data.paths)
-
-    def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                yield json.loads(line)
-
+    paths = sorted(glob.glob(args.configs))
+    if not paths:
+        ap.error(f"--configs {args.configs!r} matched no config files")
     results: list[Dict[str, Any]] = []
-    for p in sorted(glob.glob(args.configs)):
-        selection: PipelineSelection = select_pipeline(p, docs)
-        pid = selection.pipeline_id
-        chain = selection.chain
-        debug = selection.debug
-        rows: list[Dict[str, float]] = []
-        for ex in iter_jsonl(args.qa):
-            q = ex["question"]
-            ref = ex["reference_answer"]
-            ans = chain.invoke(q)
-            dbg = debug()
-            retrieved = ""
-            if dbg.get("retrieved"):
-                retrieved = "\n".join(r.get("preview", "") for r in dbg["retrieved"])
-            elif dbg.get("candidates"):
-                retrieved = "\n".join(r.get("preview", "") for r in dbg["candidates"][:5])
-            m = {
-                "lexical_f1": lexical_f1(ans, ref),
-                "bow_cosine": bow_cosine(ans, ref),
-                "context_recall": context_recall(ref, retrieved) if retrieved else 0.0,
-            }
-            rows.append(m)
-        avg = {k: mean(r[k] for r in rows) if rows else 0.0 for k in ["lexical_f1", "bow_cosine", "context_recall"]}
-        console.print(f"[bold]{Path(p).name} ({pid})[/bold] -> {avg}")
-        results.append({"config": Path(p).name, "pipeline": pid, **avg})
+    for res in _run_configs(paths, args.qa, args.workers, threads, args.answer_cache):
+        avg = {k: res[k] for k in ["lexical_f1", "bow_cosine", "context_recall"]}
+        console.print(f"[bold]{res['config']} ({res['pipeline']})[/bold] -> {avg}")
+        results.append(res)
 
     from datetime import datetime
 
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
     out = Path("reports") / f"summary-{ts}.html"
     out.parent.mkdir(exist_ok=True, parents=True)
+    # Counters are per config so that totals add up across worker processes.
+    cache_totals: Dict[str, Any] = {
+        k: sum(r.get("cache", {}).get(k, 0) for r in results) for k in COUNTER_NAMES + SEMANTIC_COUNTERS
+    }
+    cache_totals.update(semantic_rates(cache_totals))
+    thresholds = sorted(
+        {r["cache"]["semantic_threshold"] for r in results if "semantic_threshold" in r.get("cache", {})}
+    )
+    if thresholds:
+        cache_totals["semantic_threshold"] = ", ".join(f"{t:g}" for t in thresholds)
+    assisted = ""
+    if args.answer_cache:
+        note = cache_assisted(cache_totals, len(results) * sum(1 for _ in _iter_jsonl(args.qa)))
+        console.print(f"[yellow]{note}[/yellow]")
+        assisted = f"<p><strong>{note}</strong></p>"
     rows_html = "".join(
         (
             f"<tr>"
@@ -83,11 +224,12 @@ def main() -> None:
         f"table{{border-collapse:collapse;width:100%}}"
         f"th,td{{border:1px solid #ddd;padding:8px}}"
         f"</style></head><body>"
-        f"<h1>rag-bencher multi-run summary</h1>"
+        f"<h1>rag-bencher multi-run summary</h1>{assisted}"
         f"<table><thead><tr>"
         f"<th>Config</th><th>Pipeline</th><th>Lexical F1</th>"
         f"<th>BoW Cosine</th><th>Context Recall</th>"
-        f"</tr></thead><tbody>{rows_html}</tbody></table></body></html>"
+        f"</tr></thead><tbody>{rows_html}</tbody></table>"
+        f"{render_cache_stats(cache_totals)}</body></html>"
     )
     out.write_text(html, encoding="utf-8")
     console.print(f"[green]Wrote {out}[/green]")
@@ -0,0 +1,237 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from rag_bencher.utils import cache, compression
+
+console = Console()
+
+
+def find_stores(directory: Path) -> List[cache.SqliteCache]:
+    """Open the answer store and every embedding store that already exist under ``directory``."""
+    # Deferred: the embedding cache pulls in numpy and LangChain, which export/compress/bench never need.
+    from rag_bencher.vector import embedding_cache
+
+    stores: List[cache.SqliteCache] = []
+    answers = directory / cache.DB_NAME
+    if answers.is_file():
+        stores.append(cache.SqliteCache(answers))
+    paths = set(directory.rglob(embedding_cache.DB_NAME)) if directory.is_dir() else set()
+    embed_dir = embedding_cache.embed_cache_dir()
+    if embed_dir is not None and (embed_dir / embedding_cache.DB_NAME).is_file():
+        paths.add(embed_dir / embedding_cache.DB_NAME)
+    stores += [embedding_cache.VectorCache(p) for p in sorted({p.resolve() for p in paths})]
+    return stores
+
+
+def find_index_roots(directory: Path) -> List[Path]:
+    """Return the persisted-index directories: ``directory/indexes`` and ``RAG_BENCH_INDEX_CACHE`` when set."""
+    from rag_bencher.vector import index_cache
+
+    roots = [directory / "indexes"]
+    configured = index_cache.index_cache_dir()
+    if configured is not None:
+        roots.append(configured)
+    return sorted({r.resolve() for r in roots if r.is_dir()})
+
+
+def _dir_bytes(folder: Path) -> int:
+    return sum(f.stat().st_size for f in folder.rglob("*") if f.is_file())
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1 << 20):.2f}"
+
+
+def _stats(stores: List[cache.SqliteCache], index_roots: List[Path]) -> None:
+    from rag_bencher.vector import index_cache
+
+    table = Table(title="Cache stores")
+    for col in ("path", "entries", "expired", "entry MiB", "vectors", "vector MiB", "file MiB"):
+        table.add_column(col)
+    for store in stores:
+        u = store.usage()
+        table.add_row(
+            str(store.path),
+            str(u["entries"]),
+            str(u["expired"]),
+            _mib(u["bytes"]),
+            str(u.get("vectors", "-")),
+            _mib(u["vector_bytes"]) if "vector_bytes" in u else "-",
+            _mib(u["file_bytes"]),
+        )
+    for root in index_roots:
+        folders = index_cache.cached_indexes(root)
+        size = sum(_dir_bytes(f) for f in folders)
+        table.add_row(f"{root} (indexes)", str(len(folders)), "-", _mib(size), "-", "-", _mib(_dir_bytes(root)))
+    console.print(table)
+
+
+def _gc(stores: List[cache.SqliteCache], index_roots: List[Path], max_mb: Optional[int], policy: str) -> None:
+    """Drop expired entries, then evict across every store and index root until all of them fit one budget."""
+    from rag_bencher.vector import index_cache
+
+    budget = max_mb << 20 if max_mb is not None else cache.budget_bytes()
+    removed = [store.purge_expired() for store in stores]
+    folders = [(f, _dir_bytes(f)) for root in index_roots for f in index_cache.cached_indexes(root)]
+    dropped: List[cache.EvictionCandidate] = []
+    if budget is not None:
+        total = sum(store.stored_bytes() for store in stores) + sum(size for _, size in folders)
+        # Indexes record no reads: they rank by write time and, under lfu, as never read.
+        indexes = [cache.EvictionCandidate(_written(f), 0, size, "index", (str(f),)) for f, size in folders]
+        order = cache.eviction_order(policy)
+        sources = [*(store.eviction_candidates(policy) for store in stores), sorted(indexes, key=order)]
+        *victims, dropped = cache.plan_eviction(sources, total - budget, policy)
+        for n, (store, rows) in enumerate(zip(stores, victims, strict=True)):
+            store.remove(rows)
+            removed[n] += len(rows)
+        for candidate in dropped:
+            index_cache.remove_index(Path(candidate.ref[0]))
+    for store, count in zip(stores, removed, strict=True):
+        store.vacuum()
+        console.print(f"{store.path}: removed {count} entries")
+    for root in index_roots:
+        count = sum(Path(c.ref[0]).is_relative_to(root) for c in dropped)
+        console.print(f"{root}: removed {count} index folders")
+
+
+def _written(folder: Path) -> float:
+    from rag_bencher.vector import index_cache
+
+    return (folder / index_cache.MANIFEST_NAME).stat().st_mtime
+
+
+def _prune(stores: List[cache.SqliteCache], index_roots: List[Path], older_than: str) -> None:
+    from rag_bencher.vector import index_cache
+
+    seconds = cache.parse_duration(older_than)
+    for store in stores:
+        removed = store.prune(seconds)
+        store.vacuum()
+        console.print(f"{store.path}: pruned {removed} rows older than {older_than}")
+    cutoff = time.time() - seconds
+    for root in index_roots:
+        old = [f for f in index_cache.cached_indexes(root) if (f / index_cache.MANIFEST_NAME).stat().st_mtime < cutoff]
+        for folder in old:
+            index_cache.remove_index(folder)
+        console.print(f"{root}: pruned {len(old)} index folders older than {older_than}")
+
+
+def _answer_store(directory: Path) -> cache.SqliteCache:
+    path = directory / cache.DB_NAME
+    if not path.is_file():
+        console.print(f"[red]No answer cache at {path}[/red]")
+        raise SystemExit(1)
+    return cache.SqliteCache(path)
+
+
+def _compress(directory: Path, level: int) -> None:
+    store = _answer_store(directory)
+    try:
+        store.codec = compression.ZstdCodec(level)
+        dict_id = store.train_dictionary()
+        if dict_id is None:
+            console.print(f"Too few entries to train a dictionary; compressing without one (zstd level {level})")
+        before = store.usage()["bytes"]
+        count = store.recompress()
+        after = store.usage()["bytes"]
+        store.vacuum()
+    finally:
+        store.close()
+    console.print(f"Recompressed {count} entries: {_mib(before)} MiB -> {_mib(after)} MiB")
+    if not compression.compression_enabled():
+        console.print(f"Set {compression.ENV_KEY}=1 to compress new entries as well.")
+
+
+def _bench(directory: Path, level: int, limit: int) -> None:
+    store = _answer_store(directory)
+    try:
+        values = [str(e["value"]) for e in itertools.islice(store.export(), limit)]
+    finally:
+        store.close()
+    table = Table(title=f"Cache entry compression ({len(values)} entries)")
+    for col in ("codec", "MiB", "ratio", "encode us/entry", "decode us/entry"):
+        table.add_column(col)
+    for row in compression.compression_report(values, level):
+        table.add_row(
+            row["codec"], _mib(row["bytes"]), f"{row['ratio']:.2f}x", str(row["encode_us"]), str(row["decode_us"])
+        )
+    console.print(table)
+
+
+def _export(directory: Path, output: Optional[Path]) -> None:
+    store = _answer_store(directory)
+    out = output.open("w", encoding="utf-8") if output else sys.stdout
+    count = 0
+    try:
+        for entry in store.export():
+            out.write(json.dumps(entry) + "\n")
+            count += 1
+    finally:
+        store.close()
+        if output:
+            out.close()
+    if output:
+        console.print(f"Exported {count} entries to {output}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Inspect and garbage-collect the rag-bencher caches")
+    ap.add_argument("--dir", type=Path, default=cache.D, help="Cache directory (default: .ragbencher_cache)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entry counts and sizes of every cache store and persisted index")
+    gc = sub.add_parser(
+        "gc", help="Drop expired entries, evict stores and persisted indexes down to one shared byte budget and vacuum"
+    )
+    gc.add_argument("--max-mb", type=int, help=f"Byte budget in MiB (default: ${cache.MAX_MB_ENV_KEY})")
+    gc.add_argument("--policy", choices=cache.EVICTION_POLICIES, help=f"Default: ${cache.EVICTION_ENV_KEY} or lru")
+    prune = sub.add_parser("prune", help="Delete entries, vectors and persisted indexes written before a cutoff")
+    prune.add_argument("--older-than", required=True, help="Age such as 3600, 30m, 12h, 7d or 2w")
+    export = sub.add_parser("export", help="Write live answer entries as JSON lines")
+    export.add_argument("--output", type=Path, help="Output file (default: stdout)")
+    compress = sub.add_parser("compress", help="Train a zstd dictionary on the answer cache and recompress it")
+    bench = sub.add_parser("bench", help="Compare entry size and codec latency with and without compression")
+    for p in (compress, bench):
+        p.add_argument("--level", type=int, default=compression.DEFAULT_LEVEL, help="zstd level (default: 3)")
+    bench.add_argument("--limit", type=int, default=5000, help="Entries to measure (default: 5000)")
+    args = ap.parse_args()
+
+    if args.command == "export":
+        _export(args.dir, args.output)
+        return
+    if args.command == "compress":
+        _compress(args.dir, args.level)
+        return
+    if args.command == "bench":
+        _bench(args.dir, args.level, args.limit)
+        return
+    stores = find_stores(args.dir)
+    index_roots = find_index_roots(args.dir)
+    if not stores and not index_roots:
+        console.print(f"No cache stores under {args.dir}")
+        return
+    try:
+        if args.command == "stats":
+            _stats(stores, index_roots)
+        elif args.command == "gc":
+            _gc(stores, index_roots, args.max_mb, args.policy or cache.eviction_policy())
+        else:
+            try:
+                _prune(stores, index_roots, args.older_than)
+            except ValueError as e:
+                console.print(f"[red]{e}[/red]")
+                raise SystemExit(2) from e
+    finally:
+        for store in stores:
+            store.close()
+
+
+if __name__ == "__main__":  # pragma: no cover - script entrypoint
+    main()
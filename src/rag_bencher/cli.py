@@ -11,15 +11,29 @@ from rich.console import Console
 from rag_bencher.config import BenchConfig, load_config
 from rag_bencher.eval.dataset_loader import load_texts_as_documents
 from rag_bencher.pipelines import naive_rag
+from rag_bencher.pipelines.utils import answer_cache_namespace
 from rag_bencher.providers.base import build_chat_adapter, build_embeddings_adapter
 from rag_bencher.utils.cache import cache_get, cache_set
 from rag_bencher.utils.callbacks.usage import UsageTracker
+from rag_bencher.utils.factories import make_hf_embeddings
 from rag_bencher.utils.repro import set_seeds
 from rag_bencher.vector.base import VectorBackend, build_vector_backend
+from rag_bencher.vector.embedding_cache import with_embed_cache
 
 console = Console()
 
 
+def _offline_model_id() -> str:
+    return os.getenv("RAG_BENCH_OFFLINE_MODEL", "google/flan-t5-small")
+
+
+def _llm_id(cfg: BenchConfig) -> str:
+    """Name the chat backend :func:`_pick_llm` selects, for the answer cache key."""
+    if getattr(cfg.runtime, "offline", False):
+        return f"hf:{_offline_model_id()}"
+    return "provider" if getattr(cfg, "provider", None) else "openai"
+
+
 def _pick_llm(cfg: BenchConfig) -> RunnableSerializable[Any, Any]:
     """Return a LangChain LLM object based on offline flag."""
     if getattr(cfg.runtime, "offline", False):
@@ -28,7 +42,7 @@ def _pick_llm(cfg: BenchConfig) -> RunnableSerializable[Any, Any]:
         from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
         from transformers import pipeline as hf_pipeline
 
-        model_id = os.getenv("RAG_BENCH_OFFLINE_MODEL", "google/flan-t5-small")
+        model_id = _offline_model_id()
         tok = AutoTokenizer.from_pretrained(model_id)
         model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
 
@@ -97,6 +111,11 @@ def main() -> None:
         adapter = build_embeddings_adapter(cfg.model_dump().get("provider"))
         if adapter:
             emb = adapter.to_langchain()
+    backend = getattr(cfg.runtime, "embeddings_backend", "torch")
+    if emb is None and backend != "torch":
+        emb = make_hf_embeddings(backend=backend)
+    if emb is not None:
+        emb = with_embed_cache(emb)
 
     # Vector retriever (optional; safe fallback)
     vec: Optional[VectorBackend] = build_vector_backend(cfg.model_dump().get("vector"))
@@ -111,14 +130,22 @@ def main() -> None:
     llm_obj = _pick_llm(cfg)
 
     chain, _meta = naive_rag.build_chain(
-        docs, model=cfg.model.name, k=cfg.retriever.k, llm=llm_obj, embeddings=emb, retriever=retr
+        docs,
+        model=cfg.model.name,
+        k=cfg.retriever.k,
+        llm=llm_obj,
+        embeddings=emb,
+        retriever=retr,
+        faiss_index=cfg.faiss_index(),
     )
 
     prompt = args.question
-    cached = cache_get(cfg.model.name, prompt)
+    # Keyed by the effective config and corpus, so editing either never returns a stale answer.
+    namespace = answer_cache_namespace(cfg, docs, "cli-naive", _llm_id(cfg))
+    cached = cache_get(namespace, prompt)
     if cached is None:
         ans = chain.invoke(prompt, config={"callbacks": [UsageTracker()]})
-        cache_set(cfg.model.name, prompt, ans)
+        cache_set(namespace, prompt, ans)
     else:
         ans = cached
 
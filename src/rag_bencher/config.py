@@ -2,7 +2,7 @@ import os
 from typing import Any, Dict, List, Literal, Optional
 
 import yaml
-from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
 
 
 class ModelCfg(BaseModel):
@@ -32,6 +32,7 @@ class RuntimeCfg(BaseModel):
     model_config = ConfigDict(extra="forbid", strict=True)
     offline: bool = False
     device: Literal["auto", "cpu", "cuda"] = "auto"
+    embeddings_backend: Literal["torch", "onnx", "onnx-int8"] = "torch"
 
 
 class HydeCfg(BaseModel):
@@ -45,11 +46,33 @@ class MultiQueryCfg(BaseModel):
 
 class RerankCfg(BaseModel):
     model_config = ConfigDict(extra="forbid", strict=True)
-    method: str = "cosine"
+    method: Literal["cosine", "cross_encoder"] = "cosine"
     top_k: int = Field(4, ge=1, le=50)
     cross_encoder_model: Optional[str] = "BAAI/bge-reranker-base"
 
 
+class SemanticCacheCfg(BaseModel):
+    """Reuse the cached answer of a previously asked question whose embedding is close enough."""
+
+    model_config = ConfigDict(extra="forbid", strict=True)
+    threshold: float = Field(0.92, gt=0.0, le=1.0)
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0)
+
+
+class FaissIndexCfg(BaseModel):
+    """Local FAISS index selected with ``vector: {name: faiss, ...}``."""
+
+    model_config = ConfigDict(extra="forbid", strict=True)
+    index: Literal["flat", "ivf", "hnsw", "ivf_pq"] = "flat"
+    nlist: int = Field(default=100, ge=1)
+    nprobe: int = Field(default=8, ge=1)
+    m: int = Field(default=32, ge=2, le=512)
+    ef_construction: int = Field(default=200, ge=1)
+    ef_search: int = Field(default=64, ge=1)
+    pq_m: int = Field(default=8, ge=1)
+    pq_nbits: int = Field(default=8, ge=1, le=16)
+
+
 class BenchConfig(BaseModel):
     model_config = ConfigDict(extra="forbid", strict=True)
     model: ModelCfg
@@ -61,6 +84,21 @@ class BenchConfig(BaseModel):
     hyde: HydeCfg | None = None
     multi_query: MultiQueryCfg | None = None
     rerank: RerankCfg | None = None
+    semantic_cache: SemanticCacheCfg | None = None
+
+    @model_validator(mode="after")
+    def _check_vector(self) -> "BenchConfig":
+        try:
+            self.faiss_index()
+        except ValidationError as e:
+            raise ValueError(f"vector: {e}") from e
+        return self
+
+    def faiss_index(self) -> FaissIndexCfg | None:
+        """Return the local FAISS index settings when ``vector.name`` is ``faiss``."""
+        if not self.vector or str(self.vector.get("name", "")).lower() != "faiss":
+            return None
+        return FaissIndexCfg.model_validate({k: v for k, v in self.vector.items() if k != "name"})
 
 
 def load_config(path: str) -> BenchConfig:
@@ -0,0 +1,68 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.utils.factories import make_hf_embeddings
+from rag_bencher.vector.numpy_store import normalize_rows
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Short, mixed-length probe set; the corpus itself can be passed instead.
+PARITY_TEXTS = [
+    "What is retrieval-augmented generation?",
+    "Retrieval-augmented generation grounds a language model's answer in documents fetched for the question.",
+    "FAISS builds approximate nearest-neighbour indexes over dense vectors.",
+    "The Eiffel Tower is in Paris.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "A cross-encoder scores a query and a passage jointly, which is slower but more accurate than a bi-encoder.",
+    "Quantization stores weights in fewer bits to speed up inference on CPUs.",
+    "How many legs does a spider have?",
+    "Spiders have eight legs.",
+    "The mitochondria is the powerhouse of the cell.",
+]
+
+
+def embedding_parity(reference: Embeddings, candidate: Embeddings, texts: Sequence[str]) -> Dict[str, float]:
+    """Compare two embedders on ``texts``.
+
+    Returns the min/mean cosine between each text's two vectors and the fraction of texts whose
+    nearest other text is the same under both models (what retrieval actually depends on).
+    """
+    texts = list(texts)
+    ref = normalize_rows(reference.embed_documents(texts))
+    cand = normalize_rows(candidate.embed_documents(texts))
+    cosine = np.sum(ref * cand, axis=1)
+    agreement = 1.0
+    if len(texts) > 1:
+        ref_sim, cand_sim = ref @ ref.T, cand @ cand.T
+        np.fill_diagonal(ref_sim, -np.inf)
+        np.fill_diagonal(cand_sim, -np.inf)
+        agreement = float(np.mean(ref_sim.argmax(axis=1) == cand_sim.argmax(axis=1)))
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "neighbour_agreement": agreement,
+    }
+
+
+def check_backend_parity(
+    backend: str,
+    model_name: str = DEFAULT_MODEL,
+    texts: Optional[Sequence[str]] = None,
+    min_cosine: float = 0.98,
+) -> Dict[str, float]:
+    """Embed ``texts`` with the torch backend and ``backend``; raise ValueError if they drift apart.
+
+    ``min_cosine`` applies to every text. An fp32 ONNX export should match torch up to float error;
+    the default floor leaves room for int8 quantization noise.
+    """
+    reference = make_hf_embeddings(model_name, backend="torch")
+    candidate = make_hf_embeddings(model_name, backend=backend)
+    report = embedding_parity(reference, candidate, texts or PARITY_TEXTS)
+    if report["min_cosine"] < min_cosine:
+        raise ValueError(
+            f"{backend} embeddings for {model_name} drift from torch: "
+            f"min cosine {report['min_cosine']:.4f} < {min_cosine}"
+        )
+    return report
@@ -3,6 +3,25 @@ from pathlib import Path
 from typing import Any, Mapping
 
 
+def render_cache_stats(stats: Mapping[str, Any]) -> str:
+    """Render response-cache counters (see :func:`rag_bencher.utils.cache.cache_stats`) as an HTML section."""
+    if not stats:
+        return ""
+    cells = "".join(f"<tr><td>{key}</td><td>{value}</td></tr>" for key, value in stats.items())
+    return (
+        '<div class="section"><h2>Cache</h2>'
+        '<table border="1" cellpadding="6" cellspacing="0">'
+        f"{cells}</table></div>"
+    )
+
+
+def cache_assisted(stats: Mapping[str, Any], questions: int) -> str:
+    """Note for summaries whose answers may come from the answer cache rather than fresh LLM calls."""
+    hits = int(stats.get("memory_hits", 0)) + int(stats.get("disk_hits", 0))
+    semantic = int(stats.get("semantic_hits", 0))
+    return f"cache-assisted: {hits} answer cache hits and {semantic} semantic cache hits over {questions} questions"
+
+
 def _render_extras(extras: Mapping[str, Any]) -> str:
     if not extras:
         return ""
@@ -40,6 +59,7 @@ def _render_extras(extras: Mapping[str, Any]) -> str:
         u = extras["usage"]
         html.append("<h3>Usage</h3><pre>" + str(u) + "</pre>")
     html.append("</div>")
+    html.append(render_cache_stats(extras.get("cache") or {}))
     return "\n".join(html)
 
 
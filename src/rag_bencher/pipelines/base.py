@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Mapping, Tuple
+from typing import Any, Dict, Tuple
 
 from langchain_core.runnables import RunnableSerializable
 
-BuildResult = Tuple[RunnableSerializable[str, str], Callable[[], Mapping[str, Any]]]
+# {"answer": str, "debug": {...retrieval details of that call...}}
+TracedAnswer = Dict[str, Any]
+BuildResult = Tuple[RunnableSerializable[str, str], RunnableSerializable[str, TracedAnswer]]
 
 
 class RagPipeline(ABC):
     @abstractmethod
     def build(self) -> BuildResult:
-        """Return a runnable chain and a debug callback for metadata inspection."""
+        """Return the answer chain and a traced chain that also returns each call's retrieval details."""
         raise NotImplementedError
@@ -1,15 +1,23 @@
-from typing import Any, Callable, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough, RunnableSerializable
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableSerializable
+from langchain_core.vectorstores import VectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from rag_bencher.config import FaissIndexCfg
 from rag_bencher.pipelines.base import BuildResult
-from rag_bencher.pipelines.utils import has_openai_key, resolve_chat_llm
+from rag_bencher.pipelines.utils import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEFAULT_EMBEDDING_MODEL,
+    build_traced_chain,
+    has_openai_key,
+    resolve_chat_llm,
+)
 from rag_bencher.utils.factories import make_hf_embeddings
 from rag_bencher.vector.local import build_local_vectorstore
 
@@ -28,14 +36,19 @@ def build_chain(
     k: int = 4,
     llm: Optional[RunnableSerializable[Any, Any]] = None,
     embeddings: Optional[Embeddings] = None,
+    faiss_index: Optional[FaissIndexCfg] = None,
+    vectorstore: Optional[VectorStore] = None,
 ) -> BuildResult:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-    splits = splitter.split_documents(docs)
-    embed = embeddings or make_hf_embeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vect = build_local_vectorstore(splits, embed)
+    embed = embeddings or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL)
+    if vectorstore is None:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        vectorstore = build_local_vectorstore(splitter.split_documents(docs), embed, faiss_index=faiss_index)
+    vect = vectorstore
 
     openai_ok = has_openai_key()
     if openai_ok and llm is None:
+        from langchain_openai import ChatOpenAI
+
         llm_h = ChatOpenAI(model=model, temperature=0)
         hyp_tmpl = PromptTemplate.from_template(HYP_PROMPT)
 
@@ -49,29 +62,16 @@ def build_chain(
 
     llm_answer = resolve_chat_llm(model, override=llm)
 
-    class _ContextBuilder:
-        def __init__(self, generator: Callable[[str], str]) -> None:
-            self._generator = generator
-            self._last_debug: Dict[str, Any] = {"pipeline": "hyde", "hypothesis": "", "retrieved": []}
-
-        def __call__(self, question: str) -> str:
-            hyp = self._generator(question)
-            docs_h = vect.similarity_search(hyp, k=k)
-            context = "\n\n".join(d.page_content for d in docs_h)
-            self._last_debug = {
-                "pipeline": "hyde",
-                "hypothesis": hyp,
-                "retrieved": [
-                    {"source": d.metadata.get("source", ""), "preview": d.page_content[:160]} for d in docs_h
-                ],
-            }
-            return context
-
-        @property
-        def last_debug(self) -> Dict[str, Any]:
-            return self._last_debug
-
-    context_builder = _ContextBuilder(gen_hyp)
+    def retrieve(question: str) -> Tuple[str, Dict[str, Any]]:
+        hyp = gen_hyp(question)
+        docs_h = vect.similarity_search(hyp, k=k)
+        context = "\n\n".join(d.page_content for d in docs_h)
+        debug = {
+            "pipeline": "hyde",
+            "hypothesis": hyp,
+            "retrieved": [{"source": d.metadata.get("source", ""), "preview": d.page_content[:160]} for d in docs_h],
+        }
+        return context, debug
 
     template = (
         "You are a helpful assistant. Use the context to answer.\n"
@@ -80,18 +80,4 @@ def build_chain(
     )
     prompt = PromptTemplate.from_template(template)
 
-    chain = cast(
-        RunnableSerializable[str, str],
-        {
-            "context": RunnableLambda(context_builder),
-            "question": RunnablePassthrough(),
-        }
-        | prompt
-        | llm_answer
-        | StrOutputParser(),
-    )
-
-    def debug() -> Dict[str, Any]:
-        return context_builder.last_debug
-
-    return chain, debug
+    return build_traced_chain(retrieve, prompt, llm_answer)
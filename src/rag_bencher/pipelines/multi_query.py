@@ -1,15 +1,23 @@
-from typing import Any, Callable, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough, RunnableSerializable
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableSerializable
+from langchain_core.vectorstores import VectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from rag_bencher.config import FaissIndexCfg
 from rag_bencher.pipelines.base import BuildResult
-from rag_bencher.pipelines.utils import has_openai_key, resolve_chat_llm
+from rag_bencher.pipelines.utils import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEFAULT_EMBEDDING_MODEL,
+    build_traced_chain,
+    has_openai_key,
+    resolve_chat_llm,
+)
 from rag_bencher.utils.factories import make_hf_embeddings
 from rag_bencher.vector.local import build_local_vectorstore
 
@@ -49,15 +57,20 @@ def build_chain(
     n_queries: int = 3,
     llm: Optional[RunnableSerializable[Any, Any]] = None,
     embeddings: Optional[Embeddings] = None,
+    faiss_index: Optional[FaissIndexCfg] = None,
+    vectorstore: Optional[VectorStore] = None,
 ) -> BuildResult:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-    splits = splitter.split_documents(docs)
-    embed = embeddings or make_hf_embeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vect = build_local_vectorstore(splits, embed)
+    embed = embeddings or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL)
+    if vectorstore is None:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        vectorstore = build_local_vectorstore(splitter.split_documents(docs), embed, faiss_index=faiss_index)
+    vect = vectorstore
 
     llm_answer = resolve_chat_llm(model, override=llm)
     openai_ok = has_openai_key()
     if openai_ok and llm is None:
+        from langchain_openai import ChatOpenAI
+
         llm_gen = ChatOpenAI(model=model, temperature=0)
         gen_tmpl = PromptTemplate.from_template(GEN_PROMPT)
 
@@ -71,37 +84,26 @@ def build_chain(
         def gen_queries(q: str) -> List[str]:
             return _fallback_queries(q, n_queries)
 
-    class _ContextBuilder:
-        def __init__(self, query_fn: Callable[[str], List[str]]) -> None:
-            self._query_fn = query_fn
-            self._last_debug: Dict[str, Any] = {"pipeline": "multi_query", "queries": [], "retrieved": []}
-
-        def __call__(self, question: str) -> str:
-            queries = self._query_fn(question)
-            seen: set[str] = set()
-            aggregated: List[Document] = []
-            for qr in queries:
-                docs_q = vect.similarity_search(qr, k=k)
-                for d in docs_q:
-                    key = d.page_content[:200]
-                    if key not in seen:
-                        seen.add(key)
-                        aggregated.append(d)
-            context = "\n\n".join(d.page_content for d in aggregated[: max(k, len(aggregated))])
-            self._last_debug = {
-                "pipeline": "multi_query",
-                "queries": queries,
-                "retrieved": [
-                    {"source": d.metadata.get("source", ""), "preview": d.page_content[:160]} for d in aggregated
-                ],
-            }
-            return context
-
-        @property
-        def last_debug(self) -> Dict[str, Any]:
-            return self._last_debug
-
-    context_builder = _ContextBuilder(gen_queries)
+    def retrieve(question: str) -> Tuple[str, Dict[str, Any]]:
+        queries = gen_queries(question)
+        seen: set[str] = set()
+        aggregated: List[Document] = []
+        for qr in queries:
+            docs_q = vect.similarity_search(qr, k=k)
+            for d in docs_q:
+                key = d.page_content[:200]
+                if key not in seen:
+                    seen.add(key)
+                    aggregated.append(d)
+        context = "\n\n".join(d.page_content for d in aggregated[: max(k, len(aggregated))])
+        debug = {
+            "pipeline": "multi_query",
+            "queries": queries,
+            "retrieved": [
+                {"source": d.metadata.get("source", ""), "preview": d.page_content[:160]} for d in aggregated
+            ],
+        }
+        return context, debug
 
     template = (
         "You are a helpful assistant. Use the context to answer.\n"
@@ -110,18 +112,4 @@ def build_chain(
     )
     prompt = PromptTemplate.from_template(template)
 
-    chain = cast(
-        RunnableSerializable[str, str],
-        {
-            "context": RunnableLambda(context_builder),
-            "question": RunnablePassthrough(),
-        }
-        | prompt
-        | llm_answer
-        | StrOutputParser(),
-    )
-
-    def debug() -> Dict[str, Any]:
-        return context_builder.last_debug
-
-    return chain, debug
+    return build_traced_chain(retrieve, prompt, llm_answer)
@@ -1,15 +1,22 @@
-from typing import Any, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_core.retrievers import BaseRetriever
-from langchain_core.runnables import RunnablePassthrough, RunnableSerializable
+from langchain_core.runnables import RunnableConfig, RunnableSerializable
+from langchain_core.vectorstores import VectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from rag_bencher.config import FaissIndexCfg
 from rag_bencher.pipelines.base import BuildResult
-from rag_bencher.pipelines.utils import resolve_chat_llm
+from rag_bencher.pipelines.utils import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEFAULT_EMBEDDING_MODEL,
+    build_traced_chain,
+    resolve_chat_llm,
+)
 from rag_bencher.utils.factories import make_hf_embeddings
 from rag_bencher.vector.local import build_local_vectorstore
 
@@ -21,14 +28,16 @@ def build_chain(
     llm: Optional[RunnableSerializable[Any, Any]] = None,
     embeddings: Optional[Embeddings] = None,
     retriever: Optional[BaseRetriever] = None,
+    faiss_index: Optional[FaissIndexCfg] = None,
+    vectorstore: Optional[VectorStore] = None,
 ) -> BuildResult:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-    splits = splitter.split_documents(docs)
-    embed = embeddings or make_hf_embeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
     retr: BaseRetriever
     if retriever is None:
-        vect = build_local_vectorstore(splits, embed)
-        retr = cast(BaseRetriever, vect.as_retriever(search_kwargs={"k": k}))
+        if vectorstore is None:
+            embed = embeddings or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL)
+            splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+            vectorstore = build_local_vectorstore(splitter.split_documents(docs), embed, faiss_index=faiss_index)
+        retr = cast(BaseRetriever, vectorstore.as_retriever(search_kwargs={"k": k}))
     else:
         retr = retriever
     prompt = PromptTemplate.from_template(
@@ -37,15 +46,13 @@ def build_chain(
     base_llm: RunnableSerializable[Any, Any] = resolve_chat_llm(model, override=llm)
     llm_with_stop = cast(RunnableSerializable[Any, Any], base_llm.bind(stop=["###END"]))
 
-    def ctx_join(d: List[Document]) -> str:
-        return "\n\n".join(x.page_content for x in d)
+    def retrieve(question: str, config: RunnableConfig) -> Tuple[str, Dict[str, Any]]:
+        found = retr.invoke(question, config=config)
+        context = "\n\n".join(d.page_content for d in found)
+        debug = {
+            "pipeline": "naive_rag",
+            "retrieved": [{"source": d.metadata.get("source", ""), "preview": d.page_content[:160]} for d in found],
+        }
+        return context, debug
 
-    chain = cast(
-        RunnableSerializable[str, str],
-        {"context": retr | ctx_join, "question": RunnablePassthrough()} | prompt | llm_with_stop | StrOutputParser(),
-    )
-
-    def metadata() -> dict[str, Any]:
-        return {"pipeline": "naive_rag"}
-
-    return chain, metadata
+    return build_traced_chain(retrieve, prompt, llm_with_stop)
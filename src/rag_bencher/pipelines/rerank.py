@@ -1,26 +1,68 @@
-from typing import Any, Dict, List, Optional, cast
+import hashlib
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough, RunnableSerializable
+from langchain_core.runnables import RunnableSerializable
+from langchain_core.vectorstores import VectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from numpy.typing import ArrayLike
 
+from rag_bencher.config import FaissIndexCfg
 from rag_bencher.pipelines.base import BuildResult
-from rag_bencher.pipelines.utils import resolve_chat_llm
-from rag_bencher.utils.factories import make_hf_embeddings
-from rag_bencher.vector.local import build_local_vectorstore
+from rag_bencher.pipelines.utils import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEFAULT_EMBEDDING_MODEL,
+    build_traced_chain,
+    resolve_chat_llm,
+)
+from rag_bencher.utils.cache import cache_batch, cache_get, cache_set
+from rag_bencher.utils.factories import make_cross_encoder, make_hf_embeddings
+from rag_bencher.vector.local import build_local_vectorstore, stored_vectors
+from rag_bencher.vector.numpy_store import FloatMatrix, normalize_rows
 
 
-def _cosine(u: ArrayLike, v: ArrayLike) -> float:
-    un = np.linalg.norm(u)
-    vn = np.linalg.norm(v)
-    if un == 0 or vn == 0:
-        return 0.0
-    return float(np.dot(u, v) / (un * vn))
+def _cosine_scores(query: Sequence[float], vectors: Sequence[Sequence[float]] | FloatMatrix) -> FloatMatrix:
+    """Cosine similarity of ``query`` against every row of ``vectors`` (zero vectors score 0)."""
+    scores: FloatMatrix = normalize_rows(vectors) @ normalize_rows([query])[0]
+    return scores
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cross_encoder_scores(
+    model_name: str, question: str, docs: Sequence[Document], use_cache: bool = True
+) -> List[float]:
+    """Score (question, chunk) pairs with a shared cross-encoder in one batch.
+
+    Scores persist in the response cache keyed by (model, question hash, chunk hash), so only
+    pairs not seen before reach the model.
+    """
+    cache_model = f"cross-encoder:{model_name}"
+    qhash = _sha(question)
+    keys = [f"{qhash}:{_sha(d.page_content)}" for d in docs]
+    scores: List[Optional[float]] = [None] * len(docs)
+    if use_cache:
+        for i, key in enumerate(keys):
+            hit = cache_get(cache_model, key)
+            if isinstance(hit, (int, float)):
+                scores[i] = float(hit)
+    missing = [i for i, sc in enumerate(scores) if sc is None]
+    if missing:
+        model = make_cross_encoder(model_name)
+        pairs = [(question, docs[i].page_content) for i in missing]
+        fresh = np.asarray(model.predict(pairs, batch_size=len(pairs), show_progress_bar=False), dtype=np.float64)
+        with cache_batch() if use_cache else nullcontext():
+            for i, score in zip(missing, fresh.reshape(len(pairs), -1)[:, 0].tolist(), strict=True):
+                scores[i] = score
+                if use_cache:
+                    cache_set(cache_model, keys[i], score)
+    return [float(sc) for sc in scores if sc is not None]
 
 
 def build_chain(
@@ -32,46 +74,48 @@ def build_chain(
     cross_encoder_model: str = "BAAI/bge-reranker-base",
     llm: Optional[RunnableSerializable[Any, Any]] = None,
     embeddings: Optional[Embeddings] = None,
+    faiss_index: Optional[FaissIndexCfg] = None,
+    vectorstore: Optional[VectorStore] = None,
+    score_cache: bool = True,
 ) -> BuildResult:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-    splits = splitter.split_documents(docs)
-    embed = embeddings or make_hf_embeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vect = build_local_vectorstore(splits, embed)
-
-    class _ContextBuilder:
-        def __init__(self) -> None:
-            self._last_debug: Dict[str, Any] = {"pipeline": "rerank", "method": method, "candidates": []}
+    if method not in {"cosine", "cross_encoder"}:
+        raise ValueError(f"Unknown rerank method {method!r}. Expected cosine or cross_encoder.")
+    embed = embeddings or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL)
+    if vectorstore is None:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        vectorstore = build_local_vectorstore(splitter.split_documents(docs), embed, faiss_index=faiss_index)
+    vect = vectorstore
 
-        def __call__(self, question: str) -> str:
-            candidates = vect.similarity_search(question, k=k)
-            qv = embed.embed_query(question)
-            scores: List[tuple[Document, float]] = []
-            for d in candidates:
-                dv = embed.embed_query(d.page_content)
-                scores.append((d, _cosine(qv, dv)))
-            scores.sort(key=lambda x: x[1], reverse=True)
-            chosen = [d for d, _ in scores[:rerank_top_k]]
-            context = "\n\n".join(d.page_content for d in chosen)
-            self._last_debug = {
-                "pipeline": "rerank",
-                "method": method,
-                "rerank_top_k": rerank_top_k,
-                "candidates": [
-                    {
-                        "score": float(sc),
-                        "preview": doc.page_content[:160],
-                        "source": doc.metadata.get("source", ""),
-                    }
-                    for doc, sc in scores[:20]
-                ],
-            }
-            return context
-
-        @property
-        def last_debug(self) -> Dict[str, Any]:
-            return self._last_debug
+    def retrieve(question: str) -> Tuple[str, Dict[str, Any]]:
+        qv = embed.embed_query(question)
+        candidates = vect.similarity_search_by_vector(qv, k=k)
+        scores: List[tuple[Document, float]] = []
+        if candidates and method == "cross_encoder":
+            ce_scores = _cross_encoder_scores(cross_encoder_model, question, candidates, use_cache=score_cache)
+            scores = list(zip(candidates, ce_scores, strict=True))
+        elif candidates:
+            # Reuse the vectors the index holds; embed in one batch only when it cannot return them.
+            stored = stored_vectors(vect, candidates)
+            vectors = stored if stored is not None else embed.embed_documents([d.page_content for d in candidates])
+            scores = list(zip(candidates, _cosine_scores(qv, vectors).tolist(), strict=True))
+        scores.sort(key=lambda x: x[1], reverse=True)
+        chosen = [d for d, _ in scores[:rerank_top_k]]
+        context = "\n\n".join(d.page_content for d in chosen)
+        debug = {
+            "pipeline": "rerank",
+            "method": method,
+            "rerank_top_k": rerank_top_k,
+            "candidates": [
+                {
+                    "score": float(sc),
+                    "preview": doc.page_content[:160],
+                    "source": doc.metadata.get("source", ""),
+                }
+                for doc, sc in scores[:20]
+            ],
+        }
+        return context, debug
 
-    context_builder = _ContextBuilder()
     template = (
         "You are a helpful assistant. Use the context to answer.\n"
         "If the answer is not in the context, say you don't know.\n"
@@ -80,18 +124,4 @@ def build_chain(
     prompt = PromptTemplate.from_template(template)
     llm_answer = resolve_chat_llm(model, override=llm)
 
-    chain = cast(
-        RunnableSerializable[str, str],
-        {
-            "context": RunnableLambda(context_builder),
-            "question": RunnablePassthrough(),
-        }
-        | prompt
-        | llm_answer
-        | StrOutputParser(),
-    )
-
-    def debug() -> Dict[str, Any]:
-        return context_builder.last_debug
-
-    return chain, debug
+    return build_traced_chain(retrieve, prompt, llm_answer)
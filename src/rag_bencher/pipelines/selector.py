@@ -1,17 +1,35 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import Any, Callable, Mapping, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.runnables import RunnableSerializable
+from langchain_core.vectorstores import VectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from rag_bencher.config import BenchConfig, load_config
 from rag_bencher.pipelines import hyde as hy
 from rag_bencher.pipelines import multi_query as mq
 from rag_bencher.pipelines import naive_rag
 from rag_bencher.pipelines import rerank as rr
+from rag_bencher.pipelines.base import TracedAnswer
+from rag_bencher.pipelines.semantic_cache import SemanticCache
+from rag_bencher.pipelines.utils import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEFAULT_EMBEDDING_MODEL,
+    answer_cache_namespace,
+    has_openai_key,
+    with_answer_cache,
+)
 from rag_bencher.providers.base import build_chat_adapter, build_embeddings_adapter
+from rag_bencher.utils import cache
+from rag_bencher.utils.factories import make_hf_embeddings
+from rag_bencher.vector.embedding_cache import embed_cache_dir, vector_cache, with_embed_cache
+from rag_bencher.vector.local import build_local_vectorstore
 
 
 @dataclass(frozen=True)
@@ -21,7 +39,7 @@ class PipelineSelection:
     pipeline_id: str
     config: BenchConfig
     chain: RunnableSerializable[str, str]
-    debug: Callable[[], Mapping[str, Any]]
+    traced: RunnableSerializable[str, TracedAnswer]
 
 
 def _build_provider_adapters(cfg: BenchConfig) -> tuple[Optional[RunnableSerializable[Any, Any]], Optional[Any]]:
@@ -31,15 +49,73 @@ def _build_provider_adapters(cfg: BenchConfig) -> tuple[Optional[RunnableSeriali
     emb_adapter = build_embeddings_adapter(provider_cfg) if provider_cfg else None
     llm_obj = chat_adapter.to_langchain() if chat_adapter else None
     emb_obj = emb_adapter.to_langchain() if emb_adapter else None
+    if emb_obj is None and cfg.runtime.embeddings_backend != "torch":
+        emb_obj = make_hf_embeddings(backend=cfg.runtime.embeddings_backend)
+    if embed_cache_dir() is not None:
+        emb_obj = with_embed_cache(emb_obj or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL))
     return llm_obj, emb_obj
 
 
+IndexKey = Tuple[Tuple[str, ...], str, str, str]
+
+
+def shared_index_key(cfg: BenchConfig) -> IndexKey:
+    """Return what determines a config's index: data paths, embedding setup and index variant.
+
+    Chunking is the same for every pipeline, so configs that differ only in pipeline type, ``retriever.k``,
+    the LLM or reranking settings share a key.
+    """
+    provider = cfg.provider
+    embeddings = (
+        json.dumps(
+            {"name": provider.name, "region": provider.region, "embeddings": provider.embeddings},
+            sort_keys=True,
+            default=repr,
+        )
+        if provider is not None
+        else ""
+    )
+    faiss_index = cfg.faiss_index()
+    variant = faiss_index.model_dump_json() if faiss_index is not None else ""
+    return (tuple(cfg.data.paths), embeddings, cfg.runtime.embeddings_backend, variant)
+
+
+class SharedIndexes:
+    """Vector stores built once per :func:`shared_index_key` and handed to every matching config."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[IndexKey, Tuple[Embeddings, VectorStore]] = {}
+
+    def __len__(self) -> int:
+        """Number of distinct indexes built so far."""
+        return len(self._entries)
+
+    def get(
+        self, cfg: BenchConfig, docs: list[Document], embeddings: Optional[Embeddings]
+    ) -> Tuple[Embeddings, VectorStore]:
+        """Return the embeddings and store for ``cfg``, splitting and indexing ``docs`` on first use.
+
+        ``docs`` must be the documents loaded from ``cfg.data.paths``.
+        """
+        key = shared_index_key(cfg)
+        entry = self._entries.get(key)
+        if entry is None:
+            embed = embeddings or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL)
+            splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+            store = build_local_vectorstore(splitter.split_documents(docs), embed, faiss_index=cfg.faiss_index())
+            entry = (embed, store)
+            self._entries[key] = entry
+        return entry
+
+
 def select_pipeline(
     cfg_path: str,
     docs: list[Document],
     cfg: BenchConfig | None = None,
+    indexes: SharedIndexes | None = None,
+    answer_cache: bool = False,
 ) -> PipelineSelection:
-    """Build the runnable chain and debug hook for the pipeline described by ``cfg_path``.
+    """Build the answer chain and traced chain for the pipeline described by ``cfg_path``.
 
     Parameters
     ----------
@@ -49,13 +125,25 @@ def select_pipeline(
         Corpus documents the pipeline will index/retrieve from.
     cfg:
         Optional pre-loaded BenchConfig to avoid re-parsing.
+    indexes:
+        Optional :class:`SharedIndexes` reused across calls, so configs with the same
+        :func:`shared_index_key` split, embed and index ``docs`` only once.
+    answer_cache:
+        Serve repeated questions from the response cache, keyed by
+        :func:`~rag_bencher.pipelines.utils.answer_cache_namespace`, so a rerun of an
+        unchanged config over an unchanged corpus does not call the LLM again. A
+        ``semantic_cache`` block in the config also serves paraphrases of earlier questions.
     """
     bench_cfg = cfg or load_config(cfg_path)
     llm_obj, emb_obj = _build_provider_adapters(bench_cfg)
+    faiss_index = bench_cfg.faiss_index()
+    vectorstore: Optional[VectorStore] = None
+    if indexes is not None:
+        emb_obj, vectorstore = indexes.get(bench_cfg, docs, emb_obj)
 
     if bench_cfg.rerank is not None:
         rrc = bench_cfg.rerank
-        chain, debug = rr.build_chain(
+        chain, traced = rr.build_chain(
             docs,
             model=bench_cfg.model.name,
             k=bench_cfg.retriever.k,
@@ -64,36 +152,59 @@ def select_pipeline(
             cross_encoder_model=rrc.cross_encoder_model or "BAAI/bge-reranker-base",
             llm=llm_obj,
             embeddings=emb_obj,
+            faiss_index=faiss_index,
+            vectorstore=vectorstore,
         )
         pipeline_id = "rerank"
     elif bench_cfg.multi_query is not None:
         mq_cfg = bench_cfg.multi_query
-        chain, debug = mq.build_chain(
+        chain, traced = mq.build_chain(
             docs,
             model=bench_cfg.model.name,
             k=bench_cfg.retriever.k,
             n_queries=mq_cfg.n_queries,
             llm=llm_obj,
             embeddings=emb_obj,
+            faiss_index=faiss_index,
+            vectorstore=vectorstore,
         )
         pipeline_id = "multi_query"
     elif bench_cfg.hyde is not None:
-        chain, debug = hy.build_chain(
+        chain, traced = hy.build_chain(
             docs,
             model=bench_cfg.model.name,
             k=bench_cfg.retriever.k,
             llm=llm_obj,
             embeddings=emb_obj,
+            faiss_index=faiss_index,
+            vectorstore=vectorstore,
         )
         pipeline_id = "hyde"
     else:
-        chain, debug = naive_rag.build_chain(
+        chain, traced = naive_rag.build_chain(
             docs,
             model=bench_cfg.model.name,
             k=bench_cfg.retriever.k,
             llm=llm_obj,
             embeddings=emb_obj,
+            faiss_index=faiss_index,
+            vectorstore=vectorstore,
         )
         pipeline_id = "naive"
 
-    return PipelineSelection(pipeline_id=pipeline_id, config=bench_cfg, chain=chain, debug=debug)
+    if answer_cache:
+        # Mirrors resolve_chat_llm: provider adapter, then OpenAI when a key is set, else the offline stub.
+        llm_id = "provider" if llm_obj is not None else "openai" if has_openai_key() else "offline"
+        semantic = None
+        if bench_cfg.semantic_cache is not None:
+            sc = bench_cfg.semantic_cache
+            semantic = SemanticCache(
+                emb_obj or make_hf_embeddings(model_name=DEFAULT_EMBEDDING_MODEL),
+                vector_cache(cache.D),
+                threshold=sc.threshold,
+                sample_rate=sc.sample_rate,
+            )
+        namespace = answer_cache_namespace(bench_cfg, docs, pipeline_id, llm_id)
+        chain, traced = with_answer_cache(traced, namespace, semantic)
+
+    return PipelineSelection(pipeline_id=pipeline_id, config=bench_cfg, chain=chain, traced=traced)
@@ -0,0 +1,117 @@
+import random
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.eval.metrics import lexical_f1
+from rag_bencher.vector.embedding_cache import VectorCache, embeddings_namespace
+from rag_bencher.vector.numpy_store import FloatMatrix, normalize_rows
+
+# A sampled semantic hit counts as false when its answer scores below this lexical F1 against a fresh answer.
+FALSE_HIT_F1 = 0.5
+SEMANTIC_COUNTERS = ("semantic_lookups", "semantic_hits", "semantic_checked", "semantic_false_hits")
+
+_counts: Dict[str, int] = dict.fromkeys(SEMANTIC_COUNTERS, 0)
+_counts_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _counts_lock:
+        _counts[name] += 1
+
+
+def semantic_rates(counts: Mapping[str, float]) -> Dict[str, float]:
+    """Hit rate over lookups and false-hit rate over sampled hits."""
+    lookups, checked = counts.get("semantic_lookups", 0), counts.get("semantic_checked", 0)
+    return {
+        "semantic_hit_rate": counts.get("semantic_hits", 0) / lookups if lookups else 0.0,
+        "semantic_false_hit_rate": counts.get("semantic_false_hits", 0) / checked if checked else 0.0,
+    }
+
+
+def semantic_cache_stats() -> Dict[str, float]:
+    """Semantic cache counters of this process, with hit and false-hit rates."""
+    with _counts_lock:
+        counts: Dict[str, float] = dict(_counts)
+    return {**counts, **semantic_rates(counts)}
+
+
+class SemanticCache:
+    """Nearest-neighbour lookup over previously answered questions.
+
+    Question embeddings are kept per answer-cache namespace, both in memory and in ``store``, so a
+    paraphrase only matches questions asked under the same config and corpus. ``sample_rate`` of
+    the hits are answered afresh anyway and compared with the cached answer to estimate how many
+    hits are false.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        store: VectorCache,
+        threshold: float,
+        sample_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.embeddings = embeddings
+        self.store = store
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._model = embeddings_namespace(embeddings)
+        self._index: Dict[str, Tuple[List[str], FloatMatrix]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def lookup(self, namespace: str, question: str) -> Optional[Tuple[str, float]]:
+        """Return the closest earlier question and its cosine similarity, if it reaches the threshold."""
+        _count("semantic_lookups")
+        query = normalize_rows([self.embeddings.embed_query(question)])[0]
+        with self._lock:
+            questions, matrix = self._questions(namespace)
+        if not questions:
+            return None
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.threshold or questions[best] == question:
+            return None
+        return questions[best], score
+
+    def add(self, namespace: str, question: str) -> None:
+        vector = normalize_rows([self.embeddings.embed_query(question)])[0]
+        self.store.set_vectors(self._key(namespace), [(question, vector)])
+        with self._lock:
+            questions, matrix = self._questions(namespace)
+            if question not in questions:
+                rows = np.vstack([matrix, vector[None, :]]) if questions else vector[None, :]
+                self._index[namespace] = (questions + [question], rows)
+
+    def should_check(self) -> bool:
+        """Decide whether this hit is sampled for a false-hit check."""
+        with self._lock:
+            return self.sample_rate > 0 and self._rng.random() < self.sample_rate
+
+    def record_hit(self) -> None:
+        _count("semantic_hits")
+
+    def record_check(self, cached_answer: str, fresh_answer: str) -> bool:
+        """Count a sampled hit and whether it was false; returns True for a false hit."""
+        _count("semantic_hits")
+        _count("semantic_checked")
+        false_hit = lexical_f1(cached_answer, fresh_answer) < FALSE_HIT_F1
+        if false_hit:
+            _count("semantic_false_hits")
+        return false_hit
+
+    def _key(self, namespace: str) -> str:
+        return f"semantic|{self._model}|{namespace}"
+
+    def _questions(self, namespace: str) -> Tuple[List[str], FloatMatrix]:
+        entry = self._index.get(namespace)
+        if entry is None:
+            stored = self.store.vectors(self._key(namespace))
+            matrix = np.vstack(list(stored.values())) if stored else np.zeros((0, 0), dtype=np.float32)
+            entry = self._index[namespace] = (list(stored), matrix)
+        return entry
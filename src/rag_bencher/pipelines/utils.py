@@ -1,8 +1,34 @@
+import hashlib
+import json
 import os
-from typing import Any, Optional, cast
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Tuple, TypeGuard, cast
 
-from langchain_core.runnables import RunnableLambda, RunnableSerializable
-from langchain_openai import ChatOpenAI
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import (
+    RunnableConfig,
+    RunnableLambda,
+    RunnableParallel,
+    RunnablePassthrough,
+    RunnableSerializable,
+)
+
+from rag_bencher.config import BenchConfig
+from rag_bencher.pipelines.base import BuildResult, TracedAnswer
+from rag_bencher.utils.cache import cache_get, cache_get_or_compute, cache_set
+
+if TYPE_CHECKING:
+    from rag_bencher.pipelines.semantic_cache import SemanticCache
+
+# Chunking and embedding model shared by every pipeline; configs that agree on the corpus can share one index.
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 120
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Retrieval step of a pipeline: question -> (context for the prompt, debug payload of this call).
+Retrieve = Callable[..., Tuple[str, Dict[str, Any]]]
 
 
 def has_openai_key() -> bool:
@@ -19,6 +45,8 @@ def resolve_chat_llm(
     if override is not None:
         return override
     if has_openai_key():
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(model=model, temperature=temperature)
 
     def _offline(prompt: Any) -> str:
@@ -27,3 +55,117 @@ def resolve_chat_llm(
 
     offline_chain = RunnableLambda(_offline)
     return cast(RunnableSerializable[Any, Any], offline_chain)
+
+
+def build_traced_chain(
+    retrieve: Retrieve,
+    prompt: PromptTemplate,
+    llm: RunnableSerializable[Any, Any],
+) -> BuildResult:
+    """Wire ``retrieve`` -> ``prompt`` -> ``llm`` into an answer chain and a traced chain.
+
+    The traced chain returns ``{"answer": ..., "debug": ...}`` with the debug payload of that very
+    call, so invocations can run concurrently (threads, ``batch``, ``abatch``) without sharing state.
+    ``retrieve`` may take a second ``config`` argument to pass callbacks on to nested runnables.
+    """
+    retrieval: RunnableParallel[str] = RunnableParallel(
+        retrieval=RunnableLambda(retrieve), question=RunnablePassthrough()
+    )
+    to_prompt: RunnableLambda[Dict[str, Any], Dict[str, Any]] = RunnableLambda(
+        lambda x: {"context": x["retrieval"][0], "question": x["question"]}
+    )
+    answer = to_prompt | prompt | llm | StrOutputParser()
+    traced = cast(
+        RunnableSerializable[str, TracedAnswer],
+        retrieval | RunnableParallel(answer=answer, debug=RunnableLambda(lambda x: x["retrieval"][1])),
+    )
+    chain = cast(RunnableSerializable[str, str], traced | itemgetter("answer"))
+    return chain, traced
+
+
+def corpus_fingerprint(docs: Sequence[Document]) -> str:
+    """SHA256 over the source and text of every document, in order."""
+    digest = hashlib.sha256()
+    for doc in docs:
+        for part in (str(doc.metadata.get("source", "")), doc.page_content):
+            data = part.encode("utf-8")
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def answer_cache_namespace(cfg: BenchConfig, docs: Sequence[Document], pipeline: str, llm: str) -> str:
+    """Cache namespace for answers of ``pipeline`` run with ``cfg`` over ``docs``.
+
+    Hashes the effective config (defaults filled in) together with the corpus contents, the
+    shared chunking settings, the local index settings (the store ``RAG_BENCH_VECTORSTORE``
+    resolves to, including the lossy int8 and binary stores, and ``RAG_BENCH_INDEX_MODE``) and
+    ``llm``, which names the chat model backend actually answering.
+    ``data.paths`` is covered by the corpus fingerprint; ``runtime.device`` and ``semantic_cache``
+    are left out, so moving a run between CPU and GPU or toggling the semantic cache keeps its
+    cached answers.
+    """
+    from rag_bencher.vector.index_cache import incremental_enabled
+    from rag_bencher.vector.local import vectorstore_type
+
+    effective = dict(cfg.model_dump())
+    effective.pop("data", None)
+    effective.pop("semantic_cache", None)
+    effective["runtime"] = {k: v for k, v in (effective.get("runtime") or {}).items() if k != "device"}
+    payload = {
+        "config": effective,
+        "corpus": corpus_fingerprint(docs),
+        "pipeline": pipeline,
+        "llm": llm,
+        "chunking": [CHUNK_SIZE, CHUNK_OVERLAP, DEFAULT_EMBEDDING_MODEL],
+        "index": {"vectorstore": vectorstore_type(), "incremental": incremental_enabled()},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=repr)
+    return "answer:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def with_answer_cache(
+    traced: RunnableSerializable[str, TracedAnswer],
+    namespace: str,
+    semantic: Optional["SemanticCache"] = None,
+) -> BuildResult:
+    """Wrap a traced chain so results are read from and written to the response cache under ``namespace``.
+
+    Returns a new ``(chain, traced)`` pair; a hit returns the stored answer and debug payload
+    without running retrieval or the LLM. Concurrent misses on the same question, in this or
+    another process, run the chain once (see :func:`~rag_bencher.utils.cache.cache_get_or_compute`).
+    With ``semantic``, an exact miss falls back to the answer of the closest earlier question and
+    its debug payload gains a ``semantic_hit`` entry.
+    """
+
+    def run(question: str, config: RunnableConfig) -> TracedAnswer:
+        def answer() -> TracedAnswer:
+            return traced.invoke(question, config)
+
+        if semantic is None:
+            return cast(TracedAnswer, cache_get_or_compute(namespace, question, answer))
+        hit = cache_get(namespace, question)
+        if _is_traced_answer(hit):
+            return hit
+        match = semantic.lookup(namespace, question)
+        neighbour = cache_get(namespace, match[0]) if match is not None else None
+        if match is not None and _is_traced_answer(neighbour):
+            if not semantic.should_check():
+                semantic.record_hit()
+                debug = {**neighbour["debug"], "semantic_hit": {"question": match[0], "score": match[1]}}
+                return {**neighbour, "debug": debug}
+            out = answer()
+            semantic.record_check(str(neighbour["answer"]), str(out["answer"]))
+            cache_set(namespace, question, out)
+        else:
+            out = cast(TracedAnswer, cache_get_or_compute(namespace, question, answer))
+        semantic.add(namespace, question)
+        return out
+
+    cached = cast(RunnableSerializable[str, TracedAnswer], RunnableLambda(run))
+    chain = cast(RunnableSerializable[str, str], cached | itemgetter("answer"))
+    return chain, cached
+
+
+def _is_traced_answer(value: Any) -> TypeGuard[TracedAnswer]:
+    return isinstance(value, dict) and "answer" in value and "debug" in value
@@ -0,0 +1,40 @@
+import argparse
+
+from rich.console import Console
+
+from rag_bencher.utils.factories import EMBEDDING_BACKENDS
+from rag_bencher.vector import local
+from rag_bencher.vector.capabilities import capabilities_path
+
+console = Console()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Re-probe optional native dependencies and refresh the capabilities file")
+    ap.add_argument(
+        "--embeddings-backend",
+        choices=[b for b in EMBEDDING_BACKENDS if b != "torch"],
+        help="Also check that this embeddings backend matches the torch embeddings",
+    )
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--min-cosine", type=float, default=0.98)
+    args = ap.parse_args()
+
+    ok = local.probe_faiss()
+    status = "[green]safe to import[/green]" if ok else "[red]unavailable or unsafe[/red]"
+    console.print(f"FAISS: {status}")
+    console.print(f"Capabilities file: {capabilities_path()}")
+
+    if args.embeddings_backend:
+        from rag_bencher.eval.embedding_parity import check_backend_parity
+
+        try:
+            report = check_backend_parity(args.embeddings_backend, args.model, min_cosine=args.min_cosine)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            raise SystemExit(1) from e
+        console.print(f"{args.embeddings_backend} vs torch ({args.model}): {report}")
+
+
+if __name__ == "__main__":  # pragma: no cover - script entrypoint
+    main()
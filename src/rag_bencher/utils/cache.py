@@ -1,10 +1,52 @@
+import atexit
 import hashlib
+import heapq
+import itertools
 import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Generator
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Final, Optional
+from typing import Any, Callable, ClassVar, Dict, Final, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+from .compression import DICT_SAMPLES, ZstdCodec, codec_from_env, dictionary_id, train_dictionary
+
+# Created on first write, not at import: importing this module never touches the filesystem.
 D: Final[Path] = Path(".ragbencher_cache")
-D.mkdir(exist_ok=True, parents=True)
+
+DB_NAME = "cache.sqlite3"
+_BUSY_TIMEOUT_S = 30.0
+_MIGRATE_BATCH = 1000
+# In-flight leases last this long and are renewed every third of it while their owner computes, so a
+# waiter takes over within one lease from a dead owner on another host, and at once from one on this host.
+_LEASE_S = 30.0
+_POLL_S = (0.05, 1.0)
+_TOUCH_FLUSH = 256
+
+# Public env knobs for the disk tier: default TTL of new entries (e.g. "7d"), byte budget, eviction order.
+TTL_ENV_KEY = "RAG_BENCH_CACHE_TTL"
+MAX_MB_ENV_KEY = "RAG_BENCH_CACHE_MAX_MB"
+EVICTION_ENV_KEY = "RAG_BENCH_CACHE_EVICTION"
+EVICTION_POLICIES = ("lru", "lfu")
+# With a budget set, it is enforced every this many writes; eviction frees down to 90% of it.
+_BUDGET_CHECK_WRITES = 100
+_BUDGET_LOW_WATER = 0.9
+# With compression on and no dictionary yet, training is retried every this many writes.
+_DICT_TRAIN_WRITES = 256
+_DURATION_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0, "w": 604800.0}
+
+MEMORY_ENTRIES_ENV_KEY = "RAG_BENCH_CACHE_MEMORY_ENTRIES"
+MEMORY_MB_ENV_KEY = "RAG_BENCH_CACHE_MEMORY_MB"
+_DEFAULT_MEMORY_ENTRIES = 4096
+_DEFAULT_MEMORY_MB = 64
+COUNTER_NAMES: Final = ("memory_hits", "disk_hits", "misses", "evictions")
+STAT_NAMES: Final = COUNTER_NAMES + ("memory_entries", "memory_bytes")
 
 
 def K(m: str, p: str) -> str:
@@ -12,16 +54,791 @@ def K(m: str, p: str) -> str:
     return hashlib.sha256((m + "||" + p).encode()).hexdigest()
 
 
-def cache_get(m: str, p: str) -> Optional[Any]:
-    f = D / (K(m, p) + ".json")
-    if f.exists():
+def parse_duration(text: str) -> float:
+    """Parse ``90``, ``30m``, ``12h``, ``7d`` or ``2w`` into seconds."""
+    value = text.strip().lower()
+    scale = _DURATION_UNITS.get(value[-1:], None)
+    number = value[:-1] if scale is not None else value
+    try:
+        seconds = float(number) * (scale or 1.0)
+    except ValueError:
+        raise ValueError(f"Invalid duration {text!r}. Use seconds or a number with s, m, h, d or w.") from None
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive, got {text!r}.")
+    return seconds
+
+
+def default_ttl() -> Optional[float]:
+    """TTL in seconds for new entries from ``RAG_BENCH_CACHE_TTL``, or None to keep them until evicted."""
+    raw = os.getenv(TTL_ENV_KEY)
+    return parse_duration(raw) if raw else None
+
+
+def budget_bytes() -> Optional[int]:
+    """Disk budget from ``RAG_BENCH_CACHE_MAX_MB``, or None when unlimited."""
+    mb = _env_int(MAX_MB_ENV_KEY, 0)
+    return mb << 20 if mb > 0 else None
+
+
+def eviction_policy() -> str:
+    policy = (os.getenv(EVICTION_ENV_KEY) or "lru").strip().lower()
+    if policy not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown {EVICTION_ENV_KEY}={policy!r}. Expected lru or lfu.")
+    return policy
+
+
+@dataclass(frozen=True)
+class EvictionCandidate:
+    """One evictable unit (a row or a persisted index folder) with the usage its eviction order is based on."""
+
+    used: float
+    hits: int
+    size: int
+    table: str
+    ref: Tuple[str, ...]
+
+
+def plan_eviction(
+    sources: Sequence[Iterable[EvictionCandidate]], excess: int, policy: str = "lru"
+) -> List[List[EvictionCandidate]]:
+    """Pick what to drop from ``sources`` to free ``excess`` bytes, as one list per source.
+
+    Every source must yield its candidates in ``policy`` order (see :meth:`SqliteCache.eviction_candidates`);
+    they are merged, so the least recently (lru) or least often (lfu) used units go first whichever store
+    holds them.
+    """
+    order = eviction_order(policy)
+    tagged = [zip(itertools.repeat(n), source) for n, source in enumerate(sources)]
+    picked: List[List[EvictionCandidate]] = [[] for _ in sources]
+    try:
+        for n, candidate in heapq.merge(*tagged, key=lambda t: order(t[1])):
+            if excess <= 0:
+                break
+            picked[n].append(candidate)
+            excess -= candidate.size
+    finally:
+        # Close half-read sources now: an open SQLite cursor would keep the deletes that follow waiting on it.
+        for source in sources:
+            if isinstance(source, Generator):
+                source.close()
+    return picked
+
+
+def eviction_order(policy: str) -> Callable[[EvictionCandidate], Tuple[float, ...]]:
+    """Sort key putting the candidate to evict first under ``policy`` first."""
+    if policy == "lru":
+        return lambda c: (c.used,)
+    return lambda c: (float(c.hits), c.used)
+
+
+class SqliteCache:
+    """Key/value store in one SQLite file in WAL mode, shared safely by threads and processes.
+
+    Readers never block writers and concurrent writers wait on SQLite's lock (up to 30s)
+    instead of failing. Each thread uses its own connection. Inside :meth:`batch`, writes are
+    buffered and committed in a single transaction.
+
+    Entries may carry an expiry time and record when they were last read and how often, which
+    :meth:`evict` uses to keep the store within a byte budget. Reads are recorded in memory
+    and written in batches, so lookups stay read-only on the database.
+
+    With ``RAG_BENCH_CACHE_COMPRESS`` on, values are stored zstd-compressed. Once enough entries
+    exist, a dictionary is trained on them and kept in the database, so every process
+    compresses with it. Compressed entries are read back transparently either way.
+    """
+
+    # How :meth:`remove` deletes a row of each evictable table, given an :class:`EvictionCandidate` ref.
+    _REMOVE_SQL: ClassVar[Dict[str, str]] = {"entries": "DELETE FROM entries WHERE key = ?"}
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._opened: List[sqlite3.Connection] = []
+        self._opened_lock = threading.Lock()
+        self._touches: Dict[str, Tuple[float, int]] = {}
+        self._touches_lock = threading.Lock()
+        self._writes = 0
+        self.codec: Optional[ZstdCodec] = codec_from_env()
+        self._reader: Optional[ZstdCodec] = None
+        self._codec_lock = threading.Lock()
+        self._untrained_writes = 0
+        # Leases this process holds: key -> (owner, lease length, owning thread); renewed by a heartbeat thread.
+        self._held: Dict[str, Tuple[str, float, threading.Thread]] = {}
+        self._held_lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Never shared between threads; check_same_thread=False only lets close() run from any thread.
+            conn = sqlite3.connect(self.path, timeout=_BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_tables(conn)
+            self._local.conn = conn
+            with self._opened_lock:
+                self._opened.append(conn)
+        return conn
+
+    def _create_tables(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL,"
+            " accessed REAL, hits INTEGER NOT NULL DEFAULT 0, expires REAL, size INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS inflight (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS dictionaries (id INTEGER PRIMARY KEY, data BLOB NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._upgrade_entries(conn)
+
+    def _upgrade_entries(self, conn: sqlite3.Connection) -> None:
+        """Add the columns introduced after the first SQLite layout to an existing ``entries`` table."""
+        added = {
+            "accessed": "REAL",
+            "hits": "INTEGER NOT NULL DEFAULT 0",
+            "expires": "REAL",
+            "size": "INTEGER NOT NULL DEFAULT 0",
+        }
+        if added.keys() <= {row[1] for row in conn.execute("PRAGMA table_info(entries)")}:
+            return
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            return json.loads(f.read_text("utf-8"))
-        except Exception:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            for name, decl in added.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {name} {decl}")
+            if "size" not in columns:
+                conn.execute("UPDATE entries SET size = length(key) + length(value)")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.lookup(key)
+        return None if entry is None else entry[0]
+
+    def lookup(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """Return the value of a live entry and its expiry time (None: never expires)."""
+        pending: Optional[Dict[str, Tuple[str, Optional[float]]]] = getattr(self._local, "pending", None)
+        if pending is not None and key in pending:
+            return pending[key]
+        row = self._conn().execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
             return None
-    return None
+        self.touch(key)
+        return self._decode(row[0]), row[1]
+
+    def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        pending: Optional[Dict[str, Tuple[str, Optional[float]]]] = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending[key] = (value, _expires(ttl_s))
+            return
+        self.set_many([(key, value)], ttl_s=ttl_s)
+
+    def set_many(self, items: Iterable[Tuple[str, str]], ttl_s: Optional[float] = None) -> None:
+        expires = _expires(ttl_s)
+        self._write([(key, value, expires) for key, value in items])
+
+    def _write(self, items: Sequence[Tuple[str, str, Optional[float]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        codec = self._encoder()
+        stored = [(key, codec.encode(value) if codec else value, expires) for key, value, expires in items]
+        rows = [(key, value, now, now, expires, _entry_size(key, value)) for key, value, expires in stored]
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so concurrent writers queue instead of deadlocking.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created, accessed, expires, size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._count_writes(len(rows))
+        if codec is not None and not codec.dict_id:
+            self._untrained_writes += len(rows)
+            if self._untrained_writes >= _DICT_TRAIN_WRITES:
+                self._untrained_writes = 0
+                self.train_dictionary()
+
+    def _count_writes(self, count: int) -> None:
+        """Enforce ``RAG_BENCH_CACHE_MAX_MB`` once every ``_BUDGET_CHECK_WRITES`` written rows."""
+        self._writes += count
+        budget = budget_bytes()
+        if budget is not None and self._writes >= _BUDGET_CHECK_WRITES:
+            self._writes = 0
+            self.evict(budget, eviction_policy())
+
+    def _encoder(self) -> Optional[ZstdCodec]:
+        if self.codec is not None and self._reader is None:
+            self._load_dictionaries()
+        return self.codec
+
+    def _decode(self, stored: Union[str, bytes]) -> str:
+        if isinstance(stored, str):
+            return stored
+        reader = self._reader or self._load_dictionaries()
+        try:
+            return reader.decode(stored)
+        except KeyError:
+            # Another process trained a dictionary after we loaded ours.
+            return self._load_dictionaries().decode(stored)
+
+    def _load_dictionaries(self) -> ZstdCodec:
+        rows = self._conn().execute("SELECT data FROM dictionaries ORDER BY created, id").fetchall()
+        with self._codec_lock:
+            reader = self.codec or ZstdCodec()
+            for (data,) in rows:
+                reader.add_dictionary(bytes(data))
+            self._reader = reader
+        return reader
+
+    def train_dictionary(self) -> Optional[int]:
+        """Train a zstd dictionary on the newest entries and compress new writes with it.
+
+        Returns the dictionary id, or None when there are too few entries to train on.
+        """
+        conn = self._conn()
+        rows = conn.execute("SELECT value FROM entries ORDER BY created DESC LIMIT ?", (DICT_SAMPLES,)).fetchall()
+        data = train_dictionary([self._decode(value).encode("utf-8") for (value,) in rows])
+        if data is None:
+            return None
+        conn.execute(
+            "INSERT OR REPLACE INTO dictionaries (id, data, created) VALUES (?, ?, ?)",
+            (dictionary_id(data), data, time.time()),
+        )
+        return self._load_dictionaries().dict_id
+
+    def recompress(self) -> int:
+        """Rewrite every entry with the current codec (plain text when compression is off); returns the count."""
+        codec = self._encoder()
+        conn = self._conn()
+        rows = conn.execute("SELECT key, value FROM entries").fetchall()
+        updates = []
+        for key, value in rows:
+            text = self._decode(value)
+            stored = codec.encode(text) if codec else text
+            updates.append((stored, _entry_size(key, stored), key))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE entries SET value = ?, size = ? WHERE key = ?", updates)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return len(updates)
+
+    def touch(self, key: str) -> None:
+        """Record a read of ``key`` for LRU/LFU eviction; flushed to disk in batches."""
+        with self._touches_lock:
+            _, hits = self._touches.get(key, (0.0, 0))
+            self._touches[key] = (time.time(), hits + 1)
+            full = len(self._touches) >= _TOUCH_FLUSH
+        if full:
+            self.flush_touches()
+
+    def flush_touches(self) -> None:
+        with self._touches_lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE entries SET accessed = MAX(COALESCE(accessed, created), ?), hits = hits + ? WHERE key = ?",
+                [(at, hits, key) for key, (at, hits) in touches.items()],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def usage(self) -> Dict[str, int]:
+        """Entry count, stored bytes and expired entries, plus the size of the database files."""
+        self.flush_touches()
+        row = (
+            self._conn()
+            .execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(expires IS NOT NULL AND expires <= ?), 0)"
+                " FROM entries",
+                (time.time(),),
+            )
+            .fetchone()
+        )
+        files = sum(p.stat().st_size for p in self.path.parent.glob(self.path.name + "*") if p.is_file())
+        return {"entries": int(row[0]), "bytes": int(row[1]), "expired": int(row[2]), "file_bytes": files}
+
+    def purge_expired(self) -> int:
+        return self._delete("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    def prune(self, older_than_s: float) -> int:
+        """Delete entries created more than ``older_than_s`` seconds ago; returns how many."""
+        return self._delete("DELETE FROM entries WHERE created < ?", (time.time() - older_than_s,))
+
+    def stored_bytes(self) -> int:
+        """Bytes held by evictable rows, the quantity :meth:`evict` and ``rag-bencher-cli-cache gc`` budget."""
+        return int(self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0])
+
+    def eviction_candidates(self, policy: str = "lru") -> Generator[EvictionCandidate, None, None]:
+        """Yield every evictable row, least recently (lru) or least often (lfu) read first."""
+        order = "COALESCE(accessed, created)" if policy == "lru" else "hits, COALESCE(accessed, created)"
+        rows = self._conn().execute(
+            f"SELECT key, size, COALESCE(accessed, created), hits FROM entries ORDER BY {order}"
+        )
+        try:
+            for key, size, used, hits in rows:
+                yield EvictionCandidate(float(used), int(hits), int(size), "entries", (str(key),))
+        finally:
+            rows.close()
+
+    def remove(self, candidates: Sequence[EvictionCandidate]) -> None:
+        """Delete the rows behind ``candidates`` (from :meth:`eviction_candidates`) in one transaction."""
+        if not candidates:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for c in candidates:
+                conn.execute(self._REMOVE_SQL[c.table], c.ref)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def evict(self, max_bytes: int, policy: str = "lru") -> int:
+        """Drop expired entries, then least recently (lru) or least often (lfu) read ones until under budget.
+
+        Evicts down to 90% of ``max_bytes`` so the next writes do not trigger it again at once.
+        Returns the number of rows removed.
+        """
+        self.flush_touches()
+        removed = self.purge_expired()
+        total = self.stored_bytes()
+        if total <= max_bytes:
+            return removed
+        (victims,) = plan_eviction(
+            [self.eviction_candidates(policy)], total - int(max_bytes * _BUDGET_LOW_WATER), policy
+        )
+        self.remove(victims)
+        return removed + len(victims)
+
+    def export(self) -> Iterator[Dict[str, Any]]:
+        """Yield every live entry as a dict (key, value, created, accessed, hits, expires)."""
+        self.flush_touches()
+        rows = self._conn().execute(
+            "SELECT key, value, created, accessed, hits, expires FROM entries"
+            " WHERE expires IS NULL OR expires > ? ORDER BY created",
+            (time.time(),),
+        )
+        for key, value, created, accessed, hits, expires in rows:
+            yield {
+                "key": key,
+                "value": self._decode(value),
+                "created": created,
+                "accessed": accessed,
+                "hits": hits,
+                "expires": expires,
+            }
+
+    def vacuum(self) -> None:
+        """Return freed pages to the filesystem."""
+        conn = self._conn()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+
+    def _delete(self, sql: str, params: Tuple[Any, ...]) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = conn.execute(sql, params).rowcount
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return int(count)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer writes made by this thread and commit them together on exit (nested blocks join the outer one)."""
+        if getattr(self._local, "pending", None) is not None:
+            yield
+            return
+        self._local.pending = {}
+        try:
+            yield
+        finally:
+            pending: Dict[str, Tuple[str, Optional[float]]] = self._local.pending
+            self._local.pending = None
+            self._write([(key, value, expires) for key, (value, expires) in pending.items()])
+
+    def claim(self, key: str, lease_s: Optional[float] = None) -> bool:
+        """Take the advisory in-flight lease on ``key``; False while another live thread or process holds it.
+
+        The lease lasts ``lease_s`` (default ``_LEASE_S``) and is renewed in the background until
+        :meth:`release` or until the claiming thread exits. A lease whose owner is a thread or process on
+        this host that no longer runs is taken over at once, without waiting for it to expire.
+        """
+        lease = _LEASE_S if lease_s is None else lease_s
+        owner = _owner()
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires FROM inflight WHERE key = ?", (key,)).fetchone()
+            claimed = row is None or row[0] == owner or row[1] < now or _owner_gone(row[0])
+            if claimed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO inflight (key, owner, expires) VALUES (?, ?, ?)", (key, owner, now + lease)
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        if claimed:
+            with self._held_lock:
+                self._held[key] = (owner, lease, threading.current_thread())
+                if self._heartbeat is None:
+                    self._heartbeat = threading.Thread(target=self._renew_leases, name="rag-bencher-lease", daemon=True)
+                    self._heartbeat.start()
+        return claimed
+
+    def release(self, key: str) -> None:
+        owner = _owner()
+        with self._held_lock:
+            if self._held.get(key, ("",))[0] == owner:
+                del self._held[key]
+        self._conn().execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, owner))
+
+    def _renew_leases(self) -> None:
+        """Extend every lease this process holds until none is left; leases of exited threads are dropped."""
+        with closing(sqlite3.connect(self.path, timeout=_BUSY_TIMEOUT_S, isolation_level=None)) as conn:
+            while True:
+                time.sleep(_LEASE_S / 3)
+                with self._held_lock:
+                    for key in [k for k, (_, _, thread) in self._held.items() if not thread.is_alive()]:
+                        del self._held[key]
+                    if not self._held:
+                        self._heartbeat = None
+                        return
+                    held = list(self._held.items())
+                now = time.time()
+                try:
+                    conn.executemany(
+                        "UPDATE inflight SET expires = ? WHERE key = ? AND owner = ?",
+                        [(now + lease, key, owner) for key, (owner, lease, _) in held],
+                    )
+                except sqlite3.Error:
+                    continue  # Busy for longer than the timeout; the next beat retries before the lease runs out.
+
+    def meta(self, name: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return None if row is None else str(row[0])
+
+    def set_meta(self, name: str, value: str) -> None:
+        self._conn().execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def close(self) -> None:
+        """Close every connection opened on this store; threads reconnect on their next call."""
+        self.flush_touches()
+        with self._opened_lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            conn.close()
+        self._local = threading.local()
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _owner_gone(owner: str) -> bool:
+    """Whether ``owner`` (see :func:`_owner`) is a thread or process on this host that no longer runs."""
+    host, _, ids = owner.partition(":")
+    pid, _, tid = ids.partition(":")
+    if host != socket.gethostname() or not (pid.isdigit() and tid.isdigit()):
+        return False
+    if int(pid) == os.getpid():
+        return int(tid) not in {t.ident for t in threading.enumerate()}
+    return not _pid_alive(int(pid))
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return True  # os.kill cannot probe a process on Windows; the lease expiry still applies.
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _expires(ttl_s: Optional[float]) -> Optional[float]:
+    return None if ttl_s is None else time.time() + ttl_s
+
+
+class MemoryLRU:
+    """Bounded in-process LRU of raw cache values, limited by entry count and approximate bytes.
+
+    A limit of 0 disables the tier. Values larger than the byte budget are never kept, and
+    entries past their expiry time read as missing.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._items: OrderedDict[str, Tuple[str, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of entries held in memory."""
+        return len(self._items)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= time.time():
+                del self._items[key]
+                self.bytes -= _entry_size(key, value)
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, expires: Optional[float] = None) -> None:
+        size = _entry_size(key, value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= _entry_size(key, old[0])
+            if self.max_entries <= 0 or size > self.max_bytes:
+                return
+            self._items[key] = (value, expires)
+            self.bytes += size
+            while len(self._items) > self.max_entries or self.bytes > self.max_bytes:
+                k, (v, _) = self._items.popitem(last=False)
+                self.bytes -= _entry_size(k, v)
+                self.evictions += 1
+
+
+def _entry_size(key: str, value: Union[str, bytes]) -> int:
+    return len(key) + len(value)
+
+
+def _env_int(key: str, default: int) -> int:
+    raw = os.getenv(key)
+    try:
+        return max(int(raw), 0) if raw else default
+    except ValueError:
+        return default
+
+
+class TieredCache:
+    """Memory LRU in front of a :class:`SqliteCache`; reads fill the LRU and writes go through to disk."""
+
+    def __init__(self, disk: SqliteCache, memory: MemoryLRU) -> None:
+        self.disk = disk
+        self.memory = memory
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        tier = "memory_hits"
+        if value is not None:
+            self.disk.touch(key)
+        else:
+            entry = self.disk.lookup(key)
+            tier = "misses" if entry is None else "disk_hits"
+            if entry is not None:
+                value = entry[0]
+                self.memory.put(key, *entry)
+        with self._lock:
+            self._counts[tier] += 1
+        return value
+
+    def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        self.memory.put(key, value, _expires(ttl_s))
+        self.disk.set(key, value, ttl_s)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            "evictions": self.memory.evictions,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+        }
+
+
+_stores: Dict[Path, SqliteCache] = {}
+_tiers: Dict[Path, TieredCache] = {}
+_stores_lock = threading.Lock()
+
+
+def cache_store(directory: Optional[Path] = None) -> SqliteCache:
+    """Return the process-wide store for ``directory`` (default :data:`D`), migrating old JSON entries once."""
+    root = Path(directory if directory is not None else D)
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = SqliteCache(root / DB_NAME)
+            if store.meta("json_migrated") is None:
+                migrate_json_entries(root, store)
+                store.set_meta("json_migrated", "1")
+            _stores[root] = store
+        return store
+
+
+def answer_cache(directory: Optional[Path] = None) -> TieredCache:
+    """Return the process-wide two-tier cache for ``directory``.
+
+    The memory tier holds up to ``RAG_BENCH_CACHE_MEMORY_ENTRIES`` entries (default 4096) and
+    ``RAG_BENCH_CACHE_MEMORY_MB`` MiB (default 64); set either to 0 to always read from disk.
+    """
+    root = Path(directory if directory is not None else D)
+    disk = cache_store(root)
+    with _stores_lock:
+        tier = _tiers.get(root)
+        if tier is None:
+            memory = MemoryLRU(
+                _env_int(MEMORY_ENTRIES_ENV_KEY, _DEFAULT_MEMORY_ENTRIES),
+                _env_int(MEMORY_MB_ENV_KEY, _DEFAULT_MEMORY_MB) << 20,
+            )
+            tier = _tiers[root] = TieredCache(disk, memory)
+        return tier
+
+
+def cache_stats() -> Dict[str, int]:
+    """Hit, miss and eviction counters summed over every cache opened by this process."""
+    with _stores_lock:
+        tiers = list(_tiers.values())
+    totals = dict.fromkeys(STAT_NAMES, 0)
+    for tier in tiers:
+        for name, value in tier.stats().items():
+            totals[name] += value
+    return totals
+
+
+def close_cache_stores() -> None:
+    """Close and forget every open store and memory tier, e.g. before deleting a cache directory."""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+        _tiers.clear()
+    for store in stores:
+        store.close()
+
+
+# Writes the read statistics still buffered in memory, so eviction order survives the process.
+atexit.register(close_cache_stores)
+
+
+def migrate_json_entries(directory: Path, store: Optional[SqliteCache] = None) -> int:
+    """Import ``<sha256>.json`` entries written by older versions into the SQLite store.
+
+    Imported files are deleted; unreadable ones are left in place. Returns the number imported.
+    Runs automatically the first time a cache directory is opened.
+    """
+    target = store or cache_store(directory)
+    batch: List[Tuple[str, str]] = []
+    done: List[Path] = []
+    imported = 0
+    for f in sorted(directory.glob("*.json")):
+        if len(f.stem) != 64:
+            continue
+        try:
+            text = f.read_text("utf-8")
+            json.loads(text)
+        except (OSError, ValueError):
+            continue
+        batch.append((f.stem, text))
+        done.append(f)
+        if len(batch) >= _MIGRATE_BATCH:
+            imported += _commit_migrated(target, batch, done)
+    return imported + _commit_migrated(target, batch, done)
+
+
+def _commit_migrated(store: SqliteCache, batch: List[Tuple[str, str]], done: List[Path]) -> int:
+    count = len(batch)
+    store.set_many(batch)
+    for f in done:
+        f.unlink(missing_ok=True)
+    batch.clear()
+    done.clear()
+    return count
+
+
+def cache_get(m: str, p: str) -> Optional[Any]:
+    return _loads(answer_cache().get(K(m, p)))
+
+
+def cache_set(m: str, p: str, o: Any, ttl_s: Optional[float] = None) -> None:
+    """Store ``o`` as JSON; it expires after ``ttl_s`` seconds (default: ``RAG_BENCH_CACHE_TTL``, else never)."""
+    answer_cache().set(K(m, p), json.dumps(o), ttl_s if ttl_s is not None else default_ttl())
+
+
+def cache_get_or_compute(m: str, p: str, compute: Callable[[], Any]) -> Any:
+    """Return the cached value for ``(m, p)``, or run ``compute`` once and cache its result.
+
+    Callers that miss the same key together, in any thread or process sharing the cache
+    directory, do not all compute it: one takes the key's in-flight lease and the others wait
+    for its result. If that caller fails or dies, a waiter takes over: at once when it ran on this
+    host, otherwise once its lease, no longer renewed, runs out.
+    """
+    hit = cache_get(m, p)
+    if hit is not None:
+        return hit
+    key = K(m, p)
+    store = cache_store()
+    delay = _POLL_S[0]
+    while True:
+        if store.claim(key):
+            try:
+                # The previous owner may have finished between our read and the claim.
+                hit = _loads(store.get(key))
+                if hit is None:
+                    hit = compute()
+                    cache_set(m, p, hit)
+                return hit
+            finally:
+                store.release(key)
+        time.sleep(delay)
+        delay = min(delay * 2, _POLL_S[1])
+        hit = _loads(store.get(key))
+        if hit is not None:
+            return hit
+
+
+def _loads(raw: Optional[str]) -> Optional[Any]:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
 
 
-def cache_set(m: str, p: str, o: Any) -> None:
-    f = D / (K(m, p) + ".json")
-    f.write_text(json.dumps(o), "utf-8")
+@contextmanager
+def cache_batch() -> Iterator[None]:
+    """Commit every :func:`cache_set` made by this thread inside the block in one transaction."""
+    with cache_store().batch():
+        yield
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+# Public env knob: "1"/"zstd" stores new cache entries zstd-compressed (needs ``rag-bencher[zstd]``).
+ENV_KEY = "RAG_BENCH_CACHE_COMPRESS"
+LEVEL_ENV_KEY = "RAG_BENCH_CACHE_COMPRESS_LEVEL"
+DEFAULT_LEVEL = 3
+# Dictionaries are trained from at most this many existing entries into at most this many bytes.
+DICT_SAMPLES = 2000
+DICT_BYTES = 64 * 1024
+MIN_DICT_SAMPLES = 64
+
+
+def compression_enabled() -> bool:
+    return (os.getenv(ENV_KEY) or "").strip().lower() in {"1", "true", "yes", "on", "zstd"}
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Compressed cache entries need zstandard: pip install 'rag-bencher[zstd]'") from e
+    return zstandard
+
+
+def train_dictionary(samples: Sequence[bytes], size: int = DICT_BYTES) -> Optional[bytes]:
+    """Train a zstd dictionary on ``samples``; None when there are too few or too uniform samples."""
+    if len(samples) < MIN_DICT_SAMPLES:
+        return None
+    zstd = _zstd()
+    try:
+        trained = zstd.train_dictionary(size, list(samples))
+    except zstd.ZstdError:
+        return None
+    return bytes(trained.as_bytes())
+
+
+def dictionary_id(data: bytes) -> int:
+    return int(_zstd().ZstdCompressionDict(data).dict_id())
+
+
+def frame_dictionary_id(blob: bytes) -> int:
+    """Id of the dictionary ``blob`` was compressed with (0 for none)."""
+    return int(_zstd().get_frame_parameters(blob).dict_id)
+
+
+class ZstdCodec:
+    """zstd compression of cache values, with an optional shared dictionary.
+
+    Values that do not get smaller stay plain text, so tiny entries such as scores cost nothing.
+    Frames record the id of the dictionary they used; :meth:`decode` needs that dictionary
+    registered through :meth:`add_dictionary` (the latest one added is used to compress).
+    zstd contexts are not thread-safe, so each thread gets its own.
+    """
+
+    def __init__(self, level: int = DEFAULT_LEVEL) -> None:
+        self.level = level
+        self.dict_id = 0
+        self._zstd = _zstd()
+        self._dicts: Dict[int, Any] = {}
+        self._local = threading.local()
+
+    def add_dictionary(self, data: bytes, *, use: bool = True) -> int:
+        d = self._zstd.ZstdCompressionDict(data)
+        did = int(d.dict_id())
+        self._dicts[did] = d
+        if use:
+            d.precompute_compress(level=self.level)
+            self.dict_id = did
+        self._local = threading.local()
+        return did
+
+    def encode(self, text: str) -> Union[str, bytes]:
+        raw = text.encode("utf-8")
+        cctx = getattr(self._local, "compressor", None)
+        if cctx is None:
+            dict_data = self._dicts.get(self.dict_id)
+            cctx = self._local.compressor = self._zstd.ZstdCompressor(level=self.level, dict_data=dict_data)
+        blob: bytes = cctx.compress(raw)
+        return blob if len(blob) < len(raw) else text
+
+    def decode(self, stored: Union[str, bytes]) -> str:
+        if isinstance(stored, str):
+            return stored
+        did = frame_dictionary_id(stored)
+        contexts: Optional[Dict[int, Any]] = getattr(self._local, "decompressors", None)
+        if contexts is None:
+            contexts = self._local.decompressors = {}
+        dctx = contexts.get(did)
+        if dctx is None:
+            if did and did not in self._dicts:
+                raise KeyError(f"zstd dictionary {did} is not registered")
+            dctx = contexts[did] = self._zstd.ZstdDecompressor(dict_data=self._dicts.get(did))
+        return str(dctx.decompress(stored).decode("utf-8"))
+
+
+def codec_from_env() -> Optional[ZstdCodec]:
+    """A codec when ``RAG_BENCH_CACHE_COMPRESS`` is on, else None."""
+    if not compression_enabled():
+        return None
+    raw = os.getenv(LEVEL_ENV_KEY)
+    try:
+        level = int(raw) if raw else DEFAULT_LEVEL
+    except ValueError:
+        level = DEFAULT_LEVEL
+    return ZstdCodec(level)
+
+
+def compression_report(values: Sequence[str], level: int = DEFAULT_LEVEL) -> List[Dict[str, Any]]:
+    """Compare stored size and per-entry encode/decode latency of plain JSON, zstd, and zstd with a dictionary.
+
+    The dictionary is trained on every other value and measured on all of them, so the numbers
+    include values it has not seen.
+    """
+    raw = [v.encode("utf-8") for v in values]
+    total = sum(len(r) for r in raw) or 1
+    rows: List[Dict[str, Any]] = [_measure("plain", values, None, total)]
+    codec = ZstdCodec(level)
+    rows.append(_measure(f"zstd-{level}", values, codec, total))
+    data = train_dictionary(raw[::2])
+    if data is not None:
+        codec = ZstdCodec(level)
+        codec.add_dictionary(data)
+        rows.append(_measure(f"zstd-{level}+dict", values, codec, total))
+    return rows
+
+
+def _measure(name: str, values: Sequence[str], codec: Optional[ZstdCodec], total: int) -> Dict[str, Any]:
+    n = max(len(values), 1)
+    t0 = time.perf_counter()
+    stored = [codec.encode(v) if codec else v for v in values]
+    t1 = time.perf_counter()
+    if codec is not None:
+        for s in stored:
+            codec.decode(s)
+    t2 = time.perf_counter()
+    size = sum(len(s) if isinstance(s, bytes) else len(s.encode("utf-8")) for s in stored)
+    return {
+        "codec": name,
+        "bytes": size,
+        "ratio": round(total / max(size, 1), 2),
+        "encode_us": round((t1 - t0) / n * 1e6, 2),
+        "decode_us": round((t2 - t1) / n * 1e6, 2),
+    }
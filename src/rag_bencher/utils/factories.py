@@ -1,10 +1,40 @@
-from typing import TYPE_CHECKING, Any, Dict, Optional
+import json
+import os
+import platform
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar, cast
+
+from langchain_core.embeddings import Embeddings
 
 from .hardware import wants_cpu
 from .torch_utils import cuda_available
 
 if TYPE_CHECKING:
     from langchain_huggingface import HuggingFaceEmbeddings
+    from sentence_transformers import CrossEncoder
+
+# Public env knobs for the shared embedding registry.
+MAX_MODELS_ENV_KEY = "RAG_BENCH_EMBEDDINGS_MAX_MODELS"  # models kept loaded (default 4, 0 disables sharing)
+MIN_FREE_MB_ENV_KEY = "RAG_BENCH_EMBEDDINGS_MIN_FREE_MB"  # evict before loading when free RAM is below this
+_DEFAULT_MAX_MODELS = 4
+# Padded tokens per document batch (longest text x batch size); 0 keeps the model's fixed batch size.
+TOKEN_BUDGET_ENV_KEY = "RAG_BENCH_EMBED_TOKEN_BUDGET"
+_DEFAULT_TOKEN_BUDGET = 16384
+_MAX_BUCKET = 512
+
+# "onnx" runs the sentence-transformer through ONNX Runtime; "onnx-int8" loads its dynamically quantized export.
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_RegistryKey = Tuple[str, str, str]
+_registry: "OrderedDict[_RegistryKey, LengthBucketedEmbeddings]" = OrderedDict()
+_cross_encoders: Dict[Tuple[str, str], "CrossEncoder"] = {}
+_registry_lock = threading.Lock()
+# Models being loaded, by (kind, key): later callers for the same key wait on the future instead of loading again.
+_loading: Dict[Tuple[str, Hashable], "Future[Any]"] = {}
+
+_T = TypeVar("_T")
 
 
 # Centralized factory for HuggingFaceEmbeddings
@@ -19,20 +49,252 @@ def make_hf_embeddings(
     *,
     model_kwargs: Optional[Dict[str, Any]] = None,
     encode_kwargs: Optional[Dict[str, Any]] = None,
-) -> "HuggingFaceEmbeddings":
-    """Create a HuggingFaceEmbeddings with device already set from global policy.
+    backend: str = "torch",
+) -> "LengthBucketedEmbeddings":
+    """Return HuggingFaceEmbeddings with device already set from global policy.
+
+    The model is wrapped in :class:`LengthBucketedEmbeddings`, so document batches are sized by a
+    token budget. Instances are shared process-wide per (model, model kwargs incl. device, encode kwargs), so
+    pipelines and configs that use the same model load its weights once. The least recently used
+    model is evicted beyond ``RAG_BENCH_EMBEDDINGS_MAX_MODELS``.
+
+    ``backend`` is one of :data:`EMBEDDING_BACKENDS`; the ONNX backends need ``rag-bencher[onnx]``.
 
     Usage everywhere:
         from rag_bencher.utils.factories import make_hf_embeddings
         embed = make_hf_embeddings()
     """
-    from langchain_huggingface import HuggingFaceEmbeddings  # local import
-
     mk = dict(model_kwargs or {})
     # Ensure device is enforced once here
     mk.setdefault("device", _preferred_device())
-    return HuggingFaceEmbeddings(
-        model_name=model_name,
-        model_kwargs=mk,
-        encode_kwargs=encode_kwargs or {},
-    )
+    _apply_backend(backend, mk)
+    ek = dict(encode_kwargs or {})
+
+    max_models = _max_models()
+    if max_models == 0:
+        return LengthBucketedEmbeddings(_load_hf_embeddings(model_name, mk, ek))
+
+    key = (model_name, _stable_json(mk), _stable_json(ek))
+
+    def cached() -> Optional[LengthBucketedEmbeddings]:
+        emb = _registry.get(key)
+        if emb is not None:
+            _registry.move_to_end(key)
+        return emb
+
+    def load() -> LengthBucketedEmbeddings:
+        with _registry_lock:
+            _evict(max_models - 1)
+            while _registry and _memory_tight():
+                _registry.popitem(last=False)
+        return LengthBucketedEmbeddings(_load_hf_embeddings(model_name, mk, ek))
+
+    def publish(emb: LengthBucketedEmbeddings) -> None:
+        _evict(max_models - 1)
+        _registry[key] = emb
+
+    return _load_once(("embeddings", key), cached, load, publish)
+
+
+class LengthBucketedEmbeddings(Embeddings):
+    """Embed documents in length-sorted batches capped by a token budget, returned in input order.
+
+    Splitter output has very uneven lengths and every batch is padded to its longest text, so a
+    fixed batch size spends most of its compute on padding. Sorting by token length and sizing
+    each batch as ``token_budget // longest`` gives short chunks large batches and long chunks small
+    ones. Other attributes (``model_name``, ``encode_kwargs``, ...) are read from the wrapped model.
+    """
+
+    def __init__(self, inner: Embeddings, *, token_budget: Optional[int] = None) -> None:
+        self.inner = inner
+        self._token_budget = token_budget
+
+    @property
+    def token_budget(self) -> int:
+        if self._token_budget is not None:
+            return self._token_budget
+        raw = os.getenv(TOKEN_BUDGET_ENV_KEY)
+        try:
+            return max(int(raw), 0) if raw else _DEFAULT_TOKEN_BUDGET
+        except ValueError:
+            return _DEFAULT_TOKEN_BUDGET
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate unknown attributes to the wrapped embeddings."""
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        budget = self.token_budget
+        if budget <= 0 or len(texts) <= 1:
+            return self.inner.embed_documents(texts)
+        out: List[List[float]] = [[] for _ in texts]
+        for batch in length_buckets(self.token_lengths(texts), budget):
+            vectors = self._embed_batch([texts[i] for i in batch])
+            for i, vec in zip(batch, vectors, strict=True):
+                out[i] = vec
+        return out
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+    def token_lengths(self, texts: Sequence[str]) -> List[int]:
+        """Token count per text as the model sees it (truncated), or a chars/4 estimate without a tokenizer."""
+        client = getattr(self.inner, "_client", None)
+        tokenizer = getattr(client, "tokenizer", None)
+        max_len = getattr(client, "max_seq_length", None)
+        if tokenizer is not None:
+            try:
+                ids = tokenizer(list(texts), add_special_tokens=True, truncation=bool(max_len), max_length=max_len)
+                return [len(x) for x in ids["input_ids"]]
+            except Exception:
+                pass
+        lengths = [len(t) // 4 + 2 for t in texts]
+        return [min(n, max_len) for n in lengths] if isinstance(max_len, int) else lengths
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # A bucket larger than the model's own batch_size is split again, but stays length-homogeneous.
+        return self.inner.embed_documents(texts)
+
+
+def length_buckets(lengths: Sequence[int], token_budget: int, max_batch: int = _MAX_BUCKET) -> List[List[int]]:
+    """Group indices by ascending length so that ``len(batch) * longest`` stays within ``token_budget``."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for i in order:
+        longest = max(lengths[i], 1)
+        if batch and ((len(batch) + 1) * longest > token_budget or len(batch) >= max_batch):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def make_cross_encoder(model_name: str = "BAAI/bge-reranker-base") -> "CrossEncoder":
+    """Return a sentence-transformers CrossEncoder on the preferred device, loaded once per process."""
+    key = (model_name, _preferred_device())
+
+    def load() -> "CrossEncoder":
+        from sentence_transformers import CrossEncoder  # local import
+
+        model: "CrossEncoder" = CrossEncoder(model_name, device=key[1])
+        return model
+
+    def publish(model: "CrossEncoder") -> None:
+        _cross_encoders[key] = model
+
+    return _load_once(("cross-encoder", key), lambda: _cross_encoders.get(key), load, publish)
+
+
+def clear_embeddings_registry() -> int:
+    """Drop every shared embedding and cross-encoder model and return how many were held.
+
+    Memory is released once callers drop their own references (e.g. built chains).
+    """
+    with _registry_lock:
+        count = len(_registry) + len(_cross_encoders)
+        _registry.clear()
+        _cross_encoders.clear()
+    return count
+
+
+def _load_once(
+    key: Tuple[str, Hashable],
+    cached: Callable[[], Optional[_T]],
+    load: Callable[[], _T],
+    publish: Callable[[_T], None],
+) -> _T:
+    """Return ``cached()`` or run ``load`` once per ``key`` and ``publish`` its result.
+
+    ``cached`` and ``publish`` run under ``_registry_lock``; ``load`` runs outside it, so loading one
+    model never blocks callers that want another. Concurrent callers for the same key wait for the
+    first one's result (or exception) instead of loading the weights twice.
+    """
+    with _registry_lock:
+        found = cached()
+        if found is not None:
+            return found
+        pending = _loading.get(key)
+        if pending is not None:
+            owner = False
+        else:
+            owner, pending = True, Future()
+            _loading[key] = pending
+    if not owner:
+        return cast(_T, pending.result())
+    try:
+        value = load()
+    except BaseException as exc:
+        with _registry_lock:
+            del _loading[key]
+        pending.set_exception(exc)
+        raise
+    with _registry_lock:
+        del _loading[key]
+        publish(value)
+    pending.set_result(value)
+    return value
+
+
+def _apply_backend(backend: str, mk: Dict[str, Any]) -> None:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embeddings backend {backend!r}. Expected one of {', '.join(EMBEDDING_BACKENDS)}.")
+    if backend == "torch":
+        return
+    mk.setdefault("backend", "onnx")
+    if backend == "onnx-int8":
+        ort_kwargs = dict(mk.get("model_kwargs") or {})
+        ort_kwargs.setdefault("file_name", _onnx_int8_file())
+        mk["model_kwargs"] = ort_kwargs
+
+
+def _onnx_int8_file() -> str:
+    """Pick the dynamically quantized ONNX export shipped with sentence-transformers models for this CPU."""
+    if platform.machine().lower() in {"arm64", "aarch64"}:
+        return "onnx/model_qint8_arm64.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+
+def _load_hf_embeddings(model_name: str, mk: Dict[str, Any], ek: Dict[str, Any]) -> "HuggingFaceEmbeddings":
+    from langchain_huggingface import HuggingFaceEmbeddings  # local import
+
+    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=mk, encode_kwargs=ek)
+
+
+def _evict(keep: int) -> None:
+    while len(_registry) > max(keep, 0):
+        _registry.popitem(last=False)
+
+
+def _stable_json(obj: Dict[str, Any]) -> str:
+    return json.dumps(obj, sort_keys=True, default=repr)
+
+
+def _max_models() -> int:
+    raw = os.getenv(MAX_MODELS_ENV_KEY)
+    try:
+        return max(int(raw), 0) if raw else _DEFAULT_MAX_MODELS
+    except ValueError:
+        return _DEFAULT_MAX_MODELS
+
+
+def _memory_tight() -> bool:
+    raw = os.getenv(MIN_FREE_MB_ENV_KEY)
+    try:
+        min_free = int(raw) if raw else 0
+    except ValueError:
+        return False
+    available = _available_mb()
+    return min_free > 0 and available is not None and available < min_free
+
+
+def _available_mb() -> Optional[int]:
+    """Available physical memory in MiB, or None where the platform does not report it."""
+    try:
+        return int(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1 << 20))
+    except (AttributeError, OSError, ValueError):
+        return None
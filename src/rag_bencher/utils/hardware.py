@@ -1,4 +1,5 @@
 import os
+import sys
 from functools import lru_cache
 
 # Public env knob: auto|cuda|gpu|cpu  (default: auto)
@@ -26,3 +27,29 @@ def apply_process_wide_policy() -> str:
 
 def wants_cpu() -> bool:
     return effective_mode() == "cpu"
+
+
+# Thread-pool sizes read by OpenMP/BLAS (numpy, faiss, torch) and HF tokenizers when they load.
+THREAD_ENV_KEYS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def thread_env(threads: int) -> dict[str, str]:
+    """Environment that caps a process's compute threads at ``threads``."""
+    env = {key: str(max(threads, 1)) for key in THREAD_ENV_KEYS}
+    env["TOKENIZERS_PARALLELISM"] = "false"
+    return env
+
+
+def pin_threads(threads: int) -> None:
+    """Cap this process's compute threads, e.g. as a worker-pool initializer.
+
+    The environment only affects libraries loaded afterwards, so torch and faiss are also capped
+    directly when they are already imported.
+    """
+    os.environ.update(thread_env(threads))
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(max(threads, 1))
+    faiss = sys.modules.get("faiss")
+    if faiss is not None and hasattr(faiss, "omp_set_num_threads"):
+        faiss.omp_set_num_threads(max(threads, 1))
@@ -14,6 +14,9 @@ def build_vector_backend(cfg: Dict[str, Any] | None) -> Optional[VectorBackend]:
     if not cfg:
         return None
     name = (cfg.get("name") or "").lower()
+    if name == "faiss":
+        # Local FAISS index settings; the pipelines build it themselves (see BenchConfig.faiss_index).
+        return None
     if name == "azure_ai_search":
         from .azure_ai_search import AzureAISearchBackend
 
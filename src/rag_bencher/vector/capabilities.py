@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+ENV_KEY = "RAG_BENCH_CAPABILITIES"
+
+
+def capabilities_path() -> Path:
+    """Return the capabilities file: ``$RAG_BENCH_CAPABILITIES`` or the user cache directory."""
+    override = os.getenv(ENV_KEY)
+    if override:
+        return Path(override).expanduser()
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "rag_bencher" / "capabilities.json"
+
+
+def environment_key(component: str, origin: Optional[str], distributions: Iterable[str]) -> str:
+    """Key a probe result by interpreter, the probed module's location and the installed versions."""
+    versions: Dict[str, Optional[str]] = {}
+    for dist in distributions:
+        try:
+            versions[dist] = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            versions[dist] = None
+    payload = {
+        "component": component,
+        "python": sys.executable,
+        "version": sys.version,
+        "origin": origin,
+        "distributions": versions,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _read_all() -> Dict[str, Any]:
+    try:
+        data = json.loads(capabilities_path().read_text("utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def read_capability(key: str) -> Optional[bool]:
+    """Return the stored probe result for ``key``, or None when it has not been probed."""
+    entry = _read_all().get(key)
+    if isinstance(entry, dict) and isinstance(entry.get("ok"), bool):
+        return bool(entry["ok"])
+    return None
+
+
+def write_capability(key: str, component: str, ok: bool) -> None:
+    """Store a probe result; failures to write (e.g. a read-only home) are ignored."""
+    path = capabilities_path()
+    data = _read_all()
+    data[key] = {"component": component, "python": sys.executable, "ok": ok}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        return
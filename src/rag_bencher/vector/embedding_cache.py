@@ -0,0 +1,255 @@
+import hashlib
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.utils.cache import EvictionCandidate, SqliteCache, eviction_order
+
+from .index_cache import embedding_fingerprint
+from .numpy_store import FloatMatrix
+
+# Public env knob: unset/false disables the cache, true uses DEFAULT_DIR, anything else is a directory.
+ENV_KEY = "RAG_BENCH_EMBED_CACHE"
+DEFAULT_DIR = Path(".ragbencher_cache") / "embeddings"
+DB_NAME = "vectors.sqlite3"
+_LOOKUP_BATCH = 500
+_READ_FLUSH = 256
+
+
+def embed_cache_dir() -> Optional[Path]:
+    """Return the directory cached vectors live in, or None when caching is disabled."""
+    value = (os.getenv(ENV_KEY) or "").strip()
+    if value.lower() in {"", "0", "false", "no", "off"}:
+        return None
+    if value.lower() in {"1", "true", "yes", "on"}:
+        return DEFAULT_DIR
+    return Path(value)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embeddings_namespace(embeddings: Embeddings) -> str:
+    """Identify the vectors ``embeddings`` produces: model id, encode options and load options except device."""
+    return embedding_fingerprint(embeddings)
+
+
+class VectorCache(SqliteCache):
+    """SQLite store of float32 vectors keyed by (namespace, text hash), one raw little-endian blob per vector.
+
+    Vector reads are recorded like entry reads, so vectors share the byte budget and LRU/LFU eviction.
+    """
+
+    _REMOVE_SQL: ClassVar[Dict[str, str]] = {
+        **SqliteCache._REMOVE_SQL,
+        "vectors": "DELETE FROM vectors WHERE namespace = ? AND key = ?",
+    }
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self._reads: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    def _create_tables(self, conn: sqlite3.Connection) -> None:
+        super()._create_tables(conn)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (namespace TEXT NOT NULL, key TEXT NOT NULL, dim INTEGER NOT NULL,"
+            " data BLOB NOT NULL, created REAL NOT NULL, accessed REAL, hits INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(vectors)")}
+        # Stores written before vectors were evictable lack the usage columns; another process may add them first.
+        for name, decl in (("accessed", "REAL"), ("hits", "INTEGER NOT NULL DEFAULT 0")):
+            if name not in columns:
+                try:
+                    conn.execute(f"ALTER TABLE vectors ADD COLUMN {name} {decl}")
+                except sqlite3.OperationalError:
+                    pass
+
+    def flush_touches(self) -> None:
+        super().flush_touches()
+        with self._touches_lock:
+            reads, self._reads = self._reads, {}
+        if not reads:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE vectors SET accessed = MAX(COALESCE(accessed, created), ?), hits = hits + ?"
+                " WHERE namespace = ? AND key = ?",
+                [(at, hits, namespace, key) for (namespace, key), (at, hits) in reads.items()],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def stored_bytes(self) -> int:
+        row = self._conn().execute("SELECT COALESCE(SUM(length(data)), 0) FROM vectors").fetchone()
+        return super().stored_bytes() + int(row[0])
+
+    def eviction_candidates(self, policy: str = "lru") -> Generator[EvictionCandidate, None, None]:
+        order = "COALESCE(accessed, created)" if policy == "lru" else "hits, COALESCE(accessed, created)"
+        rows = self._conn().execute(
+            f"SELECT namespace, key, length(data), COALESCE(accessed, created), hits FROM vectors ORDER BY {order}"
+        )
+        vectors = (
+            EvictionCandidate(float(used), int(hits), int(size), "vectors", (str(namespace), str(key)))
+            for namespace, key, size, used, hits in rows
+        )
+        entries = super().eviction_candidates(policy)
+        try:
+            yield from heapq.merge(entries, vectors, key=eviction_order(policy))
+        finally:
+            entries.close()
+            rows.close()
+
+    def usage(self) -> Dict[str, int]:
+        stats = super().usage()
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM vectors").fetchone()
+        return {**stats, "vectors": int(row[0]), "vector_bytes": int(row[1])}
+
+    def prune(self, older_than_s: float) -> int:
+        removed = super().prune(older_than_s)
+        return removed + self._delete("DELETE FROM vectors WHERE created < ?", (time.time() - older_than_s,))
+
+    def get_vectors(self, namespace: str, keys: Iterable[str]) -> Dict[str, FloatMatrix]:
+        """Return the stored vector of every key in ``keys`` that has one."""
+        wanted = list(dict.fromkeys(keys))
+        found: Dict[str, FloatMatrix] = {}
+        conn = self._conn()
+        for start in range(0, len(wanted), _LOOKUP_BATCH):
+            chunk = wanted[start : start + _LOOKUP_BATCH]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, dim, data FROM vectors WHERE namespace = ? AND key IN ({marks})", (namespace, *chunk)
+            )
+            for key, dim, data in rows:
+                vec = np.frombuffer(data, dtype="<f4")
+                if vec.shape[0] == dim:
+                    found[str(key)] = vec.astype(np.float32)
+        self._record_reads(namespace, found)
+        return found
+
+    def _record_reads(self, namespace: str, keys: Iterable[str]) -> None:
+        now = time.time()
+        with self._touches_lock:
+            for key in keys:
+                _, hits = self._reads.get((namespace, key), (0.0, 0))
+                self._reads[(namespace, key)] = (now, hits + 1)
+            full = len(self._reads) >= _READ_FLUSH
+        if full:
+            self.flush_touches()
+
+    def vectors(self, namespace: str) -> Dict[str, FloatMatrix]:
+        """Return every vector stored under ``namespace``, oldest first."""
+        rows = self._conn().execute(
+            "SELECT key, dim, data FROM vectors WHERE namespace = ? ORDER BY created, rowid", (namespace,)
+        )
+        return {
+            str(key): np.frombuffer(data, dtype="<f4").astype(np.float32)
+            for key, dim, data in rows
+            if len(data) == 4 * dim
+        }
+
+    def set_vectors(self, namespace: str, items: Iterable[Tuple[str, FloatMatrix]]) -> None:
+        now = time.time()
+        rows = [
+            (namespace, key, int(vec.shape[0]), np.ascontiguousarray(vec, dtype="<f4").tobytes(), now)
+            for key, vec in items
+        ]
+        if not rows:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors (namespace, key, dim, data, created) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._count_writes(len(rows))
+
+
+_stores: Dict[Path, VectorCache] = {}
+_stores_lock = threading.Lock()
+
+
+def vector_cache(directory: Path) -> VectorCache:
+    """Return the process-wide vector store in ``directory``."""
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = VectorCache(directory / DB_NAME)
+        return store
+
+
+def close_vector_caches() -> None:
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Serve ``embed_documents``/``embed_query`` from a persistent float32 cache, embedding only unseen texts.
+
+    Vectors are keyed by the wrapped model's :func:`embeddings_namespace` and the SHA256 of the text;
+    document and query vectors are kept apart because some models embed them differently. Results
+    are always returned at float32 precision, so a cold and a warm run produce identical vectors.
+    Other attributes are read from the wrapped embeddings.
+    """
+
+    def __init__(self, inner: Embeddings, store: VectorCache, *, namespace: Optional[str] = None) -> None:
+        self.inner = inner
+        self.store = store
+        self.namespace = namespace or embeddings_namespace(inner)
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate unknown attributes to the wrapped embeddings."""
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "doc", self.inner.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda ts: [self.inner.embed_query(ts[0])])[0]
+
+    def _embed(
+        self, texts: Sequence[str], kind: str, compute: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        namespace = f"{self.namespace}|{kind}"
+        keys = [text_hash(t) for t in texts]
+        found = self.store.get_vectors(namespace, keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = np.asarray(compute(list(missing.values())), dtype=np.float32)
+            pairs = list(zip(missing, fresh, strict=True))
+            self.store.set_vectors(namespace, pairs)
+            found.update(pairs)
+        return [found[key].tolist() for key in keys]
+
+
+def with_embed_cache(embeddings: Embeddings) -> Embeddings:
+    """Wrap ``embeddings`` in :class:`CachedEmbeddings` when ``RAG_BENCH_EMBED_CACHE`` is set, else return it as is."""
+    directory = embed_cache_dir()
+    if directory is None or isinstance(embeddings, CachedEmbeddings):
+        return embeddings
+    return CachedEmbeddings(embeddings, vector_cache(directory))
@@ -0,0 +1,72 @@
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from rag_bencher.config import FaissIndexCfg
+
+from .numpy_store import FloatMatrix
+
+
+def make_faiss_index(dim: int, cfg: FaissIndexCfg, train: FloatMatrix) -> Any:
+    """Create (and train, for IVF variants) an L2 FAISS index described by ``cfg``.
+
+    ``nlist`` is clamped to the number of training vectors so small corpora still build.
+    """
+    import faiss
+
+    if cfg.index == "flat":
+        return faiss.IndexFlatL2(dim)
+    index: Any
+    if cfg.index == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, cfg.m)
+        index.hnsw.efConstruction = cfg.ef_construction
+        apply_search_params(index, cfg)
+        return index
+
+    nlist = max(1, min(cfg.nlist, train.shape[0]))
+    quantizer = faiss.IndexFlatL2(dim)
+    if cfg.index == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        if dim % cfg.pq_m:
+            raise ValueError(f"pq_m={cfg.pq_m} must divide the embedding dimension {dim}")
+        if train.shape[0] < 2**cfg.pq_nbits:
+            raise ValueError(f"ivf_pq with pq_nbits={cfg.pq_nbits} needs at least {2**cfg.pq_nbits} vectors to train")
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, cfg.pq_m, cfg.pq_nbits)
+    index.train(train)
+    apply_search_params(index, cfg)
+    return index
+
+
+def apply_search_params(index: Any, cfg: FaissIndexCfg) -> None:
+    """Set query-time knobs (``nprobe`` / ``efSearch``), which are not always restored from disk."""
+    if cfg.index in {"ivf", "ivf_pq"} and hasattr(index, "nprobe"):
+        index.nprobe = cfg.nprobe
+    elif cfg.index == "hnsw" and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = cfg.ef_search
+
+
+def build_faiss_store(
+    docs: Sequence[Document],
+    embeddings: Embeddings,
+    cfg: FaissIndexCfg,
+    *,
+    ids: Optional[List[str]] = None,
+) -> VectorStore:
+    """Embed ``docs`` once and load them into a LangChain FAISS store backed by the configured index."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores.faiss import FAISS
+
+    texts = [d.page_content for d in docs]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    index = make_faiss_index(vectors.shape[1], cfg, vectors)
+    store = FAISS(embedding_function=embeddings, index=index, docstore=InMemoryDocstore(), index_to_docstore_id={})
+    store.add_embeddings(
+        list(zip(texts, vectors.tolist(), strict=True)),
+        metadatas=[d.metadata for d in docs],
+        ids=ids,
+    )
+    return store
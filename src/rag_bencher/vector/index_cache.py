@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Public env knob: unset/false disables the cache, true uses DEFAULT_DIR, anything else is a directory.
+# Persisted indexes may be unpickled on load, so the directory must only be writable by trusted users.
+ENV_KEY = "RAG_BENCH_INDEX_CACHE"
+# Public env knob: exact|incremental  (default: exact)
+MODE_ENV_KEY = "RAG_BENCH_INDEX_MODE"
+DEFAULT_DIR = Path(".ragbencher_cache") / "indexes"
+MANIFEST_NAME = "manifest.json"
+_FORMAT_VERSION = 1
+_MODEL_ATTRS = (
+    "model_name",
+    "model_id",
+    "model",
+    "deployment",
+    "azure_deployment",
+    "dimensions",
+    "encode_kwargs",
+    "model_kwargs",
+)
+# Field-name fragments of credentials; matching fields never reach a fingerprint or a manifest.
+_SECRET_MARKERS = ("key", "token", "secret", "password", "credential")
+# Settings that change how vectors are fetched, never which vectors come back.
+_RUNTIME_FIELDS = frozenset(
+    {
+        "cache_folder",
+        "chunk_size",
+        "default_headers",
+        "default_query",
+        "embed_batch_size",
+        "headers",
+        "max_retries",
+        "multi_process",
+        "request_timeout",
+        "retry_max_seconds",
+        "retry_min_seconds",
+        "show_progress",
+        "show_progress_bar",
+        "timeout",
+    }
+)
+
+
+def index_cache_dir() -> Optional[Path]:
+    """Return the directory persisted indexes live in, or None when caching is disabled."""
+    value = (os.getenv(ENV_KEY) or "").strip()
+    if value.lower() in {"", "0", "false", "no", "off"}:
+        return None
+    if value.lower() in {"1", "true", "yes", "on"}:
+        return DEFAULT_DIR
+    return Path(value)
+
+
+def incremental_enabled() -> bool:
+    mode = (os.getenv(MODE_ENV_KEY) or "exact").strip().lower()
+    if mode not in {"exact", "incremental"}:
+        raise ValueError(f"Unknown {MODE_ENV_KEY}={mode!r}. Expected exact or incremental.")
+    return mode == "incremental"
+
+
+def chunk_hash(doc: Document) -> str:
+    """Hash a chunk's text and metadata so identical chunks map to identical keys."""
+    meta = json.dumps(doc.metadata, sort_keys=True, default=str)
+    return hashlib.sha256((doc.page_content + "\x00" + meta).encode("utf-8")).hexdigest()
+
+
+def embedding_fingerprint(embeddings: Embeddings) -> str:
+    """Identify an embeddings object by class and every field that changes the vectors it returns.
+
+    That covers the model id, Azure deployment, output ``dimensions``, encode options and load options such as the
+    sentence-transformers ``backend`` (torch, onnx, onnx-int8). Secrets, clients, the device and transport or batching
+    settings are left out, so the same model on another GPU or with another API key shares cached vectors.
+    """
+    cls = type(embeddings)
+    fields: Dict[str, Any] = {}
+    dump = getattr(embeddings, "model_dump", None)
+    if callable(dump):
+        fields.update(dump())
+    for attr in _MODEL_ATTRS:
+        fields.setdefault(attr, getattr(embeddings, attr, None))
+    model_kwargs = fields.get("model_kwargs")
+    if isinstance(model_kwargs, dict):
+        fields["model_kwargs"] = {k: v for k, v in model_kwargs.items() if k != "device"}
+    ident = {k: v for k, v in fields.items() if _identifying(k, v)}
+    return f"{cls.__module__}.{cls.__qualname__}:{json.dumps(ident, sort_keys=True)}"
+
+
+def _identifying(name: str, value: Any) -> bool:
+    if name in _RUNTIME_FIELDS or any(marker in name.lower() for marker in _SECRET_MARKERS):
+        return False
+    return value not in (None, "", {}, []) and _plain(value)
+
+
+def _plain(value: Any) -> bool:
+    """Whether ``value`` is JSON data; clients, secrets and other objects have no stable text form."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _plain(v) for k, v in value.items())
+    return False
+
+
+def store_type(factory: type[VectorStore]) -> str:
+    return f"{factory.__module__}.{factory.__qualname__}"
+
+
+def index_key(hashes: Sequence[str], embeddings: Embeddings, factory: type[VectorStore], variant: str = "") -> str:
+    """Combine chunk hashes, the embedding model id and the vectorstore type into one cache key.
+
+    ``variant`` distinguishes different index layouts of the same store type (e.g. FAISS IVF vs HNSW).
+    """
+    h = hashlib.sha256()
+    h.update(f"v{_FORMAT_VERSION}\n{store_type(factory)}\n{embedding_fingerprint(embeddings)}\n".encode("utf-8"))
+    if variant:
+        h.update(f"{variant}\n".encode("utf-8"))
+    for ch in hashes:
+        h.update(ch.encode("ascii"))
+    return h.hexdigest()
+
+
+def chunk_ids(hashes: Sequence[str]) -> List[str]:
+    """Turn chunk hashes into unique, stable vectorstore ids (repeated chunks get an occurrence suffix)."""
+    seen: Dict[str, int] = {}
+    ids: List[str] = []
+    for ch in hashes:
+        n = seen.get(ch, 0)
+        seen[ch] = n + 1
+        ids.append(f"{ch}-{n}")
+    return ids
+
+
+def corpus_identity(docs: Sequence[Document]) -> str:
+    """Identify a corpus by the sorted ``source`` files of its chunks (the ``data.paths`` it was loaded from)."""
+    return json.dumps(sorted({str(d.metadata["source"]) for d in docs if d.metadata.get("source")}))
+
+
+def slot_key(embeddings: Embeddings, factory: type[VectorStore], variant: str = "", corpus: str = "") -> str:
+    """Key the long-lived incremental index by corpus, embedding model and store type, so edits diff against it.
+
+    ``corpus`` (see :func:`corpus_identity`) keeps configs over different documents from sharing and
+    rewriting one slot; chunk contents are left out so edits to the same files reuse it.
+    """
+    ident = f"v{_FORMAT_VERSION}\n{store_type(factory)}\n{embedding_fingerprint(embeddings)}\nincremental{variant}"
+    if corpus:
+        ident += f"\n{corpus}"
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+def read_manifest(folder: Path) -> Optional[Dict[str, Any]]:
+    f = folder / MANIFEST_NAME
+    if not f.exists():
+        return None
+    try:
+        obj = json.loads(f.read_text("utf-8"))
+    except Exception:
+        return None
+    return obj if isinstance(obj, dict) and obj.get("version") == _FORMAT_VERSION else None
+
+
+def load_index(folder: Path, factory: type[VectorStore], embeddings: Embeddings) -> Optional[VectorStore]:
+    """Load a persisted index for ``factory``; return None when missing, unreadable or not ours.
+
+    Stores such as FAISS unpickle their docstore, so only folders whose manifest matches the one
+    :func:`save_index` writes for this store type and embedding model are opened. That keeps stray folders out,
+    but a manifest can be forged: the cache directory (``RAG_BENCH_INDEX_CACHE``) must only be writable by
+    users you trust to run code as you.
+    """
+    if not _owned_manifest(read_manifest(folder), factory, embeddings):
+        return None
+    try:
+        load_local = getattr(factory, "load_local", None)
+        if load_local is not None:
+            return cast(VectorStore, load_local(str(folder), embeddings, allow_dangerous_deserialization=True))
+        load = getattr(factory, "load", None)
+        if load is not None:
+            return cast(VectorStore, load(str(folder / "store.json"), embeddings))
+    except Exception:
+        return None
+    return None
+
+
+def _owned_manifest(manifest: Optional[Dict[str, Any]], factory: type[VectorStore], embeddings: Embeddings) -> bool:
+    """Whether ``manifest`` has the schema local builds write, for this store type and embedding model."""
+    if manifest is None:
+        return False
+    return (
+        manifest.get("vectorstore") == store_type(factory)
+        and manifest.get("embeddings") == embedding_fingerprint(embeddings)
+        and isinstance(manifest.get("variant"), str)
+        and isinstance(manifest.get("chunks"), list)
+    )
+
+
+def save_index(store: VectorStore, folder: Path, manifest: Dict[str, Any], *, replace: bool = False) -> bool:
+    """Persist ``store`` and its manifest under ``folder``; return False if the store cannot be saved.
+
+    The index is written to a private temp directory first and renamed into place, so concurrent
+    builders never observe a half-written index. If another builder published ``folder`` first,
+    its copy is kept (content-addressed keys hold the same index) unless ``replace`` is set; then
+    the old folder is renamed aside before the swap, so readers that already opened it are unaffected.
+    """
+    tmp = folder.with_name(f".{folder.name}.tmp-{os.getpid()}-{uuid.uuid4().hex}")
+    tmp.mkdir(parents=True)
+    try:
+        save_local = getattr(store, "save_local", None)
+        dump = getattr(store, "dump", None)
+        if save_local is not None:
+            save_local(str(tmp))
+        elif dump is not None:
+            dump(str(tmp / "store.json"))
+        else:
+            return False
+        payload = {"version": _FORMAT_VERSION, **manifest}
+        (tmp / MANIFEST_NAME).write_text(json.dumps(payload), "utf-8")
+        if _publish(tmp, folder) or not replace:
+            return True
+        aside = folder.with_name(f".{folder.name}.old-{os.getpid()}-{uuid.uuid4().hex}")
+        try:
+            os.rename(folder, aside)
+        except FileNotFoundError:
+            pass
+        # Losing this race to another replacer is fine: its index is at least as recent as ours.
+        _publish(tmp, folder)
+        shutil.rmtree(aside, ignore_errors=True)
+        return True
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def cached_indexes(root: Path) -> List[Path]:
+    """Published index folders under ``root`` (exact and incremental), least recently written first."""
+    manifests = [*root.glob(f"*/{MANIFEST_NAME}"), *root.glob(f"incremental/*/{MANIFEST_NAME}")]
+    folders = [m.parent for m in manifests if not m.parent.name.startswith(".")]
+    return sorted(folders, key=lambda f: (f / MANIFEST_NAME).stat().st_mtime)
+
+
+def remove_index(folder: Path) -> None:
+    """Delete a published index, renaming it aside first so builders never load a half-deleted folder."""
+    aside = folder.with_name(f".{folder.name}.old-{os.getpid()}-{uuid.uuid4().hex}")
+    try:
+        os.rename(folder, aside)
+    except FileNotFoundError:
+        return
+    shutil.rmtree(aside, ignore_errors=True)
+
+
+def _publish(tmp: Path, folder: Path) -> bool:
+    """Rename ``tmp`` to ``folder``; False when ``folder`` already exists."""
+    try:
+        os.rename(tmp, folder)
+    except OSError:
+        if folder.exists():
+            return False
+        raise
+    return True
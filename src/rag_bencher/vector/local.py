@@ -3,20 +3,193 @@ import os
 import subprocess
 import sys
 from functools import lru_cache
-from typing import Iterable
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, cast
 
+import numpy as np
+import numpy.typing as npt
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 
+from rag_bencher.config import FaissIndexCfg
+
+from .capabilities import environment_key, read_capability, write_capability
+from .index_cache import (
+    chunk_hash,
+    chunk_ids,
+    corpus_identity,
+    embedding_fingerprint,
+    incremental_enabled,
+    index_cache_dir,
+    index_key,
+    load_index,
+    read_manifest,
+    save_index,
+    slot_key,
+    store_type,
+)
+
 _VectorStoreFactory = type[VectorStore]
 
 
-def build_local_vectorstore(documents: Iterable[Document], embeddings: Embeddings) -> VectorStore:
-    """Construct a local vector store with FAISS when possible and a safe fallback otherwise."""
-    factory = _resolve_factory()
+def build_local_vectorstore(
+    documents: Iterable[Document],
+    embeddings: Embeddings,
+    *,
+    cache_dir: str | Path | None = None,
+    incremental: bool | None = None,
+    faiss_index: FaissIndexCfg | None = None,
+) -> VectorStore:
+    """Construct a local vector store with FAISS when possible and a safe fallback otherwise.
+
+    ``faiss_index`` (from ``vector: {name: faiss, ...}``) forces FAISS and selects its index type
+    (flat, IVF, HNSW or IVF-PQ) instead of the store picked by ``RAG_BENCH_VECTORSTORE``.
+
+    When ``cache_dir`` is given (or ``RAG_BENCH_INDEX_CACHE`` is set) the built index is persisted under a key
+    derived from the chunk contents, the embedding model and the vectorstore type, and later builds with the
+    same inputs load it instead of re-embedding.
+
+    With ``incremental`` (or ``RAG_BENCH_INDEX_MODE=incremental``) a single index per corpus is kept instead and
+    updated in place: only chunks missing from its manifest are embedded and chunks no longer present are dropped.
+    """
+    factory = _resolve_factory() if faiss_index is None else _require_faiss()
     doc_list = list(documents)
-    return factory.from_documents(doc_list, embeddings)
+    root = Path(cache_dir) if cache_dir is not None else index_cache_dir()
+    if root is None:
+        return _create(factory, doc_list, embeddings, faiss_index)
+
+    hashes = [chunk_hash(d) for d in doc_list]
+    variant = faiss_index.model_dump_json() if faiss_index is not None else ""
+    if incremental if incremental is not None else incremental_enabled():
+        return _build_incremental(doc_list, hashes, embeddings, factory, root, faiss_index, variant)
+    folder = root / index_key(hashes, embeddings, factory, variant)
+    cached = _load(folder, factory, embeddings, faiss_index)
+    if cached is not None:
+        return cached
+    store = _create(factory, doc_list, embeddings, faiss_index)
+    manifest = {
+        "vectorstore": store_type(factory),
+        "embeddings": embedding_fingerprint(embeddings),
+        "variant": variant,
+        "chunks": hashes,
+    }
+    save_index(store, folder, manifest)
+    return store
+
+
+def _build_incremental(
+    docs: List[Document],
+    hashes: List[str],
+    embeddings: Embeddings,
+    factory: _VectorStoreFactory,
+    root: Path,
+    faiss_index: FaissIndexCfg | None,
+    variant: str,
+) -> VectorStore:
+    folder = root / "incremental" / slot_key(embeddings, factory, variant, corpus_identity(docs))
+    ids = chunk_ids(hashes)
+    manifest = {
+        "vectorstore": store_type(factory),
+        "embeddings": embedding_fingerprint(embeddings),
+        "variant": variant,
+        "chunks": hashes,
+        "ids": ids,
+    }
+    previous = read_manifest(folder) or {}
+    store = _load(folder, factory, embeddings, faiss_index) if previous else None
+    current = set(ids)
+    removed = [i for i in previous.get("ids", []) if i not in current]
+    if store is None or (removed and not _delete(store, removed)):
+        store = _create(factory, docs, embeddings, faiss_index, ids=ids)
+        save_index(store, folder, manifest, replace=True)
+        return store
+
+    known = set(previous.get("ids", []))
+    added = [n for n, i in enumerate(ids) if i not in known]
+    if added:
+        store.add_documents([docs[n] for n in added], ids=[ids[n] for n in added])
+    if removed or added or previous.get("ids") != ids:
+        save_index(store, folder, manifest, replace=True)
+    return store
+
+
+def _delete(store: VectorStore, ids: List[str]) -> bool:
+    """Drop ``ids`` from ``store``; False when its index cannot remove vectors (FAISS HNSW, for one)."""
+    try:
+        store.delete(ids)
+    except Exception:
+        return False
+    return True
+
+
+def _create(
+    factory: _VectorStoreFactory,
+    docs: List[Document],
+    embeddings: Embeddings,
+    faiss_index: FaissIndexCfg | None,
+    ids: List[str] | None = None,
+) -> VectorStore:
+    if faiss_index is not None and faiss_index.index != "flat":
+        from .faiss_index import build_faiss_store
+
+        return build_faiss_store(docs, embeddings, faiss_index, ids=ids)
+    if ids is None:
+        return factory.from_documents(docs, embeddings)
+    return factory.from_documents(docs, embeddings, ids=ids)
+
+
+def _load(
+    folder: Path,
+    factory: _VectorStoreFactory,
+    embeddings: Embeddings,
+    faiss_index: FaissIndexCfg | None,
+) -> VectorStore | None:
+    store = load_index(folder, factory, embeddings)
+    if store is not None and faiss_index is not None:
+        from .faiss_index import apply_search_params
+
+        apply_search_params(getattr(store, "index", None), faiss_index)
+    return store
+
+
+def stored_vectors(store: VectorStore, docs: Sequence[Document]) -> Optional[npt.NDArray[np.float32]]:
+    """Return the embeddings ``store`` already holds for ``docs`` (by ``Document.id``), one row each.
+
+    Returns None when the store type is not supported or any document is missing, so callers can
+    fall back to embedding the texts themselves.
+    """
+    ids = [d.id for d in docs]
+    if not ids or any(i is None for i in ids):
+        return None
+    keys = cast(List[str], ids)
+    try:
+        get_vectors = getattr(store, "get_vectors", None)
+        if callable(get_vectors):
+            return np.asarray(get_vectors(keys), dtype=np.float32)
+        records = getattr(store, "store", None)
+        if isinstance(records, dict):
+            return np.asarray([records[i]["vector"] for i in keys], dtype=np.float32)
+        id_map = getattr(store, "index_to_docstore_id", None)
+        index = getattr(store, "index", None)
+        if isinstance(id_map, dict) and index is not None:
+            positions = {doc_id: pos for pos, doc_id in id_map.items()}
+            return np.stack([index.reconstruct(int(positions[i])) for i in keys]).astype(np.float32)
+    except (KeyError, RuntimeError):
+        # Unknown ids, or a FAISS index that cannot reconstruct vectors (e.g. IVF without a direct map).
+        return None
+    return None
+
+
+def _require_faiss() -> _VectorStoreFactory:
+    if not _faiss_safe_to_import():
+        raise RuntimeError("vector.name=faiss but FAISS is unavailable or unsafe to import in this environment.")
+    return _faiss_factory()
+
+
+def vectorstore_type() -> str:
+    """Name of the store class ``RAG_BENCH_VECTORSTORE`` resolves to, as recorded in index manifests."""
+    return store_type(_resolve_factory())
 
 
 @lru_cache(maxsize=1)
@@ -27,6 +200,15 @@ def _resolve_factory() -> _VectorStoreFactory:
     if mode in {"memory", "inmemory", "in-memory"} or disable_faiss:
         return _inmemory_factory()
 
+    if mode == "numpy":
+        return _numpy_factory()
+
+    if mode == "mmap":
+        return _mmap_factory()
+
+    if mode in {"int8", "binary"}:
+        return _quantized_factory(mode)
+
     if mode == "faiss":
         if not _faiss_safe_to_import():
             raise RuntimeError(
@@ -36,7 +218,9 @@ def _resolve_factory() -> _VectorStoreFactory:
 
     # Default to the safe in-memory implementation unless FAISS is explicitly requested.
     if mode not in {"", "auto"}:
-        raise ValueError(f"Unknown RAG_BENCH_VECTORSTORE={mode!r}. Expected faiss or memory.")
+        raise ValueError(
+            f"Unknown RAG_BENCH_VECTORSTORE={mode!r}. Expected faiss, memory, numpy, mmap, int8 or binary."
+        )
     return _inmemory_factory()
 
 
@@ -52,9 +236,46 @@ def _inmemory_factory() -> _VectorStoreFactory:
     return InMemoryVectorStore
 
 
+def _numpy_factory() -> _VectorStoreFactory:
+    from .numpy_store import NumpyVectorStore
+
+    return NumpyVectorStore
+
+
+def _mmap_factory() -> _VectorStoreFactory:
+    from .mmap_store import MmapVectorStore
+
+    return MmapVectorStore
+
+
+def _quantized_factory(codec: str) -> _VectorStoreFactory:
+    from .quantized_store import BinaryVectorStore, Int8VectorStore
+
+    return Int8VectorStore if codec == "int8" else BinaryVectorStore
+
+
+_FAISS = "faiss"
+_FAISS_DISTRIBUTIONS = ("faiss-cpu", "faiss-gpu", "faiss", "langchain-community")
+
+
 @lru_cache(maxsize=1)
 def _faiss_safe_to_import() -> bool:
-    """Check FAISS availability without risking a segfault in the current process."""
+    """Check FAISS availability without risking a segfault in the current process.
+
+    The subprocess probe runs once per interpreter and FAISS install; its result is persisted in the
+    capabilities file and reused by later processes.
+    """
+    spec = importlib.util.find_spec("faiss")
+    if spec is None:
+        return False
+    cached = read_capability(_faiss_key(spec))
+    if cached is not None:
+        return cached
+    return probe_faiss()
+
+
+def probe_faiss() -> bool:
+    """Import FAISS in a child interpreter and persist the outcome, replacing any stored result."""
     spec = importlib.util.find_spec("faiss")
     if spec is None:
         return False
@@ -68,12 +289,21 @@ def _faiss_safe_to_import() -> bool:
             stderr=subprocess.DEVNULL,
             timeout=5,
         )
+    except subprocess.TimeoutExpired:
+        # A slow cold start says nothing about the install; probe again next time.
+        return False
     except (subprocess.SubprocessError, OSError):
+        write_capability(_faiss_key(spec), _FAISS, False)
         return False
 
+    write_capability(_faiss_key(spec), _FAISS, True)
     return True
 
 
+def _faiss_key(spec: object) -> str:
+    return environment_key(_FAISS, getattr(spec, "origin", None), _FAISS_DISTRIBUTIONS)
+
+
 def _is_truthy(value: str | None) -> bool:
     if value is None:
         return False
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .numpy_store import FloatMatrix, normalize_rows, top_k
+
+# Public env knob: parent directory for stores built without an explicit folder (default: system temp dir)
+ENV_DIR = "RAG_BENCH_MMAP_DIR"
+
+_VECTORS = "vectors.f32"
+_RECORDS = "records.bin"
+_OFFSETS = "offsets.u64"
+_IDS = "ids.u64"
+_META = "meta.json"
+_FILES = (_VECTORS, _RECORDS, _OFFSETS, _IDS, _META)
+_BLOCK_ROWS = 65536
+_QUERY_BLOCK = 64
+_EMBED_BATCH = 1024
+
+
+class MmapVectorStore(VectorStore):
+    """Exact cosine store whose vectors and chunk texts live in memory-mapped files.
+
+    Layout of ``folder_path``:
+      - ``vectors.f32``: raw, row-major, L2-normalised float32 embeddings.
+      - ``records.bin`` + ``offsets.u64``: one JSON record (id, text, metadata) per row, addressed by end offset.
+      - ``ids.u64``: the 64-bit hash of every row's id in ascending order, then the matching rows; lookups by id
+        binary-search the memory-mapped hashes instead of decoding records.
+      - ``meta.json``: dimension, row count and deleted rows.
+
+    Searches stream the matrix in ``block_rows`` slices and merge per-block top-k results, so resident memory
+    stays bounded by the block size rather than the corpus size. Stores opened with ``load_local`` are read-only
+    until the first write, which copies the files to a private working folder first.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        folder_path: str | Path | None = None,
+        *,
+        block_rows: int = _BLOCK_ROWS,
+        batch_size: int = _EMBED_BATCH,
+    ) -> None:
+        self._embedding = embedding
+        self._block_rows = max(1, block_rows)
+        self._batch_size = max(1, batch_size)
+        self._readonly = False
+        self._folder = Path(folder_path) if folder_path is not None else self._private_folder()
+        self._folder.mkdir(parents=True, exist_ok=True)
+        meta = self._read_meta()
+        self._dim: Optional[int] = meta.get("dim")
+        self._count: int = int(meta.get("count", 0))
+        self._deleted: set[int] = set(meta.get("deleted", []))
+        self._ids: Optional[Tuple[npt.NDArray[np.uint64], npt.NDArray[np.uint64]]] = None
+        self._maps: Optional[Tuple[FloatMatrix, npt.NDArray[np.uint64], npt.NDArray[np.uint8]]] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def folder(self) -> Path:
+        return self._folder
+
+    def __len__(self) -> int:
+        """Return the number of live (non-deleted) chunks."""
+        return self._count - len(self._deleted)
+
+    def _private_folder(self) -> Path:
+        parent = os.getenv(ENV_DIR) or None
+        if parent:
+            Path(parent).mkdir(parents=True, exist_ok=True)
+        folder = Path(tempfile.mkdtemp(prefix="rag-bench-mmap-", dir=parent))
+        weakref.finalize(self, shutil.rmtree, folder, True)
+        return folder
+
+    # ---- files ----
+    def _read_meta(self) -> Dict[str, Any]:
+        f = self._folder / _META
+        return dict(json.loads(f.read_text("utf-8"))) if f.exists() else {}
+
+    def _write_meta(self) -> None:
+        meta = {"dim": self._dim, "count": self._count, "deleted": sorted(self._deleted)}
+        (self._folder / _META).write_text(json.dumps(meta), "utf-8")
+
+    def _mapped(self) -> Tuple[FloatMatrix, npt.NDArray[np.uint64], npt.NDArray[np.uint8]]:
+        if self._maps is None:
+            vectors = np.memmap(
+                self._folder / _VECTORS, dtype=np.float32, mode="r", shape=(self._count, self._dim or 0)
+            )
+            offsets = np.memmap(self._folder / _OFFSETS, dtype=np.uint64, mode="r", shape=(self._count,))
+            records = np.memmap(self._folder / _RECORDS, dtype=np.uint8, mode="r")
+            self._maps = (vectors, offsets, records)
+        return self._maps
+
+    def _ensure_writable(self) -> None:
+        if not self._readonly:
+            return
+        source = self._folder
+        self._folder = self._private_folder()
+        for name in _FILES:
+            if (source / name).exists():
+                shutil.copyfile(source / name, self._folder / name)
+        self._readonly = False
+        self._maps = None
+
+    def _record(self, row: int) -> Document:
+        _, offsets, records = self._mapped()
+        start = int(offsets[row - 1]) if row else 0
+        obj = json.loads(records[start : int(offsets[row])].tobytes().decode("utf-8"))
+        return Document(id=obj["id"], page_content=obj["text"], metadata=obj["metadata"])
+
+    def _id_index(self) -> Tuple[npt.NDArray[np.uint64], npt.NDArray[np.uint64]]:
+        """Sorted id hashes and their rows, memory-mapped from ``ids.u64``."""
+        if self._ids is None:
+            path = self._folder / _IDS
+            if not self._count:
+                self._ids = (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint64))
+            elif path.exists() and path.stat().st_size == 16 * self._count:
+                both = np.memmap(path, dtype=np.uint64, mode="r", shape=(2, self._count))
+                self._ids = (both[0], both[1])
+            else:
+                # Folders written before the id index existed, or by an interrupted write: hash every record once.
+                self._ids = _sorted_ids([self._record(row).id or "" for row in range(self._count)], 0)
+        return self._ids
+
+    def _rows(self, ids: Sequence[str]) -> Dict[str, int]:
+        """Map each of ``ids`` that has a live row to its newest row."""
+        hashes, rows = self._id_index()
+        wanted = _id_hashes(ids)
+        found: Dict[str, int] = {}
+        for doc_id, h, pos in zip(ids, wanted, np.searchsorted(hashes, wanted), strict=True):
+            live = []
+            while pos < len(hashes) and hashes[pos] == h:
+                row = int(rows[pos])
+                # Hashes can collide, so the record's own id has the final word.
+                if row not in self._deleted and self._record(row).id == doc_id:
+                    live.append(row)
+                pos += 1
+            if live:
+                found[doc_id] = max(live)
+        return found
+
+    def _index_rows(self, ids: Sequence[str], first_row: int) -> None:
+        """Merge rows ``first_row...`` holding ``ids`` into the sorted id index and persist it."""
+        old_hashes, old_rows = self._id_index()
+        new_hashes, new_rows = _sorted_ids(ids, first_row)
+        hashes = np.concatenate([old_hashes, new_hashes])
+        order = np.argsort(hashes, kind="stable")
+        tmp = self._folder / f".{_IDS}.{uuid.uuid4().hex}"
+        np.concatenate([hashes[order], np.concatenate([old_rows, new_rows])[order]]).tofile(tmp)
+        self._ids = None
+        os.replace(tmp, self._folder / _IDS)
+
+    # ---- writes ----
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict[str, Any]]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        text_list = list(texts)
+        metas = list(metadatas) if metadatas is not None else [{} for _ in text_list]
+        new_ids = [str(i) for i in ids] if ids is not None else [str(uuid.uuid4()) for _ in text_list]
+        if not (len(text_list) == len(metas) == len(new_ids)):
+            raise ValueError("texts, metadatas and ids must have the same length")
+        if not text_list:
+            return []
+        self._ensure_writable()
+        existing = list(self._rows(new_ids))
+        if existing:
+            self.delete(existing)
+        first_row = self._count
+        for start in range(0, len(text_list), self._batch_size):
+            stop = start + self._batch_size
+            vectors = self._embedding.embed_documents(text_list[start:stop])
+            self._append(vectors, text_list[start:stop], metas[start:stop], new_ids[start:stop])
+        self._index_rows(new_ids, first_row)
+        self._write_meta()
+        return new_ids
+
+    def _append(
+        self,
+        vectors: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Sequence[dict[str, Any]],
+        ids: Sequence[str],
+    ) -> None:
+        mat = normalize_rows(vectors)
+        if self._dim is None:
+            self._dim = int(mat.shape[1])
+        elif mat.shape[1] != self._dim:
+            raise ValueError(f"Embedding dimension {mat.shape[1]} does not match store dimension {self._dim}")
+        records = self._folder / _RECORDS
+        end = records.stat().st_size if records.exists() else 0
+        offsets = np.empty(len(texts), dtype=np.uint64)
+        with open(records, "ab") as fh:
+            for n, (doc_id, text, meta) in enumerate(zip(ids, texts, metadatas, strict=True)):
+                blob = json.dumps({"id": doc_id, "text": text, "metadata": meta}).encode("utf-8")
+                fh.write(blob)
+                end += len(blob)
+                offsets[n] = end
+        with open(self._folder / _VECTORS, "ab") as fh:
+            fh.write(mat.tobytes())
+        with open(self._folder / _OFFSETS, "ab") as fh:
+            fh.write(offsets.tobytes())
+        self._count += len(texts)
+        self._maps = None
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self._ensure_writable()
+        if ids is None:
+            for name in _FILES:
+                (self._folder / name).unlink(missing_ok=True)
+            self._dim, self._count, self._deleted = None, 0, set()
+            self._ids, self._maps = None, None
+            return True
+        rows = list(self._rows(ids).values())
+        if not rows:
+            return False
+        self._deleted.update(rows)
+        self._write_meta()
+        return True
+
+    # ---- reads ----
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        rows = self._rows(ids)
+        return [self._record(rows[i]) for i in ids if i in rows]
+
+    def get_vectors(self, ids: Sequence[str]) -> FloatMatrix:
+        """Return the stored (normalised) embeddings for ``ids``; raises KeyError for unknown ids."""
+        rows = self._rows(ids)
+        vectors, _, _ = self._mapped()
+        return np.asarray(vectors[[rows[i] for i in ids]], dtype=np.float32)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vectors([self._embedding.embed_query(query)], k=k)[0]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vectors([embedding], k=k)[0]]
+
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4) -> List[List[Document]]:
+        """Embed and search many queries at once; results are aligned with ``queries``."""
+        vectors = [self._embedding.embed_query(q) for q in queries]
+        return [[doc for doc, _ in hits] for hits in self.similarity_search_with_score_by_vectors(vectors, k=k)]
+
+    def similarity_search_with_score_by_vectors(
+        self, embeddings: Sequence[Sequence[float]] | npt.NDArray[Any], k: int = 4
+    ) -> List[List[Tuple[Document, float]]]:
+        if len(embeddings) == 0:
+            return []
+        if len(self) == 0 or k <= 0:
+            return [[] for _ in range(len(embeddings))]
+        queries = normalize_rows(embeddings)
+        out: List[List[Tuple[Document, float]]] = []
+        for start in range(0, queries.shape[0], _QUERY_BLOCK):
+            idx, vals = self._scan(queries[start : start + _QUERY_BLOCK], k)
+            for row_idx, row_vals in zip(idx, vals, strict=True):
+                out.append(
+                    [(self._record(int(r)), float(s)) for r, s in zip(row_idx, row_vals, strict=True) if np.isfinite(s)]
+                )
+        return out
+
+    def _scan(self, queries: FloatMatrix, k: int) -> Tuple[npt.NDArray[np.intp], FloatMatrix]:
+        vectors, _, _ = self._mapped()
+        deleted = np.fromiter(self._deleted, dtype=np.intp) if self._deleted else None
+        best_idx = np.empty((queries.shape[0], 0), dtype=np.intp)
+        best_val = np.empty((queries.shape[0], 0), dtype=np.float32)
+        for start in range(0, self._count, self._block_rows):
+            block = np.asarray(vectors[start : start + self._block_rows])
+            scores = queries @ block.T
+            if deleted is not None:
+                local = deleted[(deleted >= start) & (deleted < start + block.shape[0])] - start
+                scores[:, local] = -np.inf
+            idx, vals = top_k(scores, k)
+            merged_idx = np.concatenate([best_idx, idx + start], axis=1)
+            merged_val = np.concatenate([best_val, vals], axis=1)
+            pick, best_val = top_k(merged_val, k)
+            best_idx = np.take_along_axis(merged_idx, pick, axis=1)
+        return best_idx, best_val
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda score: (score + 1.0) / 2.0
+
+    # ---- construction / persistence ----
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict[str, Any]]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        folder_path: str | Path | None = None,
+        **kwargs: Any,
+    ) -> "MmapVectorStore":
+        store = cls(embedding, folder_path)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def save_local(self, folder_path: str) -> None:
+        target = Path(folder_path)
+        if target.resolve() == self._folder.resolve():
+            self._write_meta()
+            return
+        target.mkdir(parents=True, exist_ok=True)
+        if not self._readonly:
+            self._write_meta()
+        for name in _FILES:
+            if (self._folder / name).exists():
+                shutil.copyfile(self._folder / name, target / name)
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings, **kwargs: Any) -> "MmapVectorStore":
+        if not (Path(folder_path) / _META).exists():
+            raise FileNotFoundError(f"No memory-mapped index in {folder_path}")
+        store = cls(embeddings, folder_path)
+        store._readonly = True
+        return store
+
+
+def _id_hashes(ids: Sequence[str]) -> npt.NDArray[np.uint64]:
+    digests = b"".join(hashlib.blake2b(i.encode("utf-8"), digest_size=8).digest() for i in ids)
+    return np.frombuffer(digests, dtype=np.uint64).copy()
+
+
+def _sorted_ids(ids: Sequence[str], first_row: int) -> Tuple[npt.NDArray[np.uint64], npt.NDArray[np.uint64]]:
+    """Hashes of ``ids`` in ascending order and the rows, from ``first_row`` on, that hold them."""
+    hashes = _id_hashes(ids)
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], (order + first_row).astype(np.uint64)
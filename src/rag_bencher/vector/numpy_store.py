@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import json
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+FloatMatrix = npt.NDArray[np.float32]
+
+# Queries are scored in blocks so a large batch never materialises a (queries x corpus) score matrix at once.
+_QUERY_BLOCK = 256
+
+
+def normalize_rows(vectors: Sequence[Sequence[float]] | npt.NDArray[Any]) -> FloatMatrix:
+    """Return a C-contiguous float32 copy of ``vectors`` with unit L2 rows (zero rows stay zero)."""
+    mat = np.array(vectors, dtype=np.float32, ndmin=2, order="C")
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    np.divide(mat, norms, out=mat, where=norms > 0)
+    return mat
+
+
+def top_k(scores: FloatMatrix, k: int) -> Tuple[npt.NDArray[np.intp], FloatMatrix]:
+    """Return row-wise indices and values of the ``k`` largest scores, best first."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(n), scores.shape).copy()
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact cosine-similarity store backed by one contiguous, normalised float32 matrix.
+
+    A query is a single matrix-vector product plus an ``argpartition`` top-k; ``similarity_search_batch``
+    scores many queries with one matrix-matrix product per block.
+    """
+
+    def __init__(self, embedding: Embeddings) -> None:
+        self._embedding = embedding
+        self._buffer: FloatMatrix = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._docs: List[Document] = []
+        self._rows: Dict[str, int] = {}
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def matrix(self) -> FloatMatrix:
+        """Normalised embeddings, one row per stored chunk."""
+        return self._buffer[: self._size]
+
+    def __len__(self) -> int:
+        """Return the number of stored chunks."""
+        return self._size
+
+    # ---- writes ----
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict[str, Any]]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        text_list = list(texts)
+        vectors = self._embedding.embed_documents(text_list) if text_list else []
+        return self.add_vectors(vectors, text_list, metadatas=metadatas, ids=ids)
+
+    def add_vectors(
+        self,
+        vectors: Sequence[Sequence[float]] | npt.NDArray[Any],
+        texts: Sequence[str],
+        *,
+        metadatas: Optional[Sequence[dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Insert pre-computed embeddings; existing ids are replaced."""
+        if not texts:
+            return []
+        new_ids = [str(i) for i in ids] if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        metas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        if not (len(new_ids) == len(texts) == len(metas) == len(vectors)):
+            raise ValueError("texts, vectors, metadatas and ids must have the same length")
+        replaced = [i for i in new_ids if i in self._rows]
+        if replaced:
+            self.delete(replaced)
+        mat = normalize_rows(vectors)
+        self._reserve(mat.shape[0], mat.shape[1])
+        self._buffer[self._size : self._size + mat.shape[0]] = mat
+        for i, (doc_id, text, meta) in enumerate(zip(new_ids, texts, metas, strict=True)):
+            self._rows[doc_id] = self._size + i
+            self._ids.append(doc_id)
+            self._docs.append(Document(id=doc_id, page_content=text, metadata=dict(meta)))
+        self._size += mat.shape[0]
+        return new_ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            self._buffer = np.empty((0, 0), dtype=np.float32)
+            self._size = 0
+            self._ids, self._docs, self._rows = [], [], {}
+            return True
+        drop = {self._rows[i] for i in ids if i in self._rows}
+        if not drop:
+            return False
+        mask = np.ones(self._size, dtype=bool)
+        mask[list(drop)] = False
+        keep = np.flatnonzero(mask)
+        self._buffer = np.ascontiguousarray(self._buffer[keep])
+        self._size = len(keep)
+        self._ids = [self._ids[r] for r in keep.tolist()]
+        self._docs = [self._docs[r] for r in keep.tolist()]
+        self._rows = {doc_id: r for r, doc_id in enumerate(self._ids)}
+        return True
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        if self._size and self._buffer.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match store dimension {self._buffer.shape[1]}")
+        capacity = self._buffer.shape[0] if self._buffer.shape[1] == dim else 0
+        if self._size + rows <= capacity:
+            return
+        grown = np.empty((max(self._size + rows, 2 * capacity, 16), dim), dtype=np.float32)
+        if self._size:
+            grown[: self._size] = self._buffer[: self._size]
+        self._buffer = grown
+
+    # ---- reads ----
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return [self._copy(self._rows[i]) for i in ids if i in self._rows]
+
+    def get_vectors(self, ids: Sequence[str]) -> FloatMatrix:
+        """Return the stored (normalised) embeddings for ``ids``; raises KeyError for unknown ids."""
+        rows = np.array([self._rows[i] for i in ids], dtype=np.intp)
+        return self.matrix[rows]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k)]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: Sequence[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vectors([embedding], k=k)[0]
+
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4) -> List[List[Document]]:
+        """Embed and search many queries at once; results are aligned with ``queries``."""
+        vectors = [self._embedding.embed_query(q) for q in queries]
+        return [[doc for doc, _ in hits] for hits in self.similarity_search_with_score_by_vectors(vectors, k=k)]
+
+    def similarity_search_with_score_by_vectors(
+        self, embeddings: Sequence[Sequence[float]] | npt.NDArray[Any], k: int = 4
+    ) -> List[List[Tuple[Document, float]]]:
+        if len(embeddings) == 0:
+            return []
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(embeddings))]
+        queries = normalize_rows(embeddings)
+        out: List[List[Tuple[Document, float]]] = []
+        for start in range(0, queries.shape[0], _QUERY_BLOCK):
+            scores = queries[start : start + _QUERY_BLOCK] @ self.matrix.T
+            idx, vals = top_k(scores, k)
+            for row_idx, row_vals in zip(idx, vals, strict=True):
+                out.append([(self._copy(int(r)), float(s)) for r, s in zip(row_idx, row_vals, strict=True)])
+        return out
+
+    def _copy(self, row: int) -> Document:
+        doc = self._docs[row]
+        return Document(id=doc.id, page_content=doc.page_content, metadata=dict(doc.metadata))
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda score: (score + 1.0) / 2.0
+
+    # ---- construction / persistence ----
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict[str, Any]]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def save_local(self, folder_path: str) -> None:
+        folder = Path(folder_path)
+        folder.mkdir(parents=True, exist_ok=True)
+        np.save(folder / "vectors.npy", self.matrix)
+        with open(folder / "docs.jsonl", "w", encoding="utf-8") as fh:
+            for doc in self._docs:
+                fh.write(json.dumps({"id": doc.id, "text": doc.page_content, "metadata": doc.metadata}) + "\n")
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings, **kwargs: Any) -> "NumpyVectorStore":
+        folder = Path(folder_path)
+        store = cls(embeddings)
+        matrix = cls._load_matrix(folder / "vectors.npy")
+        with open(folder / "docs.jsonl", "r", encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh]
+        store._buffer = matrix
+        store._size = len(rows)
+        store._ids = [r["id"] for r in rows]
+        store._docs = [Document(id=r["id"], page_content=r["text"], metadata=r["metadata"]) for r in rows]
+        store._rows = {doc_id: i for i, doc_id in enumerate(store._ids)}
+        return store
+
+    @staticmethod
+    def _load_matrix(path: Path) -> FloatMatrix:
+        return np.ascontiguousarray(np.load(path), dtype=np.float32)
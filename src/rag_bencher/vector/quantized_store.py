@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import weakref
+from abc import abstractmethod
+from pathlib import Path
+from typing import Any, ClassVar, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+import numpy.typing as npt
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .mmap_store import ENV_DIR
+from .numpy_store import FloatMatrix, NumpyVectorStore, normalize_rows, top_k
+
+# Rows of codes scanned per first-pass step, bounding the temporary arrays for very large corpora.
+_ROW_BLOCK = 1 << 18
+# Rows of int8 codes widened to int32 at a time while scoring a query.
+_INT8_BLOCK = 4096
+
+# Set-bit count of every byte value; numpy>=1.26 has no vectorised popcount.
+_POPCOUNT = np.array([bin(n).count("1") for n in range(256)], dtype=np.uint8)
+
+
+class QuantizedVectorStore(NumpyVectorStore):
+    """Cosine store that searches compact codes first and rescores a shortlist with the float vectors.
+
+    Every query scans the codes for the ``k * rescore_factor`` best candidates, then ranks those by
+    exact cosine similarity, so returned scores match :class:`NumpyVectorStore`. ``save_local`` writes
+    the codes next to the float matrix and ``load_local`` memory-maps the floats: only the codes and
+    the shortlisted float rows are read into memory. Stores built with ``from_texts``/``from_documents``
+    spill their floats to a private memory-mapped file the same way (see :meth:`spill`).
+    """
+
+    codec: ClassVar[str]
+
+    def __init__(self, embedding: Embeddings, *, rescore_factor: int = 10) -> None:
+        if rescore_factor < 1:
+            raise ValueError("rescore_factor must be >= 1")
+        super().__init__(embedding)
+        self.rescore_factor = rescore_factor
+        self._codes: npt.NDArray[Any] = np.empty((0, 0), dtype=self._code_dtype())
+        self._scales: FloatMatrix = np.empty(0, dtype=np.float32)
+
+    @property
+    def codes(self) -> npt.NDArray[Any]:
+        """Quantized embeddings, one row per stored chunk."""
+        return self._codes[: self._size]
+
+    # ---- codec ----
+    @classmethod
+    @abstractmethod
+    def _code_dtype(cls) -> type[np.generic]:
+        """Numpy dtype of one code element."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _code_width(self, dim: int) -> int:
+        """Code elements per row for ``dim``-dimensional vectors."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _encode(self, mat: FloatMatrix) -> Tuple[npt.NDArray[Any], FloatMatrix]:
+        """Return codes and per-row scales for normalised rows ``mat``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _code_scores(self, start: int, stop: int, query: FloatMatrix) -> FloatMatrix:
+        """Approximate similarity of ``query`` to rows ``start:stop``; higher is better."""
+        raise NotImplementedError
+
+    # ---- writes ----
+    def add_vectors(
+        self,
+        vectors: Sequence[Sequence[float]] | npt.NDArray[Any],
+        texts: Sequence[str],
+        *,
+        metadatas: Optional[Sequence[dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        new_ids = super().add_vectors(vectors, texts, metadatas=metadatas, ids=ids)
+        if not new_ids:
+            return new_ids
+        start = self._size - len(new_ids)
+        codes, scales = self._encode(self._buffer[start : self._size])
+        self._codes[start : self._size] = codes
+        self._scales[start : self._size] = scales
+        return new_ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        keep = None
+        if ids is not None:
+            mask = np.ones(self._size, dtype=bool)
+            mask[[self._rows[i] for i in ids if i in self._rows]] = False
+            keep = np.flatnonzero(mask)
+        deleted = super().delete(ids)
+        if keep is None:
+            self._codes = np.empty((0, 0), dtype=self._code_dtype())
+            self._scales = np.empty(0, dtype=np.float32)
+        elif deleted:
+            self._codes = np.ascontiguousarray(self._codes[keep])
+            self._scales = np.ascontiguousarray(self._scales[keep])
+        return deleted
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        super()._reserve(rows, dim)
+        capacity = self._buffer.shape[0]
+        if self._codes.shape[0] >= capacity and self._codes.shape[1] == self._code_width(dim):
+            return
+        codes = np.empty((capacity, self._code_width(dim)), dtype=self._code_dtype())
+        scales = np.empty(capacity, dtype=np.float32)
+        if self._size:
+            codes[: self._size] = self._codes[: self._size]
+            scales[: self._size] = self._scales[: self._size]
+        self._codes, self._scales = codes, scales
+
+    # ---- reads ----
+    def similarity_search_with_score_by_vectors(
+        self, embeddings: Sequence[Sequence[float]] | npt.NDArray[Any], k: int = 4
+    ) -> List[List[Tuple[Document, float]]]:
+        if len(embeddings) == 0:
+            return []
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(embeddings))]
+        out: List[List[Tuple[Document, float]]] = []
+        for query in normalize_rows(embeddings):
+            shortlist = self._shortlist(query, k * self.rescore_factor)
+            exact = np.asarray(self._buffer[shortlist] @ query, dtype=np.float32)
+            idx, vals = top_k(exact[None, :], k)
+            out.append([(self._copy(int(shortlist[i])), float(s)) for i, s in zip(idx[0], vals[0], strict=True)])
+        return out
+
+    def _shortlist(self, query: FloatMatrix, n: int) -> npt.NDArray[np.intp]:
+        """Return the (sorted) rows of the ``n`` best first-pass candidates."""
+        if n >= self._size:
+            return np.arange(self._size)
+        rows: List[npt.NDArray[np.intp]] = []
+        scores: List[FloatMatrix] = []
+        for start in range(0, self._size, _ROW_BLOCK):
+            stop = min(start + _ROW_BLOCK, self._size)
+            idx, vals = top_k(self._code_scores(start, stop, query)[None, :], n)
+            rows.append(idx[0] + start)
+            scores.append(vals[0])
+        merged = np.concatenate(rows)
+        if len(rows) > 1:
+            best, _ = top_k(np.concatenate(scores)[None, :], n)
+            merged = merged[best[0]]
+        # Sorted rows keep reads from a memory-mapped float matrix sequential.
+        return np.sort(merged)
+
+    # ---- construction / persistence ----
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict[str, Any]]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "QuantizedVectorStore":
+        store = cast(QuantizedVectorStore, super().from_texts(texts, embedding, metadatas, ids=ids, **kwargs))
+        store.spill()
+        return store
+
+    def spill(self) -> None:
+        """Move the float vectors to a private memory-mapped file so only the codes stay resident.
+
+        The file lives under ``RAG_BENCH_MMAP_DIR`` (default: system temp dir) and is removed with the store.
+        Later writes that outgrow the mapping copy the floats back into memory.
+        """
+        if self._size == 0 or isinstance(self._buffer, np.memmap):
+            return
+        parent = os.getenv(ENV_DIR) or None
+        if parent:
+            Path(parent).mkdir(parents=True, exist_ok=True)
+        folder = Path(tempfile.mkdtemp(prefix="rag-bench-quantized-", dir=parent))
+        weakref.finalize(self, shutil.rmtree, folder, True)
+        np.save(folder / "vectors.npy", self.matrix)
+        self._buffer = self._load_matrix(folder / "vectors.npy")
+
+    def save_local(self, folder_path: str) -> None:
+        super().save_local(folder_path)
+        folder = Path(folder_path)
+        np.save(folder / "codes.npy", self.codes)
+        np.save(folder / "scales.npy", self._scales[: self._size])
+        (folder / "quantized.json").write_text(json.dumps({"codec": self.codec}), encoding="utf-8")
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings, **kwargs: Any) -> "QuantizedVectorStore":
+        folder = Path(folder_path)
+        meta = json.loads((folder / "quantized.json").read_text(encoding="utf-8"))
+        if meta.get("codec") != cls.codec:
+            raise ValueError(f"{folder} holds {meta.get('codec')!r} codes, expected {cls.codec!r}")
+        store = cast(QuantizedVectorStore, super().load_local(folder_path, embeddings, **kwargs))
+        store._codes = np.load(folder / "codes.npy")
+        store._scales = np.load(folder / "scales.npy")
+        return store
+
+    @staticmethod
+    def _load_matrix(path: Path) -> FloatMatrix:
+        # Copy-on-write: later writes stay private to this process and never touch the saved file.
+        return cast(FloatMatrix, np.load(path, mmap_mode="c"))
+
+
+class BinaryVectorStore(QuantizedVectorStore):
+    """Sign-binarised codes (1 bit per dimension, 32x smaller than float32) ranked by Hamming distance."""
+
+    codec = "binary"
+
+    @classmethod
+    def _code_dtype(cls) -> type[np.generic]:
+        return np.uint8
+
+    def _code_width(self, dim: int) -> int:
+        return (dim + 7) // 8
+
+    def _encode(self, mat: FloatMatrix) -> Tuple[npt.NDArray[Any], FloatMatrix]:
+        return np.packbits(mat > 0, axis=1), np.ones(mat.shape[0], dtype=np.float32)
+
+    def _code_scores(self, start: int, stop: int, query: FloatMatrix) -> FloatMatrix:
+        code = np.packbits(query > 0)
+        distance: npt.NDArray[np.int32] = _POPCOUNT[np.bitwise_xor(self._codes[start:stop], code)].sum(
+            axis=1, dtype=np.int32
+        )
+        return -distance.astype(np.float32)
+
+
+class Int8VectorStore(QuantizedVectorStore):
+    """Per-row scaled int8 codes (4x smaller than float32) ranked by approximate dot product."""
+
+    codec = "int8"
+
+    @classmethod
+    def _code_dtype(cls) -> type[np.generic]:
+        return np.int8
+
+    def _code_width(self, dim: int) -> int:
+        return dim
+
+    def _encode(self, mat: FloatMatrix) -> Tuple[npt.NDArray[Any], FloatMatrix]:
+        peak = np.abs(mat).max(axis=1)
+        scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        return np.rint(mat / scale[:, None]).astype(np.int8), scale
+
+    def _code_scores(self, start: int, stop: int, query: FloatMatrix) -> FloatMatrix:
+        # Quantize the query as well and accumulate exact int32 dot products, widening one block of codes at a time.
+        q_codes, q_scale = self._encode(query[None, :])
+        q = q_codes[0].astype(np.int32)
+        out = np.empty(stop - start, dtype=np.float32)
+        for lo in range(start, stop, _INT8_BLOCK):
+            hi = min(lo + _INT8_BLOCK, stop)
+            dots: npt.NDArray[np.int32] = self._codes[lo:hi].astype(np.int32) @ q
+            out[lo - start : hi - start] = dots * self._scales[lo:hi]
+        out *= q_scale[0]
+        return out
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Callable, Mapping, cast
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic pseudo-random embeddings keyed by text; records the size of every document batch.
+
+    ``noise`` adds a text-dependent perturbation so two instances can stand in for drifting backends.
+    """
+
+    def __init__(self, dim: int, noise: float = 0.0) -> None:
+        self.dim = dim
+        self.noise = noise
+        self.batches: list[int] = []
+
+    def _vec(self, text: str) -> list[float]:
+        rng = np.random.default_rng(abs(hash(text)) % (2**32))
+        vec = rng.standard_normal(self.dim)
+        if self.noise:
+            vec = vec + self.noise * np.random.default_rng(len(text)).standard_normal(self.dim)
+        return cast(list[float], vec.tolist())
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(len(texts))
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._vec(text)
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds a text as ``[len(text), 1.0]`` and records every document and query it was asked for."""
+
+    def __init__(self, model_name: str = "counting") -> None:
+        self.model_name = model_name
+        self.documents: list[str] = []
+        self.queries: list[str] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.documents.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries.append(text)
+        return [float(len(text)), 1.0]
+
+
+class TableEmbeddings(Embeddings):
+    """Looks every text up in a fixed table of vectors."""
+
+    def __init__(self, table: Mapping[str, list[float]]) -> None:
+        self.table = table
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.table[t] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.table[text]
+
+
+@pytest.fixture
+def hash_embeddings() -> Callable[..., HashEmbeddings]:
+    """Build offline :class:`HashEmbeddings` of the requested dimension."""
+    return HashEmbeddings
+
+
+@pytest.fixture
+def counting_embeddings() -> type[CountingEmbeddings]:
+    """Build offline :class:`CountingEmbeddings`, optionally under another model name."""
+    return CountingEmbeddings
+
+
+@pytest.fixture
+def table_embeddings() -> type[TableEmbeddings]:
+    """Build offline :class:`TableEmbeddings` over the given vectors."""
+    return TableEmbeddings
@@ -8,6 +8,7 @@ import pytest
 from langchain_core.runnables import RunnableSerializable
 
 from rag_bencher.config import BenchConfig, DataCfg, ModelCfg, RetrieverCfg
+from rag_bencher.pipelines.base import TracedAnswer
 from rag_bencher.pipelines.selector import PipelineSelection
 
 
@@ -19,6 +20,15 @@ class _DummyChain:
         return self.answer
 
 
+class _DummyTraced:
+    def __init__(self, answer: str, debug: dict[str, Any]) -> None:
+        self.answer = answer
+        self.debug = debug
+
+    def invoke(self, *_args: Any, **_kwargs: Any) -> dict[str, Any]:
+        return {"answer": self.answer, "debug": self.debug}
+
+
 def _setup_example(monkeypatch: pytest.MonkeyPatch) -> Tuple[Any, PipelineSelection]:
     repo_root = Path(__file__).resolve().parents[2]
     monkeypatch.syspath_prepend(str(repo_root))
@@ -30,7 +40,9 @@ def _setup_example(monkeypatch: pytest.MonkeyPatch) -> Tuple[Any, PipelineSelect
         pipeline_id="stub-pipeline",
         config=cfg,
         chain=cast(RunnableSerializable[str, str], _DummyChain("reference")),
-        debug=lambda: {"retrieved": [{"preview": "context"}]},
+        traced=cast(
+            RunnableSerializable[str, TracedAnswer], _DummyTraced("reference", {"retrieved": [{"preview": "context"}]})
+        ),
     )
 
     monkeypatch.setattr(ex, "DOCS", ["doc"])
@@ -107,7 +119,7 @@ def _run_main_with_stubbed_modules(
         def __init__(self) -> None:
             self.pipeline_id = "stub"
             self.chain = cast(RunnableSerializable[str, str], _DummyChain("ans"))
-            self.debug = lambda: debug_payload
+            self.traced = _DummyTraced("ans", debug_payload)
 
     selector_mod.select_pipeline = lambda *_args, **_kwargs: _Sel()  # type: ignore[attr-defined]
 
@@ -134,7 +146,9 @@ def test_evaluate_handles_candidate_debug(monkeypatch: pytest.MonkeyPatch) -> No
         pipeline_id="stub-pipeline",
         config=cfg,
         chain=cast(RunnableSerializable[str, str], _DummyChain("reference")),
-        debug=lambda: {"candidates": [{"preview": "cand"}]},
+        traced=cast(
+            RunnableSerializable[str, TracedAnswer], _DummyTraced("reference", {"candidates": [{"preview": "cand"}]})
+        ),
     )
     monkeypatch.setattr(ex, "select_pipeline", lambda *_args, **_kwargs: candidate_selection)
 
@@ -152,7 +166,7 @@ def test_evaluate_handles_missing_debug(monkeypatch: pytest.MonkeyPatch) -> None
         pipeline_id="stub-pipeline",
         config=cfg,
         chain=cast(RunnableSerializable[str, str], _DummyChain("reference")),
-        debug=lambda: {},
+        traced=cast(RunnableSerializable[str, TracedAnswer], _DummyTraced("reference", {})),
     )
     monkeypatch.setattr(ex, "select_pipeline", lambda *_args, **_kwargs: missing_debug_selection)
 
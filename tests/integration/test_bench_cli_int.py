@@ -3,7 +3,7 @@ from pathlib import Path
 from typing import Any, cast
 
 import pytest
-from langchain_core.runnables import RunnableSerializable
+from langchain_core.runnables import RunnableLambda, RunnableSerializable
 
 from rag_bencher import bench_cli
 from rag_bencher.config import BenchConfig, DataCfg, ModelCfg, RetrieverCfg
@@ -36,14 +36,14 @@ def test_bench_cli_writes_report(
     qa_path = tmp_path / "qa.jsonl"
     qa_path.write_text('{"question": "Q?", "reference_answer": "A"}\n', encoding="utf-8")
 
-    def _debug() -> dict[str, list[dict[str, str]]]:
-        return {"retrieved": [{"preview": "context"}]}
+    def _answer(_question: str) -> dict[str, Any]:
+        return {"answer": "A", "debug": {"retrieved": [{"preview": "context"}]}}
 
     selection = PipelineSelection(
         pipeline_id="naive",
         config=cfg,
         chain=cast(RunnableSerializable[str, str], _DummyChain("A")),
-        debug=_debug,
+        traced=cast(RunnableSerializable[str, dict[str, Any]], RunnableLambda(_answer)),
     )
 
     monkeypatch.chdir(tmp_path)
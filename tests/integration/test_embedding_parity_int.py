@@ -0,0 +1,14 @@
+import pytest
+
+from rag_bencher.eval.embedding_parity import check_backend_parity
+from rag_bencher.utils import factories
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_backend_matches_torch_embeddings(backend: str) -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum")
+    factories.clear_embeddings_registry()
+    report = check_backend_parity(backend)
+    assert report["neighbour_agreement"] >= 0.9
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+pytest.importorskip("faiss")
+
+from rag_bencher import bench_ann_cli  # noqa: E402
+from rag_bencher.config import FaissIndexCfg  # noqa: E402
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+def test_recall_at_k_ignores_missing_ids() -> None:
+    truth = np.array([[0, 1], [2, 3]])
+    found = np.array([[1, -1], [3, 2]])
+    assert bench_ann_cli.recall_at_k(found, truth) == pytest.approx(0.75)
+
+
+def test_run_sweep_reports_exact_recall_for_flat() -> None:
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((200, 8)).astype(np.float32)
+    queries = rng.standard_normal((5, 8)).astype(np.float32)
+    settings = [FaissIndexCfg(index="flat"), FaissIndexCfg(index="ivf", nlist=16, nprobe=1)]
+    results = bench_ann_cli.run_sweep(vectors, queries, settings, k=4)
+    assert [r["setting"] for r in results] == ["flat", "ivf nlist=16 nprobe=1"]
+    assert results[0]["recall@4"] == pytest.approx(1.0)
+    assert 0.0 <= results[1]["recall@4"] <= 1.0
+    assert all(r["p99_ms"] >= r["p50_ms"] >= 0.0 for r in results)
+
+
+def test_exact_neighbours_merges_row_blocks(monkeypatch: pytest.MonkeyPatch) -> None:
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((100, 8)).astype(np.float32)
+    queries = rng.standard_normal((6, 8)).astype(np.float32)
+    dists = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    monkeypatch.setattr(bench_ann_cli, "_ROW_BLOCK", 7)
+    assert np.array_equal(bench_ann_cli.exact_neighbours(vectors, queries, 5), np.argsort(dists, axis=1)[:, :5])
+
+
+def test_default_sweep_skips_pq_for_small_corpora() -> None:
+    assert {c.index for c in bench_ann_cli.default_sweep(100, 384)} == {"flat", "ivf", "hnsw"}
+    assert "ivf_pq" in {c.index for c in bench_ann_cli.default_sweep(1000, 384)}
+
+
+def test_main_writes_sweep_report(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    qa_path = tmp_path / "qa.jsonl"
+    qa_path.write_text('{"question": "chunk 3"}\n{"question": "chunk 9"}\n', encoding="utf-8")
+    sweep_path = tmp_path / "sweep.yaml"
+    sweep_path.write_text("- index: flat\n- index: hnsw\n  ef_search: 16\n", encoding="utf-8")
+
+    cfg = SimpleNamespace(retriever=SimpleNamespace(k=3), data=SimpleNamespace(paths=["doc.txt"]), provider=None)
+    monkeypatch.setattr(bench_ann_cli, "load_config", lambda _: cfg)
+    monkeypatch.setattr(
+        bench_ann_cli, "load_texts_as_documents", lambda _: [Document(page_content=f"chunk {n}") for n in range(20)]
+    )
+    monkeypatch.setattr(bench_ann_cli, "_embeddings_for", lambda _: hash_embeddings(8))
+    saved: list[Any] = []
+    monkeypatch.setattr(bench_ann_cli, "save_json", lambda obj, path: saved.append((obj, path)))
+    monkeypatch.setattr(
+        sys, "argv", ["bench_ann", "--config", "cfg.yaml", "--qa", str(qa_path), "--sweep", str(sweep_path)]
+    )
+
+    bench_ann_cli.main()
+
+    report, out = saved[0]
+    assert out.parent == Path("reports")
+    assert report["chunks"] == 20 and report["queries"] == 2
+    assert [r["setting"] for r in report["results"]] == ["flat", "hnsw M=32 efSearch=16"]
+    assert json.loads(json.dumps(report))["results"][0]["recall@3"] == pytest.approx(1.0)
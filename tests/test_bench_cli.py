@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import json
 import sys
+import threading
+import time
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 import pytest
 
@@ -13,15 +15,14 @@ from rag_bencher import bench_cli
 pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
 
-class DummyChain:
-    def __init__(self) -> None:
+class DummyTraced:
+    def __init__(self, debug: Callable[[str], Dict[str, Any]]) -> None:
         self.calls: List[str] = []
-        self.last_question: str = ""
+        self._debug = debug
 
-    def invoke(self, question: str) -> str:
-        self.last_question = question
+    def invoke(self, question: str) -> Dict[str, Any]:
         self.calls.append(question)
-        return f"answer:{question}"
+        return {"answer": f"answer:{question}", "debug": self._debug(question)}
 
 
 def _dummy_config() -> Any:
@@ -55,23 +56,21 @@ def test_bench_cli_main_produces_report(monkeypatch: pytest.MonkeyPatch, tmp_pat
 
     monkeypatch.setattr(bench_cli, "load_texts_as_documents", fake_load_texts)
 
-    chain = DummyChain()
-
-    def debug() -> Dict[str, Any]:
-        if chain.last_question == "Q1":
+    def debug(question: str) -> Dict[str, Any]:
+        if question == "Q1":
             return {
                 "pipeline": "naive",
-                "retrieved": [{"preview": f"ctx:{chain.last_question}", "source": "doc"}],
+                "retrieved": [{"preview": f"ctx:{question}", "source": "doc"}],
             }
         return {
             "pipeline": "naive",
-            "candidates": [{"preview": f"cand:{chain.last_question}", "source": "doc"}],
+            "candidates": [{"preview": f"cand:{question}", "source": "doc"}],
         }
 
+    chain = DummyTraced(debug)
     selection = SimpleNamespace(
         pipeline_id="naive",
-        chain=chain,
-        debug=debug,
+        traced=chain,
         config=cfg,
     )
     monkeypatch.setattr(bench_cli, "select_pipeline", lambda *_args, **_kwargs: selection)
@@ -90,18 +89,18 @@ def test_bench_cli_main_produces_report(monkeypatch: pytest.MonkeyPatch, tmp_pat
     assert chain.calls == ["Q1", "Q2"]
     assert docs_called == [cfg.data.paths]
     assert reports, "report should be recorded"
-    assert reports[0]["extras"] == {"pipeline": "naive"}
+    assert reports[0]["extras"]["pipeline"] == "naive"
+    assert reports[0]["extras"]["cache"]["misses"] == 0
 
 
 def test_bench_cli_uses_candidates_when_no_retrieved(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
     qa_path = tmp_path / "qa.jsonl"
     qa_path.write_text('{"question":"Q1","reference_answer":"Ref"}\n', encoding="utf-8")
     cfg = _dummy_config()
-    chain = DummyChain()
+    chain = DummyTraced(lambda _: {"pipeline": "naive", "candidates": [{"preview": "cand:Q1", "source": "doc"}]})
     selection = SimpleNamespace(
         pipeline_id="naive",
-        chain=chain,
-        debug=lambda: {"pipeline": "naive", "candidates": [{"preview": "cand:Q1", "source": "doc"}]},
+        traced=chain,
         config=cfg,
     )
     monkeypatch.setattr(bench_cli, "load_config", lambda path: cfg)
@@ -119,11 +118,10 @@ def test_bench_cli_no_debug_context(monkeypatch: pytest.MonkeyPatch, tmp_path: P
     qa_path = tmp_path / "qa.jsonl"
     qa_path.write_text('{"question":"Q1","reference_answer":"Ref"}\n', encoding="utf-8")
     cfg = _dummy_config()
-    chain = DummyChain()
+    chain = DummyTraced(lambda _: {"pipeline": "naive"})
     selection = SimpleNamespace(
         pipeline_id="naive",
-        chain=chain,
-        debug=lambda: {"pipeline": "naive"},
+        traced=chain,
         config=cfg,
     )
     reports: list[Any] = []
@@ -142,3 +140,98 @@ def test_bench_cli_no_debug_context(monkeypatch: pytest.MonkeyPatch, tmp_path: P
 
     assert chain.calls == ["Q1"]
     assert reports, "report should be generated even without context"
+
+
+@pytest.mark.parametrize(("flags", "expected"), [([], False), (["--answer-cache"], True)])
+def test_bench_cli_answer_cache_flag(
+    flags: List[str], expected: bool, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    qa_path = tmp_path / "qa.jsonl"
+    qa_path.write_text('{"question":"Q1","reference_answer":"Ref"}\n', encoding="utf-8")
+    cfg = _dummy_config()
+    selection = SimpleNamespace(pipeline_id="naive", traced=DummyTraced(lambda _: {}), config=cfg)
+    seen: List[bool] = []
+
+    def fake_select(*_args: Any, answer_cache: bool = False, **_kwargs: Any) -> SimpleNamespace:
+        seen.append(answer_cache)
+        return selection
+
+    monkeypatch.setattr(bench_cli, "load_config", lambda path: cfg)
+    monkeypatch.setattr(bench_cli, "load_texts_as_documents", lambda _: ["doc"])
+    monkeypatch.setattr(bench_cli, "select_pipeline", fake_select)
+    answers: List[str] = []
+
+    def fake_report(**kwargs: Any) -> str:
+        answers.append(kwargs["answer"])
+        return "reports/report.html"
+
+    monkeypatch.setattr(bench_cli, "write_simple_report", fake_report)
+    monkeypatch.setattr(sys, "argv", ["bench_cli", "--config", "cfg.yaml", "--qa", str(qa_path), *flags])
+
+    bench_cli.main()
+
+    assert seen == [expected]
+    assert ("cache-assisted" in answers[0]) is expected
+
+
+def test_bench_cli_concurrency_keeps_order_and_per_question_debug(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    qa_path = tmp_path / "qa.jsonl"
+    questions = [f"Q{i}" for i in range(12)]
+    qa_path.write_text(
+        "\n".join(json.dumps({"question": q, "reference_answer": f"ctx {q}"}) for q in questions), encoding="utf-8"
+    )
+    cfg = _dummy_config()
+    active: List[int] = [0]
+    peak: List[int] = [0]
+    lock = threading.Lock()
+
+    class SlowTraced:
+        def invoke(self, question: str) -> Dict[str, Any]:
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            # Later questions finish first, so any ordering bug shows up in the printed rows.
+            time.sleep(0.002 * (len(questions) - int(question[1:])))
+            with lock:
+                active[0] -= 1
+            return {
+                "answer": f"answer {question}",
+                "debug": {"pipeline": "hyde", "retrieved": [{"preview": f"ctx {question}", "source": "doc"}]},
+            }
+
+    selection = SimpleNamespace(
+        pipeline_id="hyde",
+        traced=SlowTraced(),
+        config=cfg,
+    )
+    printed: List[str] = []
+    reports: List[Any] = []
+
+    def fake_report(**kw: Any) -> str:
+        reports.append(kw)
+        return "reports/r.html"
+
+    monkeypatch.setattr(bench_cli, "load_config", lambda path: cfg)
+    monkeypatch.setattr(bench_cli, "load_texts_as_documents", lambda _: ["doc"])
+    monkeypatch.setattr(bench_cli, "select_pipeline", lambda *_args, **_kwargs: selection)
+    monkeypatch.setattr(bench_cli, "write_simple_report", fake_report)
+    monkeypatch.setattr(bench_cli.console, "print", lambda *a, **_: printed.append(str(a[0])))
+    monkeypatch.setattr(sys, "argv", ["bench_cli", "--config", "cfg.yaml", "--qa", str(qa_path), "--concurrency", "4"])
+
+    bench_cli.main()
+
+    rows = [line for line in printed if "F1=" in line]
+    assert [line.split("[/bold cyan]")[0].split("]")[-1] for line in rows] == questions
+    assert all("Ctx=1.000" in line for line in rows)
+    assert 1 < peak[0] <= 4
+    summary = json.loads(reports[0]["answer"])
+    assert summary["num_examples"] == len(questions)
+    assert summary["avg_metrics"]["context_recall"] == pytest.approx(1.0)
+
+
+def test_bench_cli_rejects_non_positive_concurrency(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(sys, "argv", ["bench_cli", "--config", "c.yaml", "--qa", "qa.jsonl", "--concurrency", "0"])
+    with pytest.raises(SystemExit):
+        bench_cli.main()
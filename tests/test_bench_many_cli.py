@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
+from concurrent.futures import Future
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 import pytest
 
@@ -13,19 +15,18 @@ from rag_bencher import bench_many_cli
 pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
 
-class DummyChain:
-    def __init__(self, tag: str) -> None:
+class DummyTraced:
+    def __init__(self, tag: str, debug: Callable[[], Dict[str, Any]]) -> None:
         self.tag = tag
         self.calls: List[str] = []
+        self._debug = debug
 
-    def invoke(self, question: str) -> str:
+    def invoke(self, question: str) -> Dict[str, Any]:
         self.calls.append(question)
-        return f"{self.tag}:{question}"
+        return {"answer": f"{self.tag}:{question}", "debug": self._debug()}
 
 
 def _selection(tag: str, cfg: Any, *, retrieved: bool) -> Any:
-    chain = DummyChain(tag)
-
     def debug() -> Dict[str, Any]:
         payload: Dict[str, Any] = {"pipeline": tag}
         if retrieved:
@@ -34,7 +35,7 @@ def _selection(tag: str, cfg: Any, *, retrieved: bool) -> Any:
             payload["candidates"] = [{"source": "doc", "preview": f"{tag}-cand", "score": 0.5}]
         return payload
 
-    return SimpleNamespace(pipeline_id=f"pipe-{tag}", chain=chain, debug=debug, config=cfg)
+    return SimpleNamespace(pipeline_id=f"pipe-{tag}", traced=DummyTraced(tag, debug), config=cfg)
 
 
 def test_bench_many_cli_builds_summary(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
@@ -63,7 +64,7 @@ def test_bench_many_cli_builds_summary(monkeypatch: pytest.MonkeyPatch, tmp_path
         str(configs[0]): _selection("first", cfg, retrieved=True),
         str(configs[1]): _selection("second", cfg, retrieved=False),
     }
-    monkeypatch.setattr(bench_many_cli, "select_pipeline", lambda path, docs: selections[path])
+    monkeypatch.setattr(bench_many_cli, "select_pipeline", lambda path, docs, *_a, **_k: selections[path])
 
     monkeypatch.setattr(
         sys,
@@ -79,6 +80,7 @@ def test_bench_many_cli_builds_summary(monkeypatch: pytest.MonkeyPatch, tmp_path
     html = outputs[0].read_text(encoding="utf-8")
     assert "cfg-a.yaml" in html and "cfg-b.yaml" in html
     assert "pipe-first" in html and "pipe-second" in html
+    assert "<h2>Cache</h2>" in html and "memory_hits" in html
 
 
 def test_bench_many_cli_handles_candidate_debug(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
@@ -95,12 +97,11 @@ def test_bench_many_cli_handles_candidate_debug(monkeypatch: pytest.MonkeyPatch,
     config_path = tmp_path / "cfg.yaml"
     config_path.write_text("{}", encoding="utf-8")
 
-    chain = DummyChain("cand")
-
     def debug() -> Dict[str, Any]:
         return {"pipeline": "cand", "candidates": [{"preview": "cand-preview", "source": "doc"}]}
 
-    selection = SimpleNamespace(pipeline_id="pipe-cand", chain=chain, debug=debug, config=cfg)
+    chain = DummyTraced("cand", debug)
+    selection = SimpleNamespace(pipeline_id="pipe-cand", traced=chain, config=cfg)
 
     monkeypatch.setattr(bench_many_cli, "load_config", lambda path: cfg)
     monkeypatch.setattr(bench_many_cli, "load_texts_as_documents", lambda _: ["doc"])
@@ -128,8 +129,8 @@ def test_bench_many_cli_handles_empty_debug(monkeypatch: pytest.MonkeyPatch, tmp
     )
     config_path = tmp_path / "cfg.yaml"
     config_path.write_text("{}", encoding="utf-8")
-    chain = DummyChain("none")
-    selection = SimpleNamespace(pipeline_id="pipe-none", chain=chain, debug=lambda: {"pipeline": "none"}, config=cfg)
+    chain = DummyTraced("none", lambda: {"pipeline": "none"})
+    selection = SimpleNamespace(pipeline_id="pipe-none", traced=chain, config=cfg)
     monkeypatch.setattr(bench_many_cli, "load_config", lambda path: cfg)
     monkeypatch.setattr(bench_many_cli, "load_texts_as_documents", lambda _: ["doc"])
     monkeypatch.setattr(bench_many_cli, "select_pipeline", lambda *_args, **_kwargs: selection)
@@ -138,3 +139,176 @@ def test_bench_many_cli_handles_empty_debug(monkeypatch: pytest.MonkeyPatch, tmp
     bench_many_cli.main()
 
     assert chain.calls == ["Q"]
+
+
+@pytest.mark.parametrize(("flags", "expected"), [([], False), (["--answer-cache"], True)])
+def test_bench_many_cli_answer_cache_flag(
+    flags: List[str], expected: bool, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    qa_path = tmp_path / "qa.jsonl"
+    qa_path.write_text('{"question":"Q","reference_answer":"R"}\n', encoding="utf-8")
+    cfg = SimpleNamespace(data=SimpleNamespace(paths=["doc.txt"]))
+    config_path = tmp_path / "cfg.yaml"
+    config_path.write_text("{}", encoding="utf-8")
+    selection = SimpleNamespace(pipeline_id="naive", traced=DummyTraced("a", lambda: {}), config=cfg)
+    seen: List[bool] = []
+
+    def fake_select(*_args: Any, answer_cache: bool = False, **_kwargs: Any) -> SimpleNamespace:
+        seen.append(answer_cache)
+        return selection
+
+    monkeypatch.setattr(bench_many_cli, "load_config", lambda path: cfg)
+    monkeypatch.setattr(bench_many_cli, "load_texts_as_documents", lambda _: ["doc"])
+    monkeypatch.setattr(bench_many_cli, "select_pipeline", fake_select)
+    monkeypatch.setattr(sys, "argv", ["bench_many_cli", "--configs", str(config_path), "--qa", str(qa_path), *flags])
+
+    bench_many_cli.main()
+
+    assert seen == [expected]
+    (summary,) = (tmp_path / "reports").glob("summary-*.html")
+    assert ("cache-assisted" in summary.read_text(encoding="utf-8")) is expected
+
+
+class _InlinePool:
+    """ProcessPoolExecutor stand-in that runs tasks in-process, finishing them in reverse order."""
+
+    instances: List["_InlinePool"] = []
+
+    def __init__(self, max_workers: int, mp_context: Any, initializer: Any, initargs: tuple[Any, ...]) -> None:
+        self.max_workers = max_workers
+        self.start_method = mp_context.get_start_method()
+        self.env = {key: os.environ.get(key) for key in ("OMP_NUM_THREADS", "TOKENIZERS_PARALLELISM")}
+        self.initargs = initargs
+        self.submitted: List[List[str]] = []
+        _InlinePool.instances.append(self)
+
+    def __enter__(self) -> "_InlinePool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def submit(self, fn: Any, *args: Any) -> Future[Any]:
+        self.submitted.append(args[0])
+        fut: Future[Any] = Future()
+        fut.set_result(fn(*args))
+        return fut
+
+
+def test_bench_many_cli_workers_merge_results_in_config_order(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    qa_path = tmp_path / "qa.jsonl"
+    qa_path.write_text('{"question":"Q","reference_answer":"R"}\n', encoding="utf-8")
+    cfg = SimpleNamespace(data=SimpleNamespace(paths=["doc.txt"]))
+    configs = [tmp_path / f"cfg-{i}.yaml" for i in range(3)]
+    for path in configs:
+        path.write_text("{}", encoding="utf-8")
+    selections = {str(p): _selection(p.stem, cfg, retrieved=True) for p in configs}
+    _InlinePool.instances.clear()
+    monkeypatch.setattr(bench_many_cli, "load_config", lambda path: cfg)
+    monkeypatch.setattr(bench_many_cli, "load_texts_as_documents", lambda paths: ["doc"])
+    monkeypatch.setattr(bench_many_cli, "select_pipeline", lambda path, docs, *_a, **_k: selections[path])
+    monkeypatch.setattr(bench_many_cli, "ProcessPoolExecutor", _InlinePool)
+    monkeypatch.setattr(bench_many_cli, "shared_index_key", lambda cfg: "one-index")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "bench_many_cli",
+            "--configs",
+            str(tmp_path / "cfg-*.yaml"),
+            "--qa",
+            str(qa_path),
+            "--workers",
+            "8",
+            "--threads-per-worker",
+            "2",
+        ],
+    )
+
+    bench_many_cli.main()
+
+    (pool,) = _InlinePool.instances
+    assert pool.max_workers == 3
+    assert sorted(pool.submitted) == [[str(p)] for p in configs]
+    assert pool.start_method == "spawn"
+    assert pool.initargs == (2,)
+    assert pool.env == {"OMP_NUM_THREADS": "2", "TOKENIZERS_PARALLELISM": "false"}
+    assert "OMP_NUM_THREADS" not in os.environ
+    html = next(Path("reports").glob("summary-*.html")).read_text(encoding="utf-8")
+    positions = [html.index(f"cfg-{i}.yaml") for i in range(3)]
+    assert positions == sorted(positions)
+
+
+def test_bench_many_cli_rejects_zero_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(sys, "argv", ["bench_many_cli", "--configs", "*.yaml", "--qa", "qa.jsonl", "--workers", "0"])
+    with pytest.raises(SystemExit):
+        bench_many_cli.main()
+
+
+def test_bench_many_cli_rejects_a_glob_without_configs(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        sys, "argv", ["bench_many_cli", "--configs", "none/*.yaml", "--qa", "qa.jsonl", "--workers", "2"]
+    )
+    with pytest.raises(SystemExit):
+        bench_many_cli.main()
+    assert "matched no config files" in capsys.readouterr().err
+    assert bench_many_cli._plan_groups([], 4) == []
+
+
+def test_bench_many_cli_loads_docs_per_data_paths_and_shares_indexes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    qa_path = tmp_path / "qa.jsonl"
+    qa_path.write_text('{"question":"Q","reference_answer":"R"}\n', encoding="utf-8")
+    paths_by_cfg = {"cfg-a.yaml": ["a.txt"], "cfg-b.yaml": ["b.txt"], "cfg-c.yaml": ["a.txt"]}
+    for name in paths_by_cfg:
+        (tmp_path / name).write_text("{}", encoding="utf-8")
+    loads: List[List[str]] = []
+    seen: List[tuple[str, Any, Any]] = []
+
+    def fake_load_texts(paths: List[str]) -> List[str]:
+        loads.append(paths)
+        return [f"doc:{p}" for p in paths]
+
+    def fake_select(path: str, docs: List[str], cfg: Any, indexes: Any = None, answer_cache: bool = False) -> Any:
+        assert not answer_cache
+        seen.append((Path(path).name, docs, indexes))
+        return _selection(Path(path).stem, cfg, retrieved=True)
+
+    monkeypatch.setattr(
+        bench_many_cli,
+        "load_config",
+        lambda path: SimpleNamespace(data=SimpleNamespace(paths=paths_by_cfg[Path(path).name])),
+    )
+    monkeypatch.setattr(bench_many_cli, "load_texts_as_documents", fake_load_texts)
+    monkeypatch.setattr(bench_many_cli, "select_pipeline", fake_select)
+    monkeypatch.setattr(
+        sys, "argv", ["bench_many_cli", "--configs", str(tmp_path / "cfg-*.yaml"), "--qa", str(qa_path)]
+    )
+
+    bench_many_cli.main()
+
+    assert loads == [["a.txt"], ["b.txt"]]
+    assert [(name, docs) for name, docs, _ in seen] == [
+        ("cfg-a.yaml", ["doc:a.txt"]),
+        ("cfg-b.yaml", ["doc:b.txt"]),
+        ("cfg-c.yaml", ["doc:a.txt"]),
+    ]
+    assert len({id(indexes) for _, _, indexes in seen}) == 1
+
+
+def test_plan_groups_keeps_shared_index_configs_together(monkeypatch: pytest.MonkeyPatch) -> None:
+    keys = {"a1": "a", "a2": "a", "a3": "a", "a4": "a", "b1": "b"}
+    monkeypatch.setattr(bench_many_cli, "load_config", lambda path: path)
+    monkeypatch.setattr(bench_many_cli, "shared_index_key", lambda cfg: keys[cfg])
+
+    assert bench_many_cli._plan_groups(list(keys), 2) == [["a1", "a2", "a3", "a4"], ["b1"]]
+    assert sorted(bench_many_cli._plan_groups(list(keys), 3)) == [["a1", "a2"], ["a3", "a4"], ["b1"]]
+    assert len(bench_many_cli._plan_groups(list(keys), 16)) == 5
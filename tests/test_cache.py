@@ -1,18 +1,53 @@
 from __future__ import annotations
 
 import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import closing
 from pathlib import Path
+from typing import Any, Iterator
 
 import pytest
 
 from rag_bencher.utils import cache
 
 
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    monkeypatch.setattr(cache, "D", directory, raising=False)
+    yield directory
+    cache.close_cache_stores()
+
+
+def _slow_answer(log: Path) -> str:
+    with log.open("a", encoding="utf-8") as fh:
+        fh.write(f"{os.getpid()}:{threading.get_ident()}\n")
+    time.sleep(0.3)
+    return "computed once"
+
+
+def _compute_shared(directory: str, log: str, start: Any) -> None:
+    cache.D = Path(directory)  # type: ignore[misc]
+    start.wait()
+    assert cache.cache_get_or_compute("model", "shared", lambda: _slow_answer(Path(log))) == "computed once"
+
+
+def _write_entries(directory: str, start: int, count: int) -> None:
+    cache.D = Path(directory)  # type: ignore[misc]
+    for i in range(start, start + count):
+        cache.cache_set("model", f"prompt-{i}", {"i": i})
+
+
 @pytest.mark.offline
-def test_cache_roundtrip(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    cache_dir = tmp_path / "cache"
-    cache_dir.mkdir()
-    monkeypatch.setattr(cache, "D", cache_dir, raising=False)
+def test_cache_roundtrip(cache_dir: Path) -> None:
     key = cache.K("model-x", "params-y")
     assert len(key) == 64
 
@@ -20,17 +55,266 @@ def test_cache_roundtrip(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Non
     cache.cache_set("model-x", "params-y", payload)
     loaded = cache.cache_get("model-x", "params-y")
     assert loaded == payload
-    files = list(cache_dir.glob("*.json"))
-    assert len(files) == 1
-    assert json.loads(files[0].read_text(encoding="utf-8")) == payload
+    assert cache.cache_get("model-x", "other") is None
+    assert not list(cache_dir.glob("*.json"))
+    with closing(sqlite3.connect(cache_dir / cache.DB_NAME)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        (value,) = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+    assert json.loads(value) == payload
 
 
 @pytest.mark.offline
-def test_cache_get_handles_corrupt_json(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    cache_dir = tmp_path / "cache"
-    cache_dir.mkdir()
-    monkeypatch.setattr(cache, "D", cache_dir, raising=False)
-    key = cache.K("model-y", "bad-params")
-    f = cache_dir / f"{key}.json"
-    f.write_text("{not json", encoding="utf-8")
+def test_cache_get_handles_corrupt_entry(cache_dir: Path) -> None:
+    cache.cache_store().set(cache.K("model-y", "bad-params"), "{not json")
     assert cache.cache_get("model-y", "bad-params") is None
+
+
+@pytest.mark.offline
+def test_cache_migrates_json_entries_once(cache_dir: Path) -> None:
+    key = cache.K("model-z", "old")
+    (cache_dir / f"{key}.json").write_text(json.dumps("legacy answer"), encoding="utf-8")
+    (cache_dir / f"{cache.K('model-z', 'torn')}.json").write_text("{torn", encoding="utf-8")
+
+    assert cache.cache_get("model-z", "old") == "legacy answer"
+    assert not (cache_dir / f"{key}.json").exists()
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    later = cache.K("model-z", "later")
+    (cache_dir / f"{later}.json").write_text(json.dumps("late"), encoding="utf-8")
+    assert cache.cache_get("model-z", "later") is None
+    assert cache.migrate_json_entries(cache_dir) == 1
+    assert cache.cache_get("model-z", "later") == "late"
+
+
+@pytest.mark.offline
+def test_memory_tier_serves_repeat_reads_and_writes_through(cache_dir: Path) -> None:
+    cache.cache_set("model", "hot", "answer")
+    tier = cache.answer_cache()
+    tier.disk.close()
+    tier.disk.lookup = lambda key: pytest.fail("memory hit went to disk")  # type: ignore[method-assign]
+
+    assert cache.cache_get("model", "hot") == "answer"
+    assert cache.cache_get("model", "hot") == "answer"
+    assert cache.cache_stats()["memory_hits"] == 2
+
+    cache.close_cache_stores()
+    assert cache.cache_get("model", "hot") == "answer"
+    assert cache.cache_get("model", "cold") is None
+    stats = cache.cache_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (0, 1, 1)
+    assert stats["memory_entries"] == 1
+
+
+@pytest.mark.offline
+def test_memory_tier_evicts_by_entries_and_bytes(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    lru = cache.MemoryLRU(max_entries=2, max_bytes=100)
+    lru.put("a", "1")
+    lru.put("b", "2")
+    assert lru.get("a") == "1"
+    lru.put("c", "3")
+    assert lru.get("b") is None and len(lru) == 2 and lru.evictions == 1
+    lru.put("d", "x" * 98)
+    assert [lru.get(k) for k in "acd"] == [None, None, "x" * 98]
+    assert lru.bytes == 99 and lru.evictions == 3
+    lru.put("e", "x" * 200)
+    assert lru.get("e") is None and len(lru) == 1
+
+    monkeypatch.setenv(cache.MEMORY_ENTRIES_ENV_KEY, "0")
+    cache.cache_set("model", "p", 1)
+    assert cache.cache_get("model", "p") == 1
+    assert cache.cache_stats()["disk_hits"] == 1
+
+
+@pytest.mark.offline
+def test_cache_batch_commits_once_and_reads_its_own_writes(cache_dir: Path) -> None:
+    store = cache.cache_store()
+    with cache.cache_batch():
+        for i in range(5):
+            cache.cache_set("m", f"p{i}", i)
+        assert cache.cache_get("m", "p3") == 3
+        with closing(sqlite3.connect(cache_dir / cache.DB_NAME)) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
+    assert [cache.cache_get("m", f"p{i}") for i in range(5)] == list(range(5))
+    assert store.get(cache.K("m", "p4")) == "4"
+
+
+@pytest.mark.offline
+def test_cache_is_safe_across_threads_and_processes(cache_dir: Path) -> None:
+    threads = [threading.Thread(target=_write_entries, args=(str(cache_dir), i * 50, 50)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_write_entries, args=(str(cache_dir), 200 + i * 50, 50)) for i in range(2)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    assert all(cache.cache_get("model", f"prompt-{i}") == {"i": i} for i in range(300))
+
+
+@pytest.mark.offline
+def test_cache_get_or_compute_runs_once_across_threads_and_processes(cache_dir: Path, tmp_path: Path) -> None:
+    log = tmp_path / "calls.log"
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    procs = [ctx.Process(target=_compute_shared, args=(str(cache_dir), str(log), start)) for _ in range(2)]
+    for p in procs:
+        p.start()
+    results: list[str] = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.cache_get_or_compute("model", "shared", lambda: _slow_answer(log)))
+        )
+        for _ in range(3)
+    ]
+    start.set()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    assert results == ["computed once"] * 3
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 1
+
+
+@pytest.mark.offline
+def test_cache_get_or_compute_recovers_from_failed_or_stale_owner(cache_dir: Path) -> None:
+    def fail() -> str:
+        raise RuntimeError("llm down")
+
+    with pytest.raises(RuntimeError):
+        cache.cache_get_or_compute("model", "flaky", fail)
+    assert cache.cache_get_or_compute("model", "flaky", lambda: "retried") == "retried"
+
+    store = cache.cache_store()
+    key = cache.K("model", "stale")
+    claimed: list[bool] = []
+    worker = threading.Thread(target=lambda: claimed.append(store.claim(key, lease_s=-1.0)))
+    worker.start()
+    worker.join()
+    assert claimed == [True]
+    assert cache.cache_get_or_compute("model", "stale", lambda: "taken over") == "taken over"
+
+
+@pytest.mark.offline
+def test_abandoned_lease_of_a_dead_process_is_taken_over_at_once(cache_dir: Path) -> None:
+    crashed = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    store = cache.cache_store()
+    store._conn().execute(
+        "INSERT INTO inflight (key, owner, expires) VALUES (?, ?, ?)",
+        (cache.K("model", "orphan"), f"{socket.gethostname()}:{crashed.stdout.strip()}:1", time.time() + 3600),
+    )
+    started = time.monotonic()
+    assert cache.cache_get_or_compute("model", "orphan", lambda: "taken over") == "taken over"
+    assert time.monotonic() - started < 1.0
+
+
+@pytest.mark.offline
+def test_leases_are_renewed_while_the_owner_computes(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    monkeypatch.setattr(cache, "_LEASE_S", 0.3)
+    store = cache.cache_store()
+    key = cache.K("model", "slow")
+    started = threading.Event()
+
+    def slow() -> str:
+        started.set()
+        time.sleep(1.0)
+        return "done"
+
+    owner = threading.Thread(target=lambda: cache.cache_get_or_compute("model", "slow", slow))
+    owner.start()
+    started.wait()
+    time.sleep(0.6)
+    assert not store.claim(key)
+    owner.join()
+    assert store.claim(key)
+    store.release(key)
+
+
+@pytest.mark.offline
+def test_entries_expire_after_their_ttl(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    cache.cache_set("m", "gone", "old", ttl_s=-1.0)
+    cache.cache_set("m", "kept", "new", ttl_s=3600.0)
+    assert cache.cache_get("m", "gone") is None
+    cache.close_cache_stores()
+    assert cache.cache_get("m", "gone") is None
+    assert cache.cache_get("m", "kept") == "new"
+
+    monkeypatch.setenv(cache.TTL_ENV_KEY, "1h")
+    cache.cache_set("m", "env", 1)
+    entry = cache.cache_store().lookup(cache.K("m", "env"))
+    assert entry is not None and entry[1] == pytest.approx(time.time() + 3600, abs=5)
+
+    store = cache.cache_store()
+    assert store.usage()["expired"] == 1
+    assert store.purge_expired() == 1
+    assert [e["key"] for e in store.export()] == [cache.K("m", "kept"), cache.K("m", "env")]
+
+
+@pytest.mark.parametrize(("text", "seconds"), [("90", 90.0), ("30m", 1800.0), ("12h", 43200.0), ("7d", 604800.0)])
+def test_parse_duration(text: str, seconds: float) -> None:
+    assert cache.parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "soon", "-1d", "0"])
+def test_parse_duration_rejects_bad_values(text: str) -> None:
+    with pytest.raises(ValueError):
+        cache.parse_duration(text)
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize(("policy", "survivor"), [("lru", "b"), ("lfu", "a")])
+def test_evict_drops_least_recently_or_least_often_read(policy: str, survivor: str, cache_dir: Path) -> None:
+    store = cache.cache_store()
+    for key in "abc":
+        store.set(key, "x" * 99)
+        time.sleep(0.01)
+    for _ in range(3):
+        store.get("a")
+    time.sleep(0.01)
+    store.get("b")
+    assert store.usage()["bytes"] == 300
+
+    assert store.evict(150, policy) == 2
+    assert [store.get(k) is not None for k in "abc"] == [k == survivor for k in "abc"]
+
+
+@pytest.mark.offline
+def test_writes_enforce_the_disk_budget(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    monkeypatch.setattr(cache, "_BUDGET_CHECK_WRITES", 5)
+    monkeypatch.setenv(cache.MAX_MB_ENV_KEY, "1")
+    store = cache.cache_store()
+    for i in range(20):
+        store.set(f"k{i}", "x" * 100_000)
+    usage = store.usage()
+    assert usage["bytes"] <= 1 << 20
+    assert store.get("k19") is not None and store.get("k0") is None
+
+
+@pytest.mark.offline
+def test_prune_deletes_old_entries(cache_dir: Path) -> None:
+    store = cache.cache_store()
+    store.set("old", "1")
+    with closing(sqlite3.connect(cache_dir / cache.DB_NAME)) as conn, conn:
+        conn.execute("UPDATE entries SET created = created - 86400")
+    store.set("new", "2")
+    assert store.prune(3600) == 1
+    assert (store.get("old"), store.get("new")) == (None, "2")
+
+
+@pytest.mark.offline
+def test_old_databases_gain_the_housekeeping_columns(cache_dir: Path) -> None:
+    with closing(sqlite3.connect(cache_dir / cache.DB_NAME)) as conn, conn:
+        conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)")
+        conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("INSERT INTO entries VALUES (?, ?, ?)", (cache.K("m", "p"), '"kept"', time.time()))
+        conn.execute("INSERT INTO meta VALUES ('json_migrated', '1')")
+
+    assert cache.cache_get("m", "p") == "kept"
+    usage = cache.cache_store().usage()
+    assert (usage["entries"], usage["bytes"]) == (1, 64 + len('"kept"'))
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pytest
+from rich.console import Console
+
+from rag_bencher import cache_cli
+from rag_bencher.utils import cache
+from rag_bencher.vector import embedding_cache, index_cache
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    directory = tmp_path / "cache"
+    monkeypatch.setattr(cache, "D", directory, raising=False)
+    monkeypatch.delenv(embedding_cache.ENV_KEY, raising=False)
+    cache.cache_set("m", "live", {"answer": "yes"})
+    cache.cache_set("m", "expired", "old", ttl_s=-1.0)
+    vectors = embedding_cache.vector_cache(directory / "embeddings")
+    vectors.set_vectors("model|doc", [("h1", np.ones(4, dtype=np.float32))])
+    cache.close_cache_stores()
+    embedding_cache.close_vector_caches()
+    yield directory
+    cache.close_cache_stores()
+
+
+def _run(monkeypatch: pytest.MonkeyPatch, directory: Path, *args: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["rag-bencher-cli-cache", "--dir", str(directory), *args])
+    cache_cli.main()
+
+
+def test_stats_lists_answer_and_embedding_stores(
+    monkeypatch: pytest.MonkeyPatch, cache_dir: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert [s.path.name for s in cache_cli.find_stores(cache_dir)] == [cache.DB_NAME, embedding_cache.DB_NAME]
+    monkeypatch.setattr(cache_cli, "console", Console(width=400))
+    _run(monkeypatch, cache_dir, "stats")
+    out = capsys.readouterr().out
+    assert cache.DB_NAME in out and embedding_cache.DB_NAME in out
+
+
+def test_gc_drops_expired_entries_and_enforces_budget(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    _run(monkeypatch, cache_dir, "gc")
+    assert cache.cache_get("m", "live") == {"answer": "yes"}
+    assert cache.cache_store().usage()["expired"] == 0
+
+    _run(monkeypatch, cache_dir, "gc", "--max-mb", "0", "--policy", "lfu")
+    assert cache.cache_store().usage()["entries"] == 0
+
+
+def test_prune_removes_old_entries_and_vectors(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    for path in (cache_dir / cache.DB_NAME, cache_dir / "embeddings" / embedding_cache.DB_NAME):
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute("UPDATE entries SET created = created - 3 * 86400")
+            if path.name == embedding_cache.DB_NAME:
+                conn.execute("UPDATE vectors SET created = created - 3 * 86400")
+
+    _run(monkeypatch, cache_dir, "prune", "--older-than", "1d")
+    assert cache.cache_get("m", "live") is None
+    store = embedding_cache.VectorCache(cache_dir / "embeddings" / embedding_cache.DB_NAME)
+    assert store.usage()["vectors"] == 0
+    store.close()
+
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, cache_dir, "prune", "--older-than", "soon")
+
+
+def _fake_index(root: Path, name: str, size: int, age_s: float) -> Path:
+    folder = root / name
+    folder.mkdir(parents=True)
+    (folder / "index.bin").write_bytes(b"x" * size)
+    manifest = folder / index_cache.MANIFEST_NAME
+    manifest.write_text(json.dumps({"version": 1}), encoding="utf-8")
+    stamp = time.time() - age_s
+    os.utime(manifest, (stamp, stamp))
+    return folder
+
+
+def test_index_folders_are_listed_pruned_and_evicted(
+    monkeypatch: pytest.MonkeyPatch, cache_dir: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.delenv(index_cache.ENV_KEY, raising=False)
+    monkeypatch.delenv(cache.MAX_MB_ENV_KEY, raising=False)
+    root = cache_dir / "indexes"
+    old = _fake_index(root, "old", 600_000, 3 * 86400)
+    mid = _fake_index(root, "incremental/mid", 600_000, 3600)
+    new = _fake_index(root, "new", 600_000, 0)
+    (root / ".new.tmp-1-abc").mkdir()
+    assert cache_cli.find_index_roots(cache_dir) == [root.resolve()]
+    assert index_cache.cached_indexes(root) == [old, mid, new]
+
+    monkeypatch.setattr(cache_cli, "console", Console(width=400))
+    _run(monkeypatch, cache_dir, "stats")
+    assert "(indexes)" in capsys.readouterr().out
+
+    _run(monkeypatch, cache_dir, "prune", "--older-than", "1d")
+    assert not old.exists() and mid.exists() and new.exists()
+
+    _run(monkeypatch, cache_dir, "gc")
+    assert mid.exists()
+    _run(monkeypatch, cache_dir, "gc", "--max-mb", "1")
+    assert not mid.exists() and new.exists()
+    assert sorted(p.name for p in root.iterdir()) == [".new.tmp-1-abc", "incremental", "new"]
+
+
+def test_gc_fits_stores_and_indexes_into_one_budget(monkeypatch: pytest.MonkeyPatch, cache_dir: Path) -> None:
+    monkeypatch.delenv(index_cache.ENV_KEY, raising=False)
+    monkeypatch.delenv(cache.MAX_MB_ENV_KEY, raising=False)
+    answers = cache.cache_store()
+    answers.set_many([(f"a{i}", "x" * 100_000) for i in range(4)])
+    vectors = embedding_cache.VectorCache(cache_dir / "embeddings" / embedding_cache.DB_NAME)
+    vectors.set_vectors("model|doc", [(f"v{i}", np.ones(25_000, dtype=np.float32)) for i in range(4)])
+    vectors.close()
+    cache.close_cache_stores()
+    old = _fake_index(cache_dir / "indexes", "old", 400_000, 3600)
+
+    def combined() -> int:
+        stores = cache_cli.find_stores(cache_dir)
+        try:
+            used = sum(s.stored_bytes() for s in stores)
+        finally:
+            for s in stores:
+                s.close()
+        return used + sum(cache_cli._dir_bytes(f) for f in index_cache.cached_indexes(cache_dir / "indexes"))
+
+    assert combined() > 1 << 20
+    _run(monkeypatch, cache_dir, "gc", "--max-mb", "1")
+    assert combined() <= 1 << 20
+    assert not old.exists()
+
+
+def test_export_writes_live_entries_as_json_lines(
+    monkeypatch: pytest.MonkeyPatch, cache_dir: Path, tmp_path: Path
+) -> None:
+    out = tmp_path / "export.jsonl"
+    _run(monkeypatch, cache_dir, "export", "--output", str(out))
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["key"], json.loads(r["value"])) for r in rows] == [(cache.K("m", "live"), {"answer": "yes"})]
+
+
+def test_compress_and_bench_work_on_small_caches(
+    monkeypatch: pytest.MonkeyPatch, cache_dir: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    pytest.importorskip("zstandard")
+    _run(monkeypatch, cache_dir, "compress")
+    assert "Recompressed 2 entries" in capsys.readouterr().out
+    assert cache.cache_get("m", "live") == {"answer": "yes"}
+
+    monkeypatch.setattr(cache_cli, "console", Console(width=400))
+    _run(monkeypatch, cache_dir, "bench", "--limit", "10")
+    out = capsys.readouterr().out
+    assert "plain" in out and "zstd-3" in out
@@ -38,10 +38,14 @@ def _make_cfg() -> Any:
             self.runtime = runtime
             self.data = data
             self.provider = None
+            self.faiss: Any = None
 
         def model_dump(self) -> Dict[str, Any]:
             return {"model": {"name": self.model.name}}
 
+        def faiss_index(self) -> Any:
+            return self.faiss
+
     return DummyCfg()
 
 
@@ -85,11 +89,32 @@ def test_cli_main_runs_chain_on_cache_miss(monkeypatch: pytest.MonkeyPatch) -> N
 
     cli.main()
 
-    assert cache_log.gets == [("demo-model", "What is RAG?")]
+    [(namespace, question)] = cache_log.gets
+    assert namespace.startswith("answer:") and question == "What is RAG?"
     assert len(cache_log.sets) == 1
     assert chain.calls and chain.calls[0]["question"] == "What is RAG?"
 
 
+def test_cli_main_passes_faiss_index_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg = _make_cfg()
+    cfg.faiss = SimpleNamespace(index="hnsw")
+    docs = [Document(page_content="doc", metadata={"source": "doc.txt"})]
+    chain = DummyChain()
+    _patch_common(monkeypatch, cfg, docs, chain)
+    seen: List[Any] = []
+
+    def fake_build(*_args: Any, faiss_index: Any = None, **_kwargs: Any) -> tuple[DummyChain, Any]:
+        seen.append(faiss_index)
+        return chain, None
+
+    monkeypatch.setattr(CLI_MOD.naive_rag, "build_chain", fake_build)
+    monkeypatch.setattr(sys, "argv", ["rag-bencher", "--config", "cfg.yaml", "--question", "HNSW?"])
+
+    cli.main()
+
+    assert seen == [cfg.faiss]
+
+
 def test_cli_main_leaves_device_env_when_auto(monkeypatch: pytest.MonkeyPatch) -> None:
     cfg = _make_cfg()
     cfg.runtime.device = "auto"
@@ -160,7 +185,7 @@ def test_cli_main_skips_embeddings_when_adapter_missing(monkeypatch: pytest.Monk
     cli.main()
 
     assert calls and calls[0]["name"] == "aws"
-    assert cache_log.gets == [("demo-model", "No embeddings?")]
+    assert [q for _, q in cache_log.gets] == ["No embeddings?"]
 
 
 def test_pick_llm_offline_builds_hf_pipeline(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -51,3 +51,46 @@ def test_strict_validation_rejects_unknown_keys() -> None:
     )
     with pytest.raises(SystemExit):
         load_config(bad)
+
+
+def test_faiss_vector_section_parses_index_settings() -> None:
+    path = write_tmp(
+        textwrap.dedent(
+            """
+        model:
+          name: foo
+        retriever:
+          k: 3
+        data:
+          paths: ["examples/data/sample.txt"]
+        vector:
+          name: faiss
+          index: hnsw
+          ef_search: 128
+    """
+        )
+    )
+    faiss_cfg = load_config(path).faiss_index()
+    assert faiss_cfg is not None
+    assert faiss_cfg.index == "hnsw"
+    assert faiss_cfg.ef_search == 128
+
+
+def test_faiss_vector_section_rejects_unknown_index() -> None:
+    bad = write_tmp(
+        textwrap.dedent(
+            """
+        model:
+          name: foo
+        retriever:
+          k: 3
+        data:
+          paths: ["examples/data/sample.txt"]
+        vector:
+          name: faiss
+          index: annoy
+    """
+        )
+    )
+    with pytest.raises(SystemExit):
+        load_config(bad)
@@ -8,8 +8,8 @@ pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
 def test_dataset_loading_and_hyde_chain() -> None:
     docs = load_dataset("docs/wiki")
-    chain, debug = build_chain(docs, model="dummy", k=2)
+    chain, traced = build_chain(docs, model="dummy", k=2)
     out = chain.invoke("What is LangChain?")
     assert isinstance(out, str) and len(out) > 0
-    info = debug()
+    info = traced.invoke("What is LangChain?")["debug"]
     assert info.get("pipeline") == "hyde"
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.eval import embedding_parity
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+def test_identical_embedders_are_in_parity(hash_embeddings: Callable[..., Embeddings]) -> None:
+    report = embedding_parity.embedding_parity(hash_embeddings(16), hash_embeddings(16), embedding_parity.PARITY_TEXTS)
+    assert report["min_cosine"] == pytest.approx(1.0)
+    assert report["mean_cosine"] == pytest.approx(1.0)
+    assert report["neighbour_agreement"] == 1.0
+
+
+def test_noisy_embedder_lowers_cosine(hash_embeddings: Callable[..., Embeddings]) -> None:
+    report = embedding_parity.embedding_parity(hash_embeddings(16), hash_embeddings(16, noise=1.0), ["a", "bb", "ccc"])
+    assert report["min_cosine"] < 0.95
+    assert 0.0 <= report["neighbour_agreement"] <= 1.0
+
+
+def test_check_backend_parity_compares_against_torch(
+    monkeypatch: pytest.MonkeyPatch, hash_embeddings: Callable[..., Embeddings]
+) -> None:
+    built: list[tuple[str, str]] = []
+
+    def fake_make(model_name: str, *, backend: str, **_: Any) -> Embeddings:
+        built.append((model_name, backend))
+        return hash_embeddings(16, noise=0.0 if backend == "torch" else 2.0)
+
+    monkeypatch.setattr(embedding_parity, "make_hf_embeddings", fake_make)
+    with pytest.raises(ValueError, match="drift from torch"):
+        embedding_parity.check_backend_parity("onnx-int8", "mini")
+    assert built == [("mini", "torch"), ("mini", "onnx-int8")]
+    report = embedding_parity.check_backend_parity("onnx", "mini", texts=["x", "y"], min_cosine=-1.0)
+    assert set(report) == {"min_cosine", "mean_cosine", "neighbour_agreement"}
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import sys
 
 import pytest
 
@@ -55,3 +56,30 @@ def test_apply_process_wide_policy_passthrough_for_cuda(monkeypatch: pytest.Monk
     mode = hardware.apply_process_wide_policy()
     assert mode == "cuda"
     assert os.environ["CUDA_VISIBLE_DEVICES"] == "1"
+
+
+@pytest.mark.unit
+def test_pin_threads_sets_env_and_caps_loaded_libraries(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[tuple[str, int]] = []
+
+    class FakeTorch:
+        @staticmethod
+        def set_num_threads(n: int) -> None:
+            calls.append(("torch", n))
+
+    class FakeFaiss:
+        @staticmethod
+        def omp_set_num_threads(n: int) -> None:
+            calls.append(("faiss", n))
+
+    for key in hardware.THREAD_ENV_KEYS + ("TOKENIZERS_PARALLELISM",):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setitem(sys.modules, "torch", FakeTorch)
+    monkeypatch.setitem(sys.modules, "faiss", FakeFaiss)
+
+    hardware.pin_threads(3)
+
+    assert all(os.environ[key] == "3" for key in hardware.THREAD_ENV_KEYS)
+    assert os.environ["TOKENIZERS_PARALLELISM"] == "false"
+    assert calls == [("torch", 3), ("faiss", 3)]
+    assert hardware.thread_env(0)["OMP_NUM_THREADS"] == "1"
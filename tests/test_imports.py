@@ -1,9 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
 
 pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
+# Generous ceiling for ``import rag_bencher`` (best of 3); it takes a few milliseconds when nothing heavy loads.
+IMPORT_BUDGET_S = 0.25
+# Generous ceiling for the modules the CLIs import before running; pydantic/langchain_core load, models must not.
+CLI_IMPORT_BUDGET_S = 2.0
+_HEAVY = ("pydantic", "yaml", "langchain_core", "langchain_openai", "numpy", "torch", "transformers")
+_MODEL_RUNTIMES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "langchain_openai",
+    "faiss",
+)
+_PROBE = """
+import importlib, json, sys, time
+modules, watched = sys.argv[1].split(","), set(sys.argv[2:])
+t0 = time.perf_counter()
+for name in modules:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - t0
+print(json.dumps({"s": elapsed, "heavy": sorted({m.split(".")[0] for m in sys.modules} & watched)}))
+"""
+
 
 def test_imports() -> None:
     import rag_bencher
 
     assert hasattr(rag_bencher, "__all__")
+
+
+def _probe(cwd: Path, modules: tuple[str, ...], watched: tuple[str, ...]) -> dict[str, object]:
+    import rag_bencher
+
+    env = dict(os.environ, PYTHONPATH=str(Path(rag_bencher.__file__).parents[1]))
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, ",".join(modules), *watched],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result: dict[str, object] = json.loads(out.stdout)
+    return result
+
+
+def test_import_is_cheap_and_free_of_side_effects(tmp_path: Path) -> None:
+    runs = [
+        _probe(tmp_path, ("rag_bencher", "rag_bencher.utils.cache", "rag_bencher.cache_cli"), _HEAVY) for _ in range(3)
+    ]
+    assert runs[0]["heavy"] == []
+    assert list(tmp_path.iterdir()) == []
+    best = min(float(str(r["s"])) for r in runs)
+    assert best < IMPORT_BUDGET_S, f"import rag_bencher took {best * 1000:.0f} ms"
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "rag_bencher.utils.factories",
+        "rag_bencher.vector.local",
+        "rag_bencher.cli",
+        "rag_bencher.bench_cli",
+        "rag_bencher.bench_many_cli",
+        "rag_bencher.probe_cli",
+    ],
+)
+def test_cli_imports_load_no_model_runtime(tmp_path: Path, module: str) -> None:
+    runs = [_probe(tmp_path, (module,), _MODEL_RUNTIMES) for _ in range(2)]
+    assert runs[0]["heavy"] == []
+    assert list(tmp_path.iterdir()) == []
+    best = min(float(str(r["s"])) for r in runs)
+    assert best < CLI_IMPORT_BUDGET_S, f"import {module} took {best * 1000:.0f} ms"
+
+
+def test_lazy_attributes_resolve_on_access() -> None:
+    import rag_bencher
+
+    assert "load_config" in dir(rag_bencher)
+    assert rag_bencher.load_config is rag_bencher.__getattr__("load_config")
+    with pytest.raises(AttributeError):
+        rag_bencher.__getattr__("missing")
@@ -8,10 +8,10 @@ pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
 def test_multi_query_builds_and_runs_offline() -> None:
     docs = load_texts_as_documents(["examples/data/sample.txt"])
-    chain, debug = multi_query.build_chain(docs, model="dummy", k=2, n_queries=2)
+    chain, traced = multi_query.build_chain(docs, model="dummy", k=2, n_queries=2)
     out = chain.invoke("What is LangChain?")
     assert isinstance(out, str) and len(out) > 0
-    dbg = debug()
+    dbg = traced.invoke("What is LangChain?")["debug"]
     assert dbg.get("pipeline") == "multi_query"
     assert len(dbg.get("retrieved", [])) >= 1
 
@@ -23,6 +23,9 @@ def test_package_handles_missing_config_module(monkeypatch: pytest.MonkeyPatch)
     module = importlib.reload(rag_bencher)
     assert "load_config" not in module.__all__
     assert not hasattr(module, "load_config")
+    namespace: dict[str, object] = {}
+    exec("from rag_bencher import *", namespace)
+    assert "__version__" in namespace and "load_config" not in namespace
 
     # Restore the real module for the rest of the suite.
     monkeypatch.undo()
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import Any, Dict, List, cast
 
 import pytest
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableLambda, RunnableSerializable
 
-from rag_bencher.config import load_config
+from rag_bencher.config import DataCfg, RuntimeCfg, load_config
 from rag_bencher.pipelines import hyde, multi_query, naive_rag, rerank
-from rag_bencher.pipelines.selector import PipelineSelection, select_pipeline
+from rag_bencher.pipelines.selector import PipelineSelection, SharedIndexes, select_pipeline, shared_index_key
+from rag_bencher.vector import embedding_cache
 
 
 class DummyChain:
@@ -20,15 +24,29 @@ class DummyChain:
         return f"{self.tag}:{question}"
 
 
+class DummyEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [1.0]
+
+
 def make_stub_builder(tag: str, store: Dict[str, Any]) -> DummyChain:
     chain = DummyChain(tag)
 
-    def builder(docs: List[Document], **kwargs: Any) -> tuple[DummyChain, Any]:
+    def answer(question: str) -> Dict[str, Any]:
+        return {"answer": f"{tag}:{question}", "debug": {"pipeline": tag}}
+
+    traced = cast(RunnableSerializable[str, Dict[str, Any]], RunnableLambda(answer))
+
+    def builder(docs: List[Document], **kwargs: Any) -> tuple[DummyChain, RunnableSerializable[str, Dict[str, Any]]]:
         store["docs"] = docs
         store["kwargs"] = kwargs
-        return chain, (lambda: {"pipeline": tag})
+        return chain, traced
 
     store["builder"] = builder
+    store["traced"] = traced
     return chain
 
 
@@ -47,7 +65,7 @@ def test_select_pipeline_defaults_to_naive(monkeypatch: pytest.MonkeyPatch) -> N
     assert selection.pipeline_id == "naive"
     selected_chain = cast(DummyChain, selection.chain)
     assert selected_chain is chain
-    assert selection.debug() == {"pipeline": "naive"}
+    assert selection.traced is store["traced"]
     assert store["kwargs"]["model"] == bench_cfg.model.name
 
 
@@ -69,7 +87,7 @@ def test_select_pipeline_multi_query_branch(monkeypatch: pytest.MonkeyPatch) ->
     assert selection.pipeline_id == "multi_query"
     selection.chain.invoke("Q?")
     assert store["kwargs"]["n_queries"] == 3
-    assert selection.debug() == {"pipeline": "multi_query"}
+    assert selection.traced is store["traced"]
 
 
 @pytest.mark.unit
@@ -89,7 +107,7 @@ def test_select_pipeline_hyde_branch(monkeypatch: pytest.MonkeyPatch) -> None:
 
     assert selection.pipeline_id == "hyde"
     selection.chain.invoke("Explain HYDE")
-    assert selection.debug() == {"pipeline": "hyde"}
+    assert selection.traced is store["traced"]
 
 
 @pytest.mark.unit
@@ -111,7 +129,7 @@ def test_select_pipeline_rerank_branch(monkeypatch: pytest.MonkeyPatch) -> None:
     selection.chain.invoke("Rank these")
     assert store["kwargs"]["rerank_top_k"] == 4
     assert store["kwargs"]["method"] == "cosine"
-    assert selection.debug() == {"pipeline": "rerank"}
+    assert selection.traced is store["traced"]
 
 
 @pytest.mark.unit
@@ -153,4 +171,90 @@ def test_select_pipeline_builds_provider_adapters(monkeypatch: pytest.MonkeyPatc
     assert store["kwargs"]["embeddings"] == "emb-adapter"
     selected_chain = cast(DummyChain, selection.chain)
     assert selected_chain is chain
-    assert selection.debug() == {"pipeline": "naive"}
+    assert selection.traced is store["traced"]
+
+
+@pytest.mark.unit
+def test_select_pipeline_uses_runtime_embeddings_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    store: Dict[str, Any] = {}
+    make_stub_builder("naive", store)
+    monkeypatch.setattr(naive_rag, "build_chain", store["builder"])
+    backends: List[str] = []
+
+    def fake_make(**kwargs: Any) -> str:
+        backends.append(kwargs["backend"])
+        return "onnx-embeddings"
+
+    monkeypatch.setattr("rag_bencher.pipelines.selector.make_hf_embeddings", fake_make)
+    bench_cfg = load_config("configs/wiki.yaml")
+    bench_cfg.runtime.embeddings_backend = "onnx-int8"
+
+    select_pipeline("configs/wiki.yaml", docs=[], cfg=bench_cfg)
+
+    assert backends == ["onnx-int8"]
+    assert store["kwargs"]["embeddings"] == "onnx-embeddings"
+
+
+@pytest.mark.unit
+def test_shared_index_key_ignores_pipeline_and_k_but_not_corpus_or_index() -> None:
+    wiki = load_config("configs/wiki.yaml")
+    rerank_cfg = load_config("configs/rerank.yaml")
+    assert shared_index_key(wiki) == shared_index_key(rerank_cfg)
+
+    other_corpus = wiki.model_copy(update={"data": DataCfg(paths=["other.txt"])})
+    hnsw = wiki.model_copy(update={"vector": {"name": "faiss", "index": "hnsw"}})
+    onnx = wiki.model_copy(update={"runtime": RuntimeCfg(embeddings_backend="onnx")})
+    keys = {shared_index_key(c) for c in (wiki, other_corpus, hnsw, onnx)}
+    assert len(keys) == 4
+
+
+@pytest.mark.unit
+def test_select_pipeline_reuses_shared_index_across_configs(monkeypatch: pytest.MonkeyPatch) -> None:
+    built: List[List[str]] = []
+    monkeypatch.setattr(
+        "rag_bencher.pipelines.selector.make_hf_embeddings", lambda **kwargs: f"embed:{kwargs['model_name']}"
+    )
+
+    def fake_build(splits: List[Document], embed: Any, **kwargs: Any) -> str:
+        built.append([d.page_content for d in splits])
+        return f"store-{len(built)}"
+
+    monkeypatch.setattr("rag_bencher.pipelines.selector.build_local_vectorstore", fake_build)
+    stores: Dict[str, Any] = {}
+    for module, tag in ((naive_rag, "naive"), (rerank, "rerank")):
+        make_stub_builder(tag, stores.setdefault(tag, {}))
+        monkeypatch.setattr(module, "build_chain", stores[tag]["builder"])
+
+    indexes = SharedIndexes()
+    docs = [Document(page_content="alpha")]
+    select_pipeline("configs/wiki.yaml", docs, indexes=indexes)
+    select_pipeline("configs/rerank.yaml", docs, indexes=indexes)
+    assert stores["naive"]["kwargs"]["vectorstore"] == "store-1"
+    assert stores["rerank"]["kwargs"]["vectorstore"] == "store-1"
+    assert stores["rerank"]["kwargs"]["embeddings"] == "embed:sentence-transformers/all-MiniLM-L6-v2"
+    other = load_config("configs/wiki.yaml").model_copy(update={"data": DataCfg(paths=["b.txt"])})
+    select_pipeline("b.yaml", [Document(page_content="beta")], other, indexes=indexes)
+
+    assert built == [["alpha"], ["beta"]]
+    assert len(indexes) == 2
+    assert stores["naive"]["kwargs"]["vectorstore"] == "store-2"
+
+
+@pytest.mark.unit
+def test_select_pipeline_wraps_embeddings_when_embed_cache_enabled(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    store: Dict[str, Any] = {}
+    make_stub_builder("naive", store)
+    monkeypatch.setattr(naive_rag, "build_chain", store["builder"])
+    monkeypatch.setattr("rag_bencher.pipelines.selector.make_hf_embeddings", lambda **_: DummyEmbeddings())
+    monkeypatch.setenv(embedding_cache.ENV_KEY, str(tmp_path))
+
+    try:
+        select_pipeline("configs/wiki.yaml", docs=[])
+    finally:
+        embedding_cache.close_vector_caches()
+
+    embed = store["kwargs"]["embeddings"]
+    assert isinstance(embed, embedding_cache.CachedEmbeddings)
+    assert isinstance(embed.inner, DummyEmbeddings)
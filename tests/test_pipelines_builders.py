@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from types import SimpleNamespace
 from typing import Any, List, cast
 
 import pytest
@@ -22,6 +26,10 @@ class FakeEmbeddings:
         self.seen.append(text)
         return [float(len(text) or 1.0), 1.0]
 
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.seen.extend(texts)
+        return [[float(len(t) or 1.0), 1.0] for t in texts]
+
 
 class FakeVectorStore:
     def __init__(self, docs: list[Document]) -> None:
@@ -32,6 +40,10 @@ class FakeVectorStore:
         self.queries.append((query, k))
         return self.docs[:k]
 
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> list[Document]:
+        self.queries.append((str(embedding), k))
+        return self.docs[:k]
+
     def as_retriever(self, search_kwargs: dict[str, Any] | None = None) -> RunnableLambda[Any, list[Document]]:
         limit = (search_kwargs or {}).get("k", len(self.docs))
         return RunnableLambda(lambda _: self.docs[:limit])
@@ -71,7 +83,7 @@ def _patch_common_builders(module: Any, monkeypatch: pytest.MonkeyPatch) -> None
 
     monkeypatch.setattr(module, "RecursiveCharacterTextSplitter", lambda *args, **kwargs: DummySplitter())
     monkeypatch.setattr(module, "make_hf_embeddings", lambda **kwargs: FakeEmbeddings())
-    monkeypatch.setattr(module, "build_local_vectorstore", lambda docs, embed: FakeVectorStore(list(docs)))
+    monkeypatch.setattr(module, "build_local_vectorstore", lambda docs, embed, **_: FakeVectorStore(list(docs)))
     monkeypatch.setattr(
         module,
         "resolve_chat_llm",
@@ -90,10 +102,12 @@ def docs() -> list[Document]:
 def test_hyde_chain_uses_fallback(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
     _patch_common_builders(hyde, monkeypatch)
     monkeypatch.setattr(hyde, "has_openai_key", lambda: False)
-    chain, debug = hyde.build_chain(docs, model="stub", k=1)
+    chain, traced = hyde.build_chain(docs, model="stub", k=1)
     answer = chain.invoke("What is alpha?")
     assert answer.startswith("LLM:")
-    info = debug()
+    out = traced.invoke("What is alpha?")
+    assert out["answer"] == answer
+    info = out["debug"]
     assert info["pipeline"] == "hyde"
     assert info["retrieved"]
     assert "alpha" in info["hypothesis"]
@@ -102,20 +116,20 @@ def test_hyde_chain_uses_fallback(monkeypatch: pytest.MonkeyPatch, docs: list[Do
 def test_hyde_chain_can_generate_with_openai(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
     _patch_common_builders(hyde, monkeypatch)
     monkeypatch.setattr(hyde, "has_openai_key", lambda: True)
-    monkeypatch.setattr(hyde, "ChatOpenAI", lambda **kwargs: RunnableLambda(lambda prompt: f"gen::{prompt}"))
+    fake_chat = SimpleNamespace(ChatOpenAI=lambda **kwargs: RunnableLambda(lambda prompt: f"gen::{prompt}"))
+    monkeypatch.setitem(sys.modules, "langchain_openai", fake_chat)
 
-    chain, debug = hyde.build_chain(docs, model="stub", k=1)
-    chain.invoke("Explain beta")
-    assert debug()["hypothesis"].startswith("gen::")
+    _, traced = hyde.build_chain(docs, model="stub", k=1)
+    assert traced.invoke("Explain beta")["debug"]["hypothesis"].startswith("gen::")
 
 
 def test_multi_query_chain_uses_fallback(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
     _patch_common_builders(multi_query, monkeypatch)
     monkeypatch.setattr(multi_query, "has_openai_key", lambda: False)
-    chain, debug = multi_query.build_chain(docs, model="stub", k=1, n_queries=2)
-    ans = chain.invoke("Key facts?")
-    assert ans.startswith("LLM:")
-    info = debug()
+    _, traced = multi_query.build_chain(docs, model="stub", k=1, n_queries=2)
+    out = traced.invoke("Key facts?")
+    assert out["answer"].startswith("LLM:")
+    info = out["debug"]
     assert info["pipeline"] == "multi_query"
     assert len(info["queries"]) == 2
 
@@ -126,15 +140,11 @@ def test_multi_query_chain_deduplicates_generated_queries(
 ) -> None:
     _patch_common_builders(multi_query, monkeypatch)
     monkeypatch.setattr(multi_query, "has_openai_key", lambda: True)
-    monkeypatch.setattr(
-        multi_query,
-        "ChatOpenAI",
-        lambda **kwargs: RunnableLambda(lambda prompt: "facts\nfacts\nextra"),
-    )
+    fake_chat = SimpleNamespace(ChatOpenAI=lambda **kwargs: RunnableLambda(lambda prompt: "facts\nfacts\nextra"))
+    monkeypatch.setitem(sys.modules, "langchain_openai", fake_chat)
 
-    chain, debug = multi_query.build_chain(docs, model="stub", k=1, n_queries=3)
-    chain.invoke("alpha?")
-    queries = debug()["queries"]
+    _, traced = multi_query.build_chain(docs, model="stub", k=1, n_queries=3)
+    queries = traced.invoke("alpha?")["debug"]["queries"]
     assert queries[0] == "alpha?"
     assert len(queries) == 3
 
@@ -147,14 +157,16 @@ def test_naive_rag_chain_accepts_custom_retriever(monkeypatch: pytest.MonkeyPatc
     )
     retriever = DummyRetriever(docs)
     override_llm = cast(RunnableSerializable[Any, Any], RunnableLambda(lambda text, **__: text))
-    chain, meta = naive_rag.build_chain(
+    chain, traced = naive_rag.build_chain(
         docs,
         retriever=retriever,
         llm=override_llm,
     )
     out = chain.invoke("Alpha?")
     assert "Question" in out
-    assert meta() == {"pipeline": "naive_rag"}
+    info = traced.invoke("Alpha?")["debug"]
+    assert info["pipeline"] == "naive_rag"
+    assert [r["source"] for r in info["retrieved"]] == ["a", "b"]
 
 
 def test_naive_rag_chain_builds_vector_store(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
@@ -166,16 +178,128 @@ def test_naive_rag_chain_builds_vector_store(monkeypatch: pytest.MonkeyPatch, do
 
 def test_rerank_chain_produces_debug(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
     _patch_common_builders(rerank, monkeypatch)
-    chain, debug = rerank.build_chain(docs, k=2, rerank_top_k=1)
-    chain.invoke("alpha")
-    info = debug()
+    _, traced = rerank.build_chain(docs, k=2, rerank_top_k=1)
+    info = traced.invoke("alpha")["debug"]
     assert info["pipeline"] == "rerank"
     assert info["candidates"]
 
 
-def test_cosine_handles_zero_vectors() -> None:
-    assert rerank._cosine([0.0, 0.0], [1.0, 2.0]) == 0.0
-    assert rerank._cosine([1.0, 0.0], [1.0, 0.0]) == pytest.approx(1.0)
+def test_hyde_traced_debug_is_per_invocation_across_threads(
+    monkeypatch: pytest.MonkeyPatch, docs: list[Document]
+) -> None:
+    _patch_common_builders(hyde, monkeypatch)
+    monkeypatch.setattr(hyde, "has_openai_key", lambda: False)
+    _, traced = hyde.build_chain(docs, model="stub", k=1)
+
+    def run(question: str) -> str:
+        return str(traced.invoke(question)["debug"]["hypothesis"])
+
+    questions = [f"question {i}" for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        hypotheses = list(pool.map(run, questions))
+    assert all(q in h for q, h in zip(questions, hypotheses, strict=True))
+    batched = traced.batch(questions, config={"max_concurrency": 8})
+    assert all(
+        q in out["debug"]["hypothesis"] and q in out["answer"] for q, out in zip(questions, batched, strict=True)
+    )
+
+
+@pytest.mark.parametrize("module", [hyde, multi_query, naive_rag, rerank])
+def test_pipelines_use_a_prebuilt_vectorstore(
+    monkeypatch: pytest.MonkeyPatch, docs: list[Document], module: Any
+) -> None:
+    _patch_common_builders(module, monkeypatch)
+    monkeypatch.setattr(module, "build_local_vectorstore", lambda *_a, **_k: pytest.fail("index rebuilt"))
+    if hasattr(module, "has_openai_key"):
+        monkeypatch.setattr(module, "has_openai_key", lambda: False)
+    store = FakeVectorStore(docs)
+    _, traced = module.build_chain(docs, k=1, vectorstore=store)
+    out = traced.invoke("alpha?")
+    assert out["answer"].startswith("LLM:")
+    assert store.queries or out["debug"]["retrieved"]
+
+
+def test_cosine_scores_handle_zero_vectors() -> None:
+    assert rerank._cosine_scores([0.0, 0.0], [[1.0, 2.0]]).tolist() == [0.0]
+    assert rerank._cosine_scores([1.0, 0.0], [[1.0, 0.0]]).tolist() == pytest.approx([1.0])
+
+
+def test_cosine_scores_match_scalar_cosine() -> None:
+    rows = [[1.0, 0.0], [0.0, 0.0], [3.0, 4.0], [-1.0, 1.0]]
+    scores = rerank._cosine_scores([1.0, 2.0], rows)
+    assert scores.tolist() == pytest.approx([1 / 5**0.5, 0.0, 11 / (5 * 5**0.5), 1 / 10**0.5])
+
+
+def test_rerank_embeds_candidates_once_in_a_batch(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
+    _patch_common_builders(rerank, monkeypatch)
+    embed = FakeEmbeddings()
+    _, traced = rerank.build_chain(docs, k=2, rerank_top_k=1, embeddings=cast(Any, embed))
+    out = traced.invoke("alpha")
+    assert embed.seen == ["alpha"] + [d.page_content for d in docs[:2]]
+    assert len(out["debug"]["candidates"]) == 2
+
+
+def test_rerank_reuses_vectors_held_by_the_store(monkeypatch: pytest.MonkeyPatch) -> None:
+    from rag_bencher.vector.numpy_store import NumpyVectorStore
+
+    embed = FakeEmbeddings()
+    store = NumpyVectorStore(cast(Any, embed))
+    store.add_vectors([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]], ["east", "diagonal", "north"], ids=["e", "d", "n"])
+    _patch_common_builders(rerank, monkeypatch)
+    monkeypatch.setattr(rerank, "build_local_vectorstore", lambda *_a, **_k: store)
+
+    _, traced = rerank.build_chain([], k=3, rerank_top_k=2, embeddings=cast(Any, embed))
+    out = traced.invoke("query")
+
+    assert embed.seen == ["query"]
+    scores = [c["score"] for c in out["debug"]["candidates"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+class FakeCrossEncoder:
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[str, str]]] = []
+
+    def predict(self, pairs: list[tuple[str, str]], **kwargs: Any) -> list[float]:
+        self.batches.append(list(pairs))
+        return [float(len(doc)) for _, doc in pairs]
+
+
+def test_rerank_cross_encoder_batches_and_caches_scores(monkeypatch: pytest.MonkeyPatch, docs: list[Document]) -> None:
+    _patch_common_builders(rerank, monkeypatch)
+    model = FakeCrossEncoder()
+    loaded: list[str] = []
+    cache: dict[tuple[str, str], Any] = {}
+
+    def fake_make(name: str) -> FakeCrossEncoder:
+        loaded.append(name)
+        return model
+
+    monkeypatch.setattr(rerank, "make_cross_encoder", fake_make)
+    monkeypatch.setattr(rerank, "cache_get", lambda m, p: cache.get((m, p)))
+    monkeypatch.setattr(rerank, "cache_set", lambda m, p, o: cache.__setitem__((m, p), o))
+    monkeypatch.setattr(rerank, "cache_batch", nullcontext)
+
+    chain, traced = rerank.build_chain(docs, k=3, rerank_top_k=1, method="cross_encoder", cross_encoder_model="tiny-ce")
+    info = traced.invoke("alpha")["debug"]
+    assert loaded == ["tiny-ce"]
+    assert model.batches == [[("alpha", d.page_content) for d in docs[:3]]]
+    assert info["method"] == "cross_encoder"
+    expected = sorted((float(len(d.page_content)) for d in docs[:3]), reverse=True)
+    assert [c["score"] for c in info["candidates"]] == expected
+    assert all(m == "cross-encoder:tiny-ce" for m, _ in cache)
+
+    chain.invoke("alpha")
+    assert len(model.batches) == 1
+
+    uncached, _ = rerank.build_chain(docs, k=3, method="cross_encoder", score_cache=False)
+    uncached.invoke("alpha")
+    assert len(model.batches) == 2
+
+
+def test_rerank_rejects_unknown_method(docs: list[Document]) -> None:
+    with pytest.raises(ValueError, match="Unknown rerank method"):
+        rerank.build_chain(docs, method="bm25")
 
 
 def test_rag_pipeline_is_abstract() -> None:
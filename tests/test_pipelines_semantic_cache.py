@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableLambda
+
+from rag_bencher.pipelines import semantic_cache, utils
+from rag_bencher.utils import cache
+from rag_bencher.vector import embedding_cache
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+TOPICS = {"rag": [1.0, 0.0, 0.0], "faiss": [0.0, 1.0, 0.0]}
+
+
+class TopicEmbeddings(Embeddings):
+    """Embed a question by the topic word it mentions; paraphrases land on the same vector."""
+
+    model_name = "topics"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        for word, vec in TOPICS.items():
+            if word in text.lower():
+                return vec
+        return [0.0, 0.0, 1.0]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[embedding_cache.VectorCache]:
+    yield embedding_cache.vector_cache(tmp_path)
+    embedding_cache.close_vector_caches()
+
+
+@pytest.fixture
+def answers(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[Path]:
+    directory = tmp_path / "answers"
+    monkeypatch.setattr(cache, "D", directory, raising=False)
+    yield directory
+    cache.close_cache_stores()
+
+
+def _traced(calls: List[str], reply: str = "RAG retrieves context before answering") -> Any:
+    def run(question: str) -> Dict[str, Any]:
+        calls.append(question)
+        return {"answer": reply, "debug": {"pipeline": "stub"}}
+
+    return RunnableLambda(run)
+
+
+def _delta(before: Dict[str, float]) -> Dict[str, float]:
+    after = semantic_cache.semantic_cache_stats()
+    return {k: after[k] - before[k] for k in semantic_cache.SEMANTIC_COUNTERS}
+
+
+def test_paraphrase_is_served_from_semantic_cache(store: embedding_cache.VectorCache, answers: Path) -> None:
+    before = semantic_cache.semantic_cache_stats()
+    calls: List[str] = []
+    semantic = semantic_cache.SemanticCache(TopicEmbeddings(), store, threshold=0.9)
+    _, traced = utils.with_answer_cache(_traced(calls), "answer:ns", semantic)
+
+    traced.invoke("What is RAG?")
+    out = traced.invoke("Explain rag to me")
+    assert calls == ["What is RAG?"]
+    assert out["answer"] == "RAG retrieves context before answering"
+    assert out["debug"]["semantic_hit"] == {"question": "What is RAG?", "score": pytest.approx(1.0)}
+
+    traced.invoke("How does FAISS work?")
+    other_ns = utils.with_answer_cache(_traced(calls), "answer:other", semantic)[1]
+    other_ns.invoke("rag, briefly?")
+    assert calls == ["What is RAG?", "How does FAISS work?", "rag, briefly?"]
+
+    # A new process finds the questions answered by earlier runs.
+    reloaded = semantic_cache.SemanticCache(TopicEmbeddings(), store, threshold=0.9)
+    hit = reloaded.lookup("answer:ns", "RAG in one line")
+    assert hit is not None
+    assert hit[0] == "What is RAG?" and hit[1] == pytest.approx(1.0)
+    delta = _delta(before)
+    assert delta["semantic_lookups"] == 5 and delta["semantic_hits"] == 1
+
+
+def test_sampled_hits_are_checked_for_false_hits(store: embedding_cache.VectorCache, answers: Path) -> None:
+    before = semantic_cache.semantic_cache_stats()
+    cache.cache_set("answer:ns", "What is RAG?", {"answer": "an unrelated cached reply", "debug": {}})
+    semantic = semantic_cache.SemanticCache(TopicEmbeddings(), store, threshold=0.9, sample_rate=1.0)
+    semantic.add("answer:ns", "What is RAG?")
+    calls: List[str] = []
+    _, traced = utils.with_answer_cache(_traced(calls), "answer:ns", semantic)
+
+    out = traced.invoke("rag?")
+
+    assert calls == ["rag?"]
+    assert "semantic_hit" not in out["debug"]
+    delta = _delta(before)
+    assert delta["semantic_checked"] == 1 and delta["semantic_false_hits"] == 1
+    rates = semantic_cache.semantic_rates(delta)
+    assert rates == {"semantic_hit_rate": 1.0, "semantic_false_hit_rate": 1.0}
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import sys
+from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, cast
 
 import pytest
+from langchain_core.documents import Document
+from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableLambda, RunnableSerializable
 
+from rag_bencher.config import RetrieverCfg, RuntimeCfg, load_config
 from rag_bencher.pipelines import utils
+from rag_bencher.utils import cache
+from rag_bencher.vector import local
 
 pytestmark = pytest.mark.unit
 
@@ -31,7 +39,7 @@ def test_resolve_chat_llm_uses_openai_when_key(monkeypatch: pytest.MonkeyPatch)
             called["temperature"] = temperature
 
     monkeypatch.setattr(utils, "has_openai_key", lambda: True)
-    monkeypatch.setattr(utils, "ChatOpenAI", DummyChat)
+    monkeypatch.setitem(sys.modules, "langchain_openai", SimpleNamespace(ChatOpenAI=DummyChat))
     llm = utils.resolve_chat_llm("gpt-test")
     assert isinstance(llm, DummyChat)
     assert called == {"model": "gpt-test", "temperature": 0.0}
@@ -43,3 +51,76 @@ def test_resolve_chat_llm_offline_chain(monkeypatch: pytest.MonkeyPatch) -> None
     result = llm.invoke("Question?")
     assert "[offline answer]" in result
     assert "Question?" in result
+
+
+def test_build_traced_chain_returns_answer_with_its_own_debug() -> None:
+    def retrieve(question: str) -> tuple[str, dict[str, Any]]:
+        return f"ctx:{question}", {"pipeline": "stub", "question": question}
+
+    prompt = PromptTemplate.from_template("{context}|{question}")
+    llm = cast(RunnableSerializable[Any, Any], RunnableLambda(lambda p: f"LLM:{p.to_string()}"))
+    chain, traced = utils.build_traced_chain(retrieve, prompt, llm)
+
+    assert chain.invoke("q1") == "LLM:ctx:q1|q1"
+    outs = traced.batch([f"q{i}" for i in range(8)], config={"max_concurrency": 4})
+    assert [o["answer"] for o in outs] == [f"LLM:ctx:q{i}|q{i}" for i in range(8)]
+    assert [o["debug"]["question"] for o in outs] == [f"q{i}" for i in range(8)]
+
+
+def test_answer_cache_namespace_tracks_config_corpus_and_llm() -> None:
+    cfg = load_config("configs/wiki.yaml")
+    docs = [Document(page_content="alpha", metadata={"source": "a.txt"})]
+    base = utils.answer_cache_namespace(cfg, docs, "naive", "offline")
+
+    on_gpu = cfg.model_copy(update={"runtime": RuntimeCfg(device="cuda")})
+    assert utils.answer_cache_namespace(on_gpu, docs, "naive", "offline") == base
+    assert utils.answer_cache_namespace(load_config("configs/wiki.yaml"), list(docs), "naive", "offline") == base
+
+    other_k = cfg.model_copy(update={"retriever": RetrieverCfg(k=cfg.retriever.k + 1)})
+    edited = [Document(page_content="alpha!", metadata={"source": "a.txt"})]
+    variants = {
+        utils.answer_cache_namespace(other_k, docs, "naive", "offline"),
+        utils.answer_cache_namespace(cfg, edited, "naive", "offline"),
+        utils.answer_cache_namespace(cfg, docs, "hyde", "offline"),
+        utils.answer_cache_namespace(cfg, docs, "naive", "openai"),
+    }
+    assert base not in variants and len(variants) == 4
+
+
+def test_answer_cache_namespace_tracks_vectorstore_and_index_mode(monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg = load_config("configs/wiki.yaml")
+    docs = [Document(page_content="alpha", metadata={"source": "a.txt"})]
+    monkeypatch.delenv("RAG_BENCH_DISABLE_FAISS", raising=False)
+    monkeypatch.delenv("RAG_BENCH_INDEX_MODE", raising=False)
+    namespaces: list[str] = []
+    try:
+        for store in ("memory", "numpy", "int8", "binary"):
+            monkeypatch.setenv("RAG_BENCH_VECTORSTORE", store)
+            local._resolve_factory.cache_clear()
+            namespaces.append(utils.answer_cache_namespace(cfg, docs, "naive", "offline"))
+        monkeypatch.setenv("RAG_BENCH_INDEX_MODE", "incremental")
+        namespaces.append(utils.answer_cache_namespace(cfg, docs, "naive", "offline"))
+    finally:
+        local._resolve_factory.cache_clear()
+    assert len(set(namespaces)) == 5
+
+
+def test_with_answer_cache_reuses_stored_answer_and_debug(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(cache, "D", tmp_path, raising=False)
+    calls: list[str] = []
+
+    def run(question: str) -> dict[str, Any]:
+        calls.append(question)
+        return {"answer": f"A:{question}", "debug": {"pipeline": "stub"}}
+
+    traced = cast(RunnableSerializable[str, Any], RunnableLambda(run))
+    chain, cached = utils.with_answer_cache(traced, "answer:ns")
+
+    try:
+        assert cached.invoke("q") == {"answer": "A:q", "debug": {"pipeline": "stub"}}
+        assert chain.invoke("q") == "A:q"
+        assert cached.invoke("q2")["answer"] == "A:q2"
+        assert calls == ["q", "q2"]
+        assert cache.cache_get("answer:ns", "q") == {"answer": "A:q", "debug": {"pipeline": "stub"}}
+    finally:
+        cache.close_cache_stores()
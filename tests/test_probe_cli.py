@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from rag_bencher import probe_cli
+from rag_bencher.eval import embedding_parity
+from rag_bencher.vector import capabilities, local
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+@pytest.mark.parametrize(("ok", "expected"), [(True, "safe to import"), (False, "unavailable")])
+def test_probe_cli_reprobes_faiss(
+    ok: bool, expected: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setenv(capabilities.ENV_KEY, str(tmp_path / "caps.json"))
+    calls: list[bool] = []
+
+    def fake_probe() -> bool:
+        calls.append(True)
+        return ok
+
+    monkeypatch.setattr(local, "probe_faiss", fake_probe)
+    monkeypatch.setattr(sys, "argv", ["probe"])
+
+    probe_cli.main()
+
+    out = capsys.readouterr().out
+    assert calls == [True]
+    assert expected in out
+    assert "caps.json" in out
+
+
+def test_probe_cli_checks_embeddings_parity(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setenv(capabilities.ENV_KEY, str(tmp_path / "caps.json"))
+    monkeypatch.setattr(local, "probe_faiss", lambda: True)
+    calls: list[tuple[str, str, float]] = []
+
+    def fake_parity(backend: str, model_name: str, min_cosine: float) -> dict[str, float]:
+        calls.append((backend, model_name, min_cosine))
+        if min_cosine > 0.99:
+            raise ValueError("drift from torch")
+        return {"min_cosine": 0.99}
+
+    monkeypatch.setattr(embedding_parity, "check_backend_parity", fake_parity)
+    monkeypatch.setattr(sys, "argv", ["probe", "--embeddings-backend", "onnx-int8", "--model", "mini"])
+    probe_cli.main()
+    assert "onnx-int8 vs torch (mini)" in capsys.readouterr().out
+
+    monkeypatch.setattr(sys, "argv", ["probe", "--embeddings-backend", "onnx", "--min-cosine", "0.999"])
+    with pytest.raises(SystemExit):
+        probe_cli.main()
+    assert calls[-1] == ("onnx", "sentence-transformers/all-MiniLM-L6-v2", 0.999)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from rag_bencher.utils import cache, compression  # noqa: E402
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+_WORDS = "the retrieval augmented answer context document model question pipeline score chunk source".split()
+
+
+def _answers(n: int) -> list[dict[str, object]]:
+    rng = random.Random(0)
+    return [
+        {
+            "answer": " ".join(rng.choice(_WORDS) for _ in range(40)),
+            "debug": {"pipeline": "naive", "retrieved": [f"data/doc{rng.randint(0, 20)}.txt" for _ in range(4)]},
+        }
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setattr(cache, "D", tmp_path, raising=False)
+    yield tmp_path
+    cache.close_cache_stores()
+
+
+def test_codec_roundtrips_and_keeps_small_values_plain() -> None:
+    codec = compression.ZstdCodec()
+    text = json.dumps(_answers(1)[0])
+    blob = codec.encode(text)
+    assert isinstance(blob, bytes) and len(blob) < len(text)
+    assert codec.decode(blob) == text
+    assert codec.encode("0.5") == "0.5"
+
+
+def test_dictionary_shrinks_entries_and_is_needed_to_decode() -> None:
+    values = [json.dumps(a) for a in _answers(300)]
+    data = compression.train_dictionary([v.encode() for v in values[::2]])
+    assert data is not None
+    assert compression.train_dictionary([b"x"] * 3) is None
+
+    plain, trained = compression.ZstdCodec(), compression.ZstdCodec()
+    trained.add_dictionary(data)
+    sample = values[1]
+    assert len(trained.encode(sample)) < len(plain.encode(sample))
+    with pytest.raises(KeyError):
+        plain.decode(trained.encode(sample))
+
+    rows = {r["codec"]: r for r in compression.compression_report(values)}
+    assert set(rows) == {"plain", "zstd-3", "zstd-3+dict"}
+    assert rows["zstd-3+dict"]["ratio"] > rows["zstd-3"]["ratio"] > 1.0
+
+
+def test_cache_compresses_transparently_and_trains_a_dictionary(
+    monkeypatch: pytest.MonkeyPatch, cache_dir: Path
+) -> None:
+    monkeypatch.setenv(compression.ENV_KEY, "1")
+    monkeypatch.setattr(cache, "_DICT_TRAIN_WRITES", 100)
+    answers = _answers(250)
+    for i, answer in enumerate(answers):
+        cache.cache_set("m", f"p{i}", answer)
+    store = cache.cache_store()
+    assert store.codec is not None and store.codec.dict_id
+
+    with closing(sqlite3.connect(cache_dir / cache.DB_NAME)) as conn:
+        (stored,) = conn.execute("SELECT value FROM entries WHERE key = ?", (cache.K("m", "p249"),)).fetchone()
+        assert conn.execute("SELECT COUNT(*) FROM dictionaries").fetchone()[0] == 1
+    assert isinstance(stored, bytes) and compression.frame_dictionary_id(stored) == store.codec.dict_id
+
+    # Readers with compression off still decode every entry.
+    cache.close_cache_stores()
+    monkeypatch.delenv(compression.ENV_KEY)
+    assert [cache.cache_get("m", f"p{i}") for i in (0, 249)] == [answers[0], answers[249]]
+    assert cache.cache_store().recompress() == 250
+    with closing(sqlite3.connect(cache_dir / cache.DB_NAME)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM entries WHERE typeof(value) = 'blob'").fetchone()[0] == 0
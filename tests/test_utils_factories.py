@@ -1,18 +1,42 @@
 from __future__ import annotations
 
 import builtins
+import platform
 import sys
+import threading
 import types
 from types import SimpleNamespace
-from typing import Any, cast
+from typing import Any, Iterator, cast
 
 import pytest
+from langchain_core.embeddings import Embeddings
 
 from rag_bencher.utils import factories, repro
 
 pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
 
+class DummyEmbeddings:
+    __slots__ = ("model_name", "model_kwargs", "encode_kwargs")
+
+    def __init__(self, *, model_name: str, model_kwargs: dict[str, Any], encode_kwargs: dict[str, Any]) -> None:
+        self.model_name = model_name
+        self.model_kwargs = model_kwargs
+        self.encode_kwargs = encode_kwargs
+
+
+@pytest.fixture(autouse=True)
+def _empty_registry() -> Iterator[None]:
+    factories.clear_embeddings_registry()
+    yield
+    factories.clear_embeddings_registry()
+
+
+def _fake_hf(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", SimpleNamespace(HuggingFaceEmbeddings=DummyEmbeddings))
+    monkeypatch.setattr(factories, "wants_cpu", lambda: True)
+
+
 def test_preferred_device_respects_cpu_request(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(factories, "wants_cpu", lambda: True)
     monkeypatch.setattr(factories, "cuda_available", lambda: True)
@@ -32,25 +56,187 @@ def test_preferred_device_falls_back_to_cpu(monkeypatch: pytest.MonkeyPatch) ->
 
 
 def test_make_hf_embeddings_sets_device(monkeypatch: pytest.MonkeyPatch) -> None:
-    class DummyEmbeddings:
-        __slots__ = ("model_name", "model_kwargs", "encode_kwargs")
-
-        def __init__(self, *, model_name: str, model_kwargs: dict[str, Any], encode_kwargs: dict[str, Any]) -> None:
-            self.model_name = model_name
-            self.model_kwargs = model_kwargs
-            self.encode_kwargs = encode_kwargs
-
     monkeypatch.setitem(sys.modules, "langchain_huggingface", SimpleNamespace(HuggingFaceEmbeddings=DummyEmbeddings))
     monkeypatch.setattr(factories, "wants_cpu", lambda: False)
     monkeypatch.setattr(factories, "cuda_available", lambda: False)
 
     emb = factories.make_hf_embeddings("mini", encode_kwargs={"normalize": True})
-    assert isinstance(emb, DummyEmbeddings)
+    assert isinstance(emb, factories.LengthBucketedEmbeddings)
+    assert isinstance(emb.inner, DummyEmbeddings)
     assert emb.model_name == "mini"
     assert emb.model_kwargs["device"] == "cpu"
     assert emb.encode_kwargs == {"normalize": True}
 
 
+def test_make_hf_embeddings_shares_instances_per_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    _fake_hf(monkeypatch)
+    monkeypatch.delenv(factories.MAX_MODELS_ENV_KEY, raising=False)
+
+    first = factories.make_hf_embeddings("mini", encode_kwargs={"normalize_embeddings": True})
+    assert factories.make_hf_embeddings("mini", encode_kwargs={"normalize_embeddings": True}) is first
+    assert factories.make_hf_embeddings("mini") is not first
+    assert factories.make_hf_embeddings("mini", model_kwargs={"device": "cuda"}) is not first
+    assert factories.clear_embeddings_registry() == 3
+    assert factories.make_hf_embeddings("mini", encode_kwargs={"normalize_embeddings": True}) is not first
+
+
+def test_make_hf_embeddings_evicts_least_recently_used(monkeypatch: pytest.MonkeyPatch) -> None:
+    _fake_hf(monkeypatch)
+    monkeypatch.setenv(factories.MAX_MODELS_ENV_KEY, "2")
+
+    a = factories.make_hf_embeddings("a")
+    b = factories.make_hf_embeddings("b")
+    assert factories.make_hf_embeddings("a") is a
+    factories.make_hf_embeddings("c")
+    assert factories.make_hf_embeddings("a") is a
+    assert factories.make_hf_embeddings("b") is not b
+
+
+def test_make_hf_embeddings_registry_can_be_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    _fake_hf(monkeypatch)
+    monkeypatch.setenv(factories.MAX_MODELS_ENV_KEY, "0")
+    assert factories.make_hf_embeddings("a") is not factories.make_hf_embeddings("a")
+    assert factories.clear_embeddings_registry() == 0
+
+
+def test_make_hf_embeddings_evicts_when_memory_is_tight(monkeypatch: pytest.MonkeyPatch) -> None:
+    _fake_hf(monkeypatch)
+    monkeypatch.delenv(factories.MAX_MODELS_ENV_KEY, raising=False)
+    factories.make_hf_embeddings("a")
+    factories.make_hf_embeddings("b")
+
+    monkeypatch.setenv(factories.MIN_FREE_MB_ENV_KEY, "1024")
+    monkeypatch.setattr(factories, "_available_mb", lambda: 512)
+    factories.make_hf_embeddings("c")
+    assert factories.clear_embeddings_registry() == 1
+
+    monkeypatch.setattr(factories, "_available_mb", lambda: None)
+    factories.make_hf_embeddings("a")
+    factories.make_hf_embeddings("b")
+    assert factories.clear_embeddings_registry() == 2
+
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(len(text))]
+
+
+def test_length_buckets_respect_token_budget() -> None:
+    lengths = [30, 2, 10, 2, 100, 9]
+    batches = factories.length_buckets(lengths, token_budget=40)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    assert batches == [[1, 3, 5, 2], [0], [4]]
+    assert all(len(b) * max(lengths[i] for i in b) <= 40 or len(b) == 1 for b in batches)
+    assert factories.length_buckets([1] * 10, token_budget=100, max_batch=4) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_length_bucketed_embeddings_restore_input_order() -> None:
+    inner = RecordingEmbeddings()
+    emb = factories.LengthBucketedEmbeddings(inner, token_budget=12)
+    texts = ["x" * 40, "a", "b" * 8, "c"]
+    assert emb.embed_documents(texts) == [[40.0], [1.0], [8.0], [1.0]]
+    assert inner.batches == [["a", "c", "b" * 8], ["x" * 40]]
+    assert emb.embed_query("abc") == [3.0]
+
+
+def test_length_bucketed_embeddings_use_model_tokenizer() -> None:
+    class Client:
+        max_seq_length = 3
+
+        @staticmethod
+        def tokenizer(texts: list[str], **kwargs: Any) -> dict[str, list[list[int]]]:
+            return {"input_ids": [list(range(min(len(t.split()), kwargs["max_length"]))) for t in texts]}
+
+    class HFLike(RecordingEmbeddings):
+        model_name = "mini"
+        _client = Client()
+
+    inner = HFLike()
+    emb = factories.LengthBucketedEmbeddings(inner, token_budget=6)
+    assert emb.token_lengths(["one", "one two", "a b c d e"]) == [1, 2, 3]
+    emb.embed_documents(["a b c d e", "one", "one two"])
+    assert inner.batches == [["one", "one two"], ["a b c d e"]]
+    assert emb.model_name == "mini"
+
+
+def test_make_hf_embeddings_loads_outside_the_registry_lock(monkeypatch: pytest.MonkeyPatch) -> None:
+    loads: list[str] = []
+    started, release = threading.Event(), threading.Event()
+
+    class SlowEmbeddings(DummyEmbeddings):
+        __slots__ = ()
+
+        def __init__(self, **kwargs: Any) -> None:
+            loads.append(kwargs["model_name"])
+            if kwargs["model_name"] == "slow":
+                started.set()
+                release.wait(5)
+            super().__init__(**kwargs)
+
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", SimpleNamespace(HuggingFaceEmbeddings=SlowEmbeddings))
+    monkeypatch.setattr(factories, "wants_cpu", lambda: True)
+    results: list[Embeddings] = []
+    slow = [threading.Thread(target=lambda: results.append(factories.make_hf_embeddings("slow"))) for _ in range(3)]
+    for t in slow:
+        t.start()
+    started.wait(5)
+    factories.make_hf_embeddings("fast")
+    assert all(t.is_alive() for t in slow)
+    release.set()
+    for t in slow:
+        t.join()
+    assert sorted(loads) == ["fast", "slow"]
+    assert len({id(r) for r in results}) == 1
+
+
+def test_length_bucketing_can_be_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(factories.TOKEN_BUDGET_ENV_KEY, "0")
+    inner = RecordingEmbeddings()
+    factories.LengthBucketedEmbeddings(inner).embed_documents(["bbb", "a"])
+    assert inner.batches == [["bbb", "a"]]
+
+
+def test_make_hf_embeddings_onnx_backends(monkeypatch: pytest.MonkeyPatch) -> None:
+    _fake_hf(monkeypatch)
+    monkeypatch.setattr(platform, "machine", lambda: "x86_64")
+
+    onnx = factories.make_hf_embeddings("mini", backend="onnx")
+    assert onnx.model_kwargs == {"device": "cpu", "backend": "onnx"}
+    int8 = factories.make_hf_embeddings("mini", backend="onnx-int8")
+    assert int8.model_kwargs["model_kwargs"] == {"file_name": "onnx/model_quint8_avx2.onnx"}
+    assert int8 is not onnx is not factories.make_hf_embeddings("mini")
+
+    monkeypatch.setattr(platform, "machine", lambda: "aarch64")
+    custom = factories.make_hf_embeddings("other", backend="onnx-int8")
+    assert custom.model_kwargs["model_kwargs"]["file_name"] == "onnx/model_qint8_arm64.onnx"
+    with pytest.raises(ValueError, match="Unknown embeddings backend"):
+        factories.make_hf_embeddings("mini", backend="tensorrt")
+
+
+def test_make_cross_encoder_loads_once_per_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    loads: list[tuple[str, str]] = []
+
+    class DummyCrossEncoder:
+        def __init__(self, model_name: str, *, device: str) -> None:
+            loads.append((model_name, device))
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", SimpleNamespace(CrossEncoder=DummyCrossEncoder))
+    monkeypatch.setattr(factories, "wants_cpu", lambda: True)
+
+    first = factories.make_cross_encoder("ce")
+    assert factories.make_cross_encoder("ce") is first
+    factories.make_cross_encoder("other")
+    assert loads == [("ce", "cpu"), ("other", "cpu")]
+    assert factories.clear_embeddings_registry() == 2
+
+
 def test_set_seeds_sets_numpy_when_available(monkeypatch: pytest.MonkeyPatch) -> None:
     calls: list[int] = []
     dummy_np = cast(Any, types.ModuleType("numpy"))
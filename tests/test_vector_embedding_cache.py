@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel, SecretStr
+
+from rag_bencher.vector import embedding_cache
+
+if TYPE_CHECKING:
+    from conftest import CountingEmbeddings
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+class AzureLikeEmbeddings(BaseModel, Embeddings):
+    """Mirrors ``AzureOpenAIEmbeddings``: the ``model`` default stays put while the deployment varies."""
+
+    model: str = "text-embedding-ada-002"
+    azure_deployment: str = "ada"
+    dimensions: Optional[int] = None
+    api_key: SecretStr = SecretStr("key-1")
+    chunk_size: int = 2048
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(len(text))]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[embedding_cache.VectorCache]:
+    yield embedding_cache.vector_cache(tmp_path)
+    embedding_cache.close_vector_caches()
+
+
+def test_cached_embeddings_only_embeds_unseen_texts(
+    store: embedding_cache.VectorCache, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    inner = counting_embeddings()
+    cached = embedding_cache.CachedEmbeddings(inner, store)
+
+    cold = cached.embed_documents(["a", "bb", "a"])
+    assert inner.documents == ["a", "bb"]
+    assert cold == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+
+    warm = embedding_cache.CachedEmbeddings(counting_embeddings(), store)
+    assert warm.embed_documents(["bb", "a", "ccc"]) == [cold[1], cold[0], [3.0, 1.0]]
+    assert warm.inner.documents == ["ccc"]  # type: ignore[attr-defined]
+    assert warm.model_name == "counting"
+
+    # Queries are cached apart from documents with the same text.
+    assert cached.embed_query("a") == [1.0, 1.0]
+    assert cached.embed_query("a") == [1.0, 1.0]
+    assert inner.queries == ["a"]
+
+
+def test_cached_embeddings_keep_models_apart(
+    store: embedding_cache.VectorCache, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    embedding_cache.CachedEmbeddings(counting_embeddings("m1"), store).embed_documents(["x"])
+    other = counting_embeddings("m2")
+    embedding_cache.CachedEmbeddings(other, store).embed_documents(["x"])
+    assert other.documents == ["x"]
+
+    onnx, torch = counting_embeddings(), counting_embeddings()
+    onnx.model_kwargs = {"backend": "onnx", "device": "cpu"}  # type: ignore[attr-defined]
+    torch.model_kwargs = {"device": "cuda"}  # type: ignore[attr-defined]
+    assert embedding_cache.embeddings_namespace(onnx) != embedding_cache.embeddings_namespace(torch)
+    assert embedding_cache.embeddings_namespace(torch) == embedding_cache.embeddings_namespace(counting_embeddings())
+
+
+def test_evict_drops_least_recently_read_vectors(store: embedding_cache.VectorCache) -> None:
+    store.set_vectors("ns", [(k, np.ones(4, dtype=np.float32)) for k in "abc"])
+    time.sleep(0.01)
+    store.get_vectors("ns", ["a"])
+    assert store.stored_bytes() == 48
+
+    assert store.evict(20) == 2
+    assert list(store.vectors("ns")) == ["a"]
+    assert store.usage()["vector_bytes"] == 16
+
+
+def test_namespace_tells_azure_deployments_apart() -> None:
+    base = embedding_cache.embeddings_namespace(AzureLikeEmbeddings())
+    assert base != embedding_cache.embeddings_namespace(AzureLikeEmbeddings(azure_deployment="ada-eu"))
+    assert base != embedding_cache.embeddings_namespace(AzureLikeEmbeddings(dimensions=256))
+    same = AzureLikeEmbeddings(api_key=SecretStr("key-2"), chunk_size=16)
+    assert base == embedding_cache.embeddings_namespace(same)
+    assert "key-1" not in base
+
+
+def test_with_embed_cache_follows_env(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    inner = counting_embeddings()
+    monkeypatch.delenv(embedding_cache.ENV_KEY, raising=False)
+    assert embedding_cache.with_embed_cache(inner) is inner
+
+    monkeypatch.setenv(embedding_cache.ENV_KEY, str(tmp_path / "vectors"))
+    wrapped = embedding_cache.with_embed_cache(inner)
+    try:
+        assert isinstance(wrapped, embedding_cache.CachedEmbeddings)
+        assert embedding_cache.with_embed_cache(wrapped) is wrapped
+        wrapped.embed_documents(["persisted"])
+        assert (tmp_path / "vectors" / embedding_cache.DB_NAME).exists()
+    finally:
+        embedding_cache.close_vector_caches()
+    monkeypatch.setenv(embedding_cache.ENV_KEY, "true")
+    assert embedding_cache.embed_cache_dir() == embedding_cache.DEFAULT_DIR
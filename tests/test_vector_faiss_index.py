@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.config import FaissIndexCfg
+from rag_bencher.vector import local
+
+faiss = pytest.importorskip("faiss")
+
+from rag_bencher.vector.faiss_index import build_faiss_store, make_faiss_index  # noqa: E402
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+DOCS = [Document(page_content=f"chunk {n}", metadata={"n": n}) for n in range(300)]
+
+
+@pytest.mark.parametrize(
+    ("cfg", "kind"),
+    [
+        (FaissIndexCfg(index="flat"), "IndexFlatL2"),
+        (FaissIndexCfg(index="ivf", nlist=8, nprobe=3), "IndexIVFFlat"),
+        (FaissIndexCfg(index="hnsw", m=16, ef_search=40), "IndexHNSWFlat"),
+        (FaissIndexCfg(index="ivf_pq", nlist=4, pq_m=4, pq_nbits=8), "IndexIVFPQ"),
+    ],
+)
+def test_make_faiss_index_builds_configured_type(cfg: FaissIndexCfg, kind: str) -> None:
+    train = np.random.default_rng(0).standard_normal((300, 16)).astype(np.float32)
+    index = make_faiss_index(16, cfg, train)
+    assert type(index).__name__ == kind
+    assert index.is_trained
+    if cfg.index == "ivf":
+        assert index.nprobe == 3
+    if cfg.index == "hnsw":
+        assert index.hnsw.efSearch == 40
+
+
+def test_make_faiss_index_clamps_nlist_and_validates_pq() -> None:
+    train = np.random.default_rng(0).standard_normal((10, 16)).astype(np.float32)
+    assert make_faiss_index(16, FaissIndexCfg(index="ivf", nlist=100), train).nlist == 10
+    with pytest.raises(ValueError, match="divide"):
+        make_faiss_index(16, FaissIndexCfg(index="ivf_pq", pq_m=5), train)
+    with pytest.raises(ValueError, match="at least 256"):
+        make_faiss_index(16, FaissIndexCfg(index="ivf_pq", pq_m=4), train)
+
+
+def test_build_faiss_store_searches_with_hnsw(hash_embeddings: Callable[[int], Embeddings]) -> None:
+    store = build_faiss_store(DOCS, hash_embeddings(16), FaissIndexCfg(index="hnsw"))
+    hit = store.similarity_search("chunk 42", k=1)[0]
+    assert hit.page_content == "chunk 42"
+    assert hit.metadata == {"n": 42}
+
+
+def test_local_builder_caches_per_index_setting(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    local._resolve_factory.cache_clear()
+    monkeypatch.setenv("RAG_BENCH_CAPABILITIES", str(tmp_path / "capabilities.json"))
+    monkeypatch.delenv("RAG_BENCH_DISABLE_FAISS", raising=False)
+    monkeypatch.delenv("RAG_BENCH_VECTORSTORE", raising=False)
+    try:
+        ivf = FaissIndexCfg(index="ivf", nlist=8, nprobe=8)
+        store = local.build_local_vectorstore(DOCS, hash_embeddings(16), cache_dir=tmp_path, faiss_index=ivf)
+        assert type(store.index).__name__ == "IndexIVFFlat"  # type: ignore[attr-defined]
+        local.build_local_vectorstore(DOCS, hash_embeddings(16), cache_dir=tmp_path, faiss_index=FaissIndexCfg())
+        assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+        reloaded = local.build_local_vectorstore(DOCS, hash_embeddings(16), cache_dir=tmp_path, faiss_index=ivf)
+        assert reloaded.index.nprobe == 8  # type: ignore[attr-defined]
+        assert reloaded.similarity_search("chunk 7", k=1)[0].page_content == "chunk 7"
+    finally:
+        local._resolve_factory.cache_clear()
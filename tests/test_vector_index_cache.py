@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import pytest
+from langchain_core.documents import Document
+
+from rag_bencher.vector import index_cache, local
+
+if TYPE_CHECKING:
+    from conftest import CountingEmbeddings
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+@pytest.fixture
+def memory_store(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    local._resolve_factory.cache_clear()
+    monkeypatch.setenv("RAG_BENCH_VECTORSTORE", "memory")
+    monkeypatch.delenv("RAG_BENCH_INDEX_CACHE", raising=False)
+    yield
+    local._resolve_factory.cache_clear()
+
+
+def _docs() -> list[Document]:
+    return [Document(page_content="alpha", metadata={"source": "a"}), Document(page_content="beta gamma")]
+
+
+def test_index_cache_dir_env_values(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("RAG_BENCH_INDEX_CACHE", raising=False)
+    assert index_cache.index_cache_dir() is None
+    monkeypatch.setenv("RAG_BENCH_INDEX_CACHE", "off")
+    assert index_cache.index_cache_dir() is None
+    monkeypatch.setenv("RAG_BENCH_INDEX_CACHE", "1")
+    assert index_cache.index_cache_dir() == index_cache.DEFAULT_DIR
+    monkeypatch.setenv("RAG_BENCH_INDEX_CACHE", str(tmp_path))
+    assert index_cache.index_cache_dir() == tmp_path
+
+
+def test_index_key_depends_on_chunks_model_and_store(counting_embeddings: type[CountingEmbeddings]) -> None:
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    hashes = [index_cache.chunk_hash(d) for d in _docs()]
+    base = index_cache.index_key(hashes, counting_embeddings(), InMemoryVectorStore)
+    assert base == index_cache.index_key(list(hashes), counting_embeddings(), InMemoryVectorStore)
+    assert base != index_cache.index_key(hashes[:1], counting_embeddings(), InMemoryVectorStore)
+    assert base != index_cache.index_key(hashes, counting_embeddings("other"), InMemoryVectorStore)
+
+
+def test_embedding_fingerprint_includes_backend_but_not_device(counting_embeddings: type[CountingEmbeddings]) -> None:
+    torch, onnx, cuda = counting_embeddings(), counting_embeddings(), counting_embeddings()
+    torch.model_kwargs = {"device": "cpu"}  # type: ignore[attr-defined]
+    onnx.model_kwargs = {"device": "cpu", "backend": "onnx"}  # type: ignore[attr-defined]
+    cuda.model_kwargs = {"device": "cuda"}  # type: ignore[attr-defined]
+    assert index_cache.embedding_fingerprint(torch) != index_cache.embedding_fingerprint(onnx)
+    assert index_cache.embedding_fingerprint(torch) == index_cache.embedding_fingerprint(cuda)
+
+
+def test_chunk_hash_includes_metadata() -> None:
+    plain = Document(page_content="same")
+    sourced = Document(page_content="same", metadata={"source": "x"})
+    assert index_cache.chunk_hash(plain) != index_cache.chunk_hash(sourced)
+
+
+def test_build_local_vectorstore_reuses_persisted_index(
+    memory_store: None, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    first = counting_embeddings()
+    store = local.build_local_vectorstore(_docs(), first, cache_dir=tmp_path)
+    assert first.documents == ["alpha", "beta gamma"]
+    manifests = list(tmp_path.glob(f"*/{index_cache.MANIFEST_NAME}"))
+    assert len(manifests) == 1
+
+    second = counting_embeddings()
+    reloaded = local.build_local_vectorstore(_docs(), second, cache_dir=tmp_path)
+    assert second.documents == []
+    assert type(reloaded) is type(store)
+    assert reloaded.similarity_search("alpha", k=1)[0].page_content == "alpha"
+
+
+def test_build_local_vectorstore_rebuilds_on_corpus_change(
+    memory_store: None, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    local.build_local_vectorstore(_docs(), counting_embeddings(), cache_dir=tmp_path)
+    changed = counting_embeddings()
+    local.build_local_vectorstore(_docs() + [Document(page_content="delta")], changed, cache_dir=tmp_path)
+    assert changed.documents == ["alpha", "beta gamma", "delta"]
+    assert len(list(tmp_path.glob(f"*/{index_cache.MANIFEST_NAME}"))) == 2
+
+
+def test_build_local_vectorstore_uses_env_cache_dir(
+    memory_store: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    monkeypatch.setenv("RAG_BENCH_INDEX_CACHE", str(tmp_path / "idx"))
+    local.build_local_vectorstore(_docs(), counting_embeddings())
+    assert list((tmp_path / "idx").glob(f"*/{index_cache.MANIFEST_NAME}"))
+
+
+def test_load_index_ignores_corrupt_manifest(
+    memory_store: None, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    folder = tmp_path / "broken"
+    folder.mkdir()
+    (folder / index_cache.MANIFEST_NAME).write_text("{nope", encoding="utf-8")
+    assert index_cache.load_index(folder, InMemoryVectorStore, counting_embeddings()) is None
+
+
+def test_load_index_requires_a_matching_manifest(tmp_path: Path, counting_embeddings: type[CountingEmbeddings]) -> None:
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    store = InMemoryVectorStore.from_documents(_docs(), counting_embeddings())
+    folder = tmp_path / "foreign"
+    assert index_cache.save_index(store, folder, {"n": 1})
+    assert index_cache.load_index(folder, InMemoryVectorStore, counting_embeddings()) is None
+
+    manifest = {
+        "vectorstore": index_cache.store_type(InMemoryVectorStore),
+        "embeddings": index_cache.embedding_fingerprint(counting_embeddings()),
+        "variant": "",
+        "chunks": [],
+    }
+    assert index_cache.save_index(store, folder, manifest, replace=True)
+    assert index_cache.load_index(folder, InMemoryVectorStore, counting_embeddings("other")) is None
+    assert index_cache.load_index(folder, InMemoryVectorStore, counting_embeddings()) is not None
+
+
+def test_save_index_skips_unpersistable_store(tmp_path: Path) -> None:
+    class Opaque:
+        pass
+
+    folder = tmp_path / "opaque"
+    assert index_cache.save_index(Opaque(), folder, {}) is False  # type: ignore[arg-type]
+    assert not folder.exists()
+    assert not list(tmp_path.iterdir())
+
+
+def test_save_index_tolerates_concurrent_writers(tmp_path: Path, counting_embeddings: type[CountingEmbeddings]) -> None:
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    store = InMemoryVectorStore.from_documents(_docs(), counting_embeddings())
+    folder = tmp_path / "key"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda n: index_cache.save_index(store, folder, {"n": n}), range(16)))
+    assert all(results)
+    assert [p.name for p in tmp_path.iterdir()] == ["key"]
+    first = index_cache.read_manifest(folder)
+    assert first is not None
+
+    assert index_cache.save_index(store, folder, {"n": "late"})
+    assert index_cache.read_manifest(folder) == first
+    assert index_cache.save_index(store, folder, {"n": "late"}, replace=True)
+    assert index_cache.read_manifest(folder) == {"version": 1, "n": "late"}
+    assert [p.name for p in tmp_path.iterdir()] == ["key"]
+
+
+def test_faiss_index_roundtrip(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    pytest.importorskip("faiss")
+    local._resolve_factory.cache_clear()
+    monkeypatch.setenv("RAG_BENCH_VECTORSTORE", "faiss")
+    monkeypatch.setattr(local, "_faiss_safe_to_import", lambda: True)
+    try:
+        local.build_local_vectorstore(_docs(), counting_embeddings(), cache_dir=tmp_path)
+        again = counting_embeddings()
+        store = local.build_local_vectorstore(_docs(), again, cache_dir=tmp_path)
+    finally:
+        local._resolve_factory.cache_clear()
+    assert again.documents == []
+    assert store.similarity_search("alpha", k=1)[0].page_content == "alpha"
+
+
+def test_incremental_mode_env_validation(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("RAG_BENCH_INDEX_MODE", raising=False)
+    assert index_cache.incremental_enabled() is False
+    monkeypatch.setenv("RAG_BENCH_INDEX_MODE", "Incremental")
+    assert index_cache.incremental_enabled() is True
+    monkeypatch.setenv("RAG_BENCH_INDEX_MODE", "sometimes")
+    with pytest.raises(ValueError, match="RAG_BENCH_INDEX_MODE"):
+        index_cache.incremental_enabled()
+
+
+def test_chunk_ids_disambiguate_repeated_chunks() -> None:
+    assert index_cache.chunk_ids(["a", "b", "a"]) == ["a-0", "b-0", "a-1"]
+
+
+def test_incremental_build_embeds_only_changed_chunks(
+    memory_store: None, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    docs = [
+        Document(page_content="alpha", metadata={"source": "a.txt"}),
+        Document(page_content="beta", metadata={"source": "a.txt"}),
+        Document(page_content="gamma", metadata={"source": "b.txt"}),
+    ]
+    first = counting_embeddings()
+    local.build_local_vectorstore(docs, first, cache_dir=tmp_path, incremental=True)
+    assert first.documents == ["alpha", "beta", "gamma"]
+
+    edited = [docs[0], Document(page_content="beta v2", metadata={"source": "a.txt"}), docs[2]]
+    second = counting_embeddings()
+    store = local.build_local_vectorstore(edited, second, cache_dir=tmp_path, incremental=True)
+    assert second.documents == ["beta v2"]
+    contents = {d.page_content for d in store.similarity_search("x", k=10)}
+    assert contents == {"alpha", "beta v2", "gamma"}
+
+    third = counting_embeddings()
+    reloaded = local.build_local_vectorstore(edited, third, cache_dir=tmp_path, incremental=True)
+    assert third.documents == []
+    assert len(reloaded.similarity_search("x", k=10)) == 3
+    assert len(list((tmp_path / "incremental").iterdir())) == 1
+
+
+def test_incremental_slots_are_per_corpus(
+    memory_store: None, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    wiki = [Document(page_content="alpha", metadata={"source": "wiki.txt"})]
+    news = [Document(page_content="beta", metadata={"source": "news.txt"})]
+    local.build_local_vectorstore(wiki, counting_embeddings(), cache_dir=tmp_path, incremental=True)
+    local.build_local_vectorstore(news, counting_embeddings(), cache_dir=tmp_path, incremental=True)
+    assert len(list((tmp_path / "incremental").iterdir())) == 2
+
+    again = counting_embeddings()
+    store = local.build_local_vectorstore(wiki, again, cache_dir=tmp_path, incremental=True)
+    assert again.documents == []
+    assert [d.page_content for d in store.similarity_search("x", k=5)] == ["alpha"]
+
+
+def test_incremental_build_rebuilds_when_delete_is_unsupported(
+    memory_store: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    docs = [Document(page_content=t, metadata={"source": "a.txt"}) for t in ("alpha", "beta", "gamma")]
+    local.build_local_vectorstore(docs, counting_embeddings(), cache_dir=tmp_path, incremental=True)
+
+    def refuse(self: object, ids: list[str] | None = None, **kwargs: object) -> None:
+        raise RuntimeError("remove_ids not implemented for this type of index")
+
+    monkeypatch.setattr(local._resolve_factory(), "delete", refuse)
+    rebuilt = counting_embeddings()
+    store = local.build_local_vectorstore(docs[1:], rebuilt, cache_dir=tmp_path, incremental=True)
+    assert rebuilt.documents == ["beta", "gamma"]
+    assert {d.page_content for d in store.similarity_search("x", k=10)} == {"beta", "gamma"}
+
+
+def test_incremental_build_via_env(
+    memory_store: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path, counting_embeddings: type[CountingEmbeddings]
+) -> None:
+    monkeypatch.setenv("RAG_BENCH_INDEX_MODE", "incremental")
+    local.build_local_vectorstore(_docs(), counting_embeddings(), cache_dir=tmp_path)
+    shrunk = counting_embeddings()
+    store = local.build_local_vectorstore(_docs()[:1], shrunk, cache_dir=tmp_path)
+    assert shrunk.documents == []
+    assert [d.page_content for d in store.similarity_search("alpha", k=5)] == ["alpha"]
@@ -5,6 +5,7 @@ import subprocess
 import sys
 import types
 from importlib.machinery import ModuleSpec
+from pathlib import Path
 from typing import Any, Sequence, cast
 
 import pytest
@@ -12,11 +13,16 @@ from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 
-from rag_bencher.vector import local
+from rag_bencher.vector import capabilities, local
 
 pytestmark = [pytest.mark.unit, pytest.mark.offline]
 
 
+@pytest.fixture(autouse=True)
+def _isolated_capabilities(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(capabilities.ENV_KEY, str(tmp_path / "capabilities.json"))
+
+
 def _clear_caches() -> None:
     local._resolve_factory.cache_clear()
     local._faiss_safe_to_import.cache_clear()
@@ -118,6 +124,70 @@ def test_faiss_safe_to_import_succeeds(monkeypatch: pytest.MonkeyPatch) -> None:
     assert local._faiss_safe_to_import() is True
 
 
+def test_faiss_probe_result_is_persisted_and_reused(monkeypatch: pytest.MonkeyPatch) -> None:
+    _clear_caches()
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: cast(ModuleSpec, object()))
+    calls: list[Any] = []
+    monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: calls.append(args))
+    assert local._faiss_safe_to_import() is True
+
+    # A new process starts with an empty lru_cache but finds the stored result.
+    _clear_caches()
+
+    def fail(*_args: Any, **_kwargs: Any) -> None:
+        raise AssertionError("probe should not run again")
+
+    monkeypatch.setattr(subprocess, "run", fail)
+    assert local._faiss_safe_to_import() is True
+    assert len(calls) == 1
+
+
+def test_faiss_probe_failure_is_persisted_until_reprobe(monkeypatch: pytest.MonkeyPatch) -> None:
+    _clear_caches()
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: cast(ModuleSpec, object()))
+
+    def crash(*_args: Any, **_kwargs: Any) -> None:
+        raise subprocess.CalledProcessError(-11, "cmd")
+
+    monkeypatch.setattr(subprocess, "run", crash)
+    assert local._faiss_safe_to_import() is False
+
+    monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: None)
+    _clear_caches()
+    assert local._faiss_safe_to_import() is False
+    assert local.probe_faiss() is True
+    _clear_caches()
+    assert local._faiss_safe_to_import() is True
+
+
+def test_faiss_probe_timeout_is_not_persisted(monkeypatch: pytest.MonkeyPatch) -> None:
+    _clear_caches()
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: cast(ModuleSpec, object()))
+
+    def slow(*_args: Any, **_kwargs: Any) -> None:
+        raise subprocess.TimeoutExpired("cmd", 5)
+
+    monkeypatch.setattr(subprocess, "run", slow)
+    assert local._faiss_safe_to_import() is False
+    assert not capabilities.capabilities_path().exists()
+
+
+def test_capabilities_key_tracks_interpreter(monkeypatch: pytest.MonkeyPatch) -> None:
+    key = capabilities.environment_key("faiss", "/site/faiss/__init__.py", ["faiss-cpu"])
+    assert capabilities.environment_key("faiss", "/site/faiss/__init__.py", ["faiss-cpu"]) == key
+    assert capabilities.environment_key("faiss", "/other/faiss/__init__.py", ["faiss-cpu"]) != key
+    monkeypatch.setattr(sys, "executable", "/opt/other/python")
+    assert capabilities.environment_key("faiss", "/site/faiss/__init__.py", ["faiss-cpu"]) != key
+
+
+def test_capabilities_file_ignores_corrupt_content() -> None:
+    path = capabilities.capabilities_path()
+    path.write_text("not json", encoding="utf-8")
+    assert capabilities.read_capability("key") is None
+    capabilities.write_capability("key", "faiss", True)
+    assert capabilities.read_capability("key") is True
+
+
 def test_faiss_factory_imports_module(monkeypatch: pytest.MonkeyPatch) -> None:
     class DummyFAISS(VectorStore):
         pass
@@ -139,3 +209,46 @@ def test_is_truthy_falsey_values(value: str | None) -> None:
 @pytest.mark.parametrize("value", ["1", "True", " YES ", "on"])
 def test_is_truthy_true_values(value: str) -> None:
     assert local._is_truthy(value) is True
+
+
+def test_stored_vectors_reads_inmemory_and_numpy_stores() -> None:
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    from rag_bencher.vector.numpy_store import NumpyVectorStore
+
+    class TwoDim(Embeddings):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            return [[float(len(t)), 1.0] for t in texts]
+
+        def embed_query(self, text: str) -> list[float]:
+            return [float(len(text)), 1.0]
+
+    docs = [Document(id="a", page_content="x"), Document(id="b", page_content="yyy")]
+    memory = InMemoryVectorStore(TwoDim())
+    memory.add_documents(docs)
+    assert local.stored_vectors(memory, docs[::-1]).tolist() == [[3.0, 1.0], [1.0, 1.0]]  # type: ignore[union-attr]
+
+    numpy_store = NumpyVectorStore.from_documents(docs, TwoDim())
+    assert local.stored_vectors(numpy_store, docs).shape == (2, 2)  # type: ignore[union-attr]
+
+    assert local.stored_vectors(memory, [Document(page_content="no id")]) is None
+    assert local.stored_vectors(memory, [Document(id="missing", page_content="?")]) is None
+    assert local.stored_vectors(cast(VectorStore, object()), docs) is None
+
+
+def test_stored_vectors_reconstructs_from_faiss() -> None:
+    pytest.importorskip("faiss")
+    from langchain_community.vectorstores.faiss import FAISS
+
+    class TwoDim(Embeddings):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            return [[float(len(t)), 1.0] for t in texts]
+
+        def embed_query(self, text: str) -> list[float]:
+            return [float(len(text)), 1.0]
+
+    store = FAISS.from_texts(["x", "yyy"], TwoDim(), ids=["a", "b"])
+    hits = store.similarity_search("yy", k=2)
+    assert local.stored_vectors(store, hits).tolist() == [  # type: ignore[union-attr]
+        TwoDim().embed_query(d.page_content) for d in hits
+    ]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import gc
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.vector import local
+from rag_bencher.vector.mmap_store import MmapVectorStore
+from rag_bencher.vector.numpy_store import NumpyVectorStore
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+TEXTS = [f"chunk number {n}" for n in range(50)]
+
+
+def _build(embeddings: Embeddings, tmp_path: Path, **kwargs: int) -> MmapVectorStore:
+    store = MmapVectorStore(embeddings, tmp_path / "store", **kwargs)
+    store.add_texts(TEXTS, metadatas=[{"n": n} for n in range(len(TEXTS))], ids=[f"id{n}" for n in range(len(TEXTS))])
+    return store
+
+
+def test_blocked_search_matches_exact_numpy_search(
+    tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(8), tmp_path, block_rows=7, batch_size=16)
+    exact = NumpyVectorStore.from_texts(TEXTS, hash_embeddings(8))
+    for query in ["chunk number 3", "chunk number 41", "unrelated"]:
+        got = store.similarity_search_with_score(query, k=5)
+        want = exact.similarity_search_with_score(query, k=5)
+        assert [d.page_content for d, _ in got] == [d.page_content for d, _ in want]
+        assert np.allclose([s for _, s in got], [s for _, s in want], atol=1e-5)
+
+
+def test_embeds_in_bounded_batches_and_writes_sidecars(
+    tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = MmapVectorStore(hash_embeddings(8), tmp_path / "store", batch_size=16)
+    store.add_texts(TEXTS)
+    assert store.embeddings.batches == [16, 16, 16, 2]  # type: ignore[attr-defined]
+    folder = tmp_path / "store"
+    assert (folder / "vectors.f32").stat().st_size == len(TEXTS) * 8 * 4
+    assert (folder / "offsets.u64").stat().st_size == len(TEXTS) * 8
+    assert len(store) == len(TEXTS)
+
+
+def test_records_roundtrip_text_and_metadata(tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]) -> None:
+    store = _build(hash_embeddings(8), tmp_path)
+    hit = store.similarity_search("chunk number 7", k=1)[0]
+    assert hit == Document(id="id7", page_content="chunk number 7", metadata={"n": 7})
+    assert [d.page_content for d in store.get_by_ids(["id2", "missing", "id9"])] == ["chunk number 2", "chunk number 9"]
+    assert store.get_vectors(["id1"]).shape == (1, 8)
+
+
+def test_delete_and_upsert(tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]) -> None:
+    store = _build(hash_embeddings(8), tmp_path, block_rows=8)
+    assert store.delete(["id7"]) is True
+    assert store.delete(["id7"]) is False
+    assert "chunk number 7" not in [d.page_content for d in store.similarity_search("chunk number 7", k=50)]
+    assert len(store) == len(TEXTS) - 1
+
+    store.add_texts(["replacement"], ids=["id3"])
+    assert store.get_by_ids(["id3"])[0].page_content == "replacement"
+    assert len(store) == len(TEXTS) - 1
+    assert len(store.similarity_search("anything", k=100)) == len(TEXTS) - 1
+
+    assert store.delete() is True
+    assert len(store) == 0
+    assert store.similarity_search("anything") == []
+
+
+def test_lookups_by_id_use_the_persisted_index(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(8), tmp_path, batch_size=16)
+    store.add_texts(["late"], ids=["id51"])
+    assert (tmp_path / "store" / "ids.u64").stat().st_size == (len(TEXTS) + 1) * 16
+
+    want = store.get_vectors(["id40", "id51"])
+    loaded = MmapVectorStore.load_local(str(tmp_path / "store"), hash_embeddings(8))
+    decoded: list[int] = []
+    record = MmapVectorStore._record
+
+    def counting_record(self: MmapVectorStore, row: int) -> Document:
+        decoded.append(row)
+        return record(self, row)
+
+    monkeypatch.setattr(MmapVectorStore, "_record", counting_record)
+    assert np.array_equal(loaded.get_vectors(["id40", "id51"]), want)
+    assert decoded == [40, 50]
+
+    (tmp_path / "store" / "ids.u64").unlink()
+    legacy = MmapVectorStore.load_local(str(tmp_path / "store"), hash_embeddings(8))
+    assert [d.page_content for d in legacy.get_by_ids(["id51", "id3"])] == ["late", "chunk number 3"]
+
+
+def test_batch_search_aligns_with_single_queries(tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]) -> None:
+    store = _build(hash_embeddings(8), tmp_path, block_rows=5)
+    queries = ["chunk number 1", "chunk number 30"]
+    batch = store.similarity_search_batch(queries, k=3)
+    assert batch == [store.similarity_search(q, k=3) for q in queries]
+    assert store.similarity_search_with_score_by_vectors([], k=3) == []
+
+
+def test_load_local_is_copy_on_write(tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]) -> None:
+    store = _build(hash_embeddings(8), tmp_path)
+    saved = tmp_path / "saved"
+    store.save_local(str(saved))
+    before = (saved / "vectors.f32").read_bytes()
+
+    loaded = MmapVectorStore.load_local(str(saved), hash_embeddings(8))
+    assert loaded.similarity_search("chunk number 4", k=1)[0].page_content == "chunk number 4"
+    loaded.add_texts(["fresh text"], ids=["fresh"])
+    loaded.delete(["id4"])
+    assert loaded.folder != saved
+    assert (saved / "vectors.f32").read_bytes() == before
+    assert len(MmapVectorStore.load_local(str(saved), hash_embeddings(8))) == len(TEXTS)
+
+
+def test_load_local_requires_index(tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]) -> None:
+    with pytest.raises(FileNotFoundError):
+        MmapVectorStore.load_local(str(tmp_path), hash_embeddings(8))
+
+
+def test_private_folder_is_removed_with_store(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    monkeypatch.setenv("RAG_BENCH_MMAP_DIR", str(tmp_path / "scratch"))
+    store = MmapVectorStore.from_texts(["a", "b"], hash_embeddings(8))
+    folder = store.folder
+    assert folder.parent == tmp_path / "scratch" and folder.exists()
+    del store
+    gc.collect()
+    assert not folder.exists()
+
+
+def test_resolve_factory_mmap_mode(monkeypatch: pytest.MonkeyPatch) -> None:
+    local._resolve_factory.cache_clear()
+    monkeypatch.setenv("RAG_BENCH_VECTORSTORE", "mmap")
+    monkeypatch.delenv("RAG_BENCH_DISABLE_FAISS", raising=False)
+    try:
+        assert local._resolve_factory() is MmapVectorStore
+    finally:
+        local._resolve_factory.cache_clear()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.vector import local
+from rag_bencher.vector.numpy_store import NumpyVectorStore, normalize_rows, top_k
+
+if TYPE_CHECKING:
+    from conftest import TableEmbeddings
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+VECTORS = {
+    "north": [0.0, 1.0],
+    "east": [1.0, 0.0],
+    "north-east": [1.0, 1.0],
+    "south": [0.0, -2.0],
+}
+
+
+def _store(embeddings: Embeddings) -> NumpyVectorStore:
+    return NumpyVectorStore.from_texts(
+        list(VECTORS),
+        embeddings,
+        metadatas=[{"source": name} for name in VECTORS],
+        ids=[f"id-{name}" for name in VECTORS],
+    )
+
+
+def test_normalize_rows_keeps_zero_rows() -> None:
+    mat = normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+    assert mat.dtype == np.float32 and mat.flags["C_CONTIGUOUS"]
+    assert np.allclose(mat, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_top_k_orders_best_first() -> None:
+    scores = np.array([[0.1, 0.9, 0.5, 0.7]], dtype=np.float32)
+    idx, vals = top_k(scores, 2)
+    assert idx.tolist() == [[1, 3]]
+    assert np.allclose(vals, [[0.9, 0.7]])
+    idx_all, _ = top_k(scores, 10)
+    assert idx_all.tolist() == [[1, 3, 2, 0]]
+
+
+def test_similarity_search_matches_cosine_order(table_embeddings: type[TableEmbeddings]) -> None:
+    store = _store(table_embeddings(VECTORS))
+    hits = store.similarity_search_with_score("north", k=3)
+    assert [d.page_content for d, _ in hits] == ["north", "north-east", "east"]
+    assert hits[0][1] == pytest.approx(1.0)
+    assert hits[1][1] == pytest.approx(np.sqrt(0.5))
+    assert hits[0][0].metadata == {"source": "north"}
+    assert hits[0][0].id == "id-north"
+
+
+def test_batch_search_aligns_with_single_queries(table_embeddings: type[TableEmbeddings]) -> None:
+    store = _store(table_embeddings(VECTORS))
+    batch = store.similarity_search_batch(["east", "south"], k=2)
+    assert [[d.page_content for d in hits] for hits in batch] == [
+        [d.page_content for d in store.similarity_search("east", k=2)],
+        [d.page_content for d in store.similarity_search("south", k=2)],
+    ]
+    assert store.similarity_search_with_score_by_vectors([], k=2) == []
+
+
+def test_delete_and_upsert_keep_rows_consistent(table_embeddings: type[TableEmbeddings]) -> None:
+    store = _store(table_embeddings(VECTORS))
+    assert store.delete(["id-north", "missing"]) is True
+    assert store.delete(["missing"]) is False
+    assert len(store) == 3
+    assert "north" not in [d.page_content for d in store.similarity_search("north", k=4)]
+
+    store.add_texts(["north"], ids=["id-east"])
+    assert len(store) == 3
+    assert store.get_by_ids(["id-east"])[0].page_content == "north"
+    assert np.allclose(store.get_vectors(["id-east"]), [[0.0, 1.0]])
+
+    assert store.delete() is True
+    assert len(store) == 0
+    assert store.similarity_search("north") == []
+
+
+def test_add_vectors_validates_shapes(table_embeddings: type[TableEmbeddings]) -> None:
+    store = NumpyVectorStore(table_embeddings(VECTORS))
+    with pytest.raises(ValueError, match="same length"):
+        store.add_vectors([[1.0, 0.0]], ["a", "b"])
+    store.add_vectors([[1.0, 0.0]], ["a"])
+    with pytest.raises(ValueError, match="dimension"):
+        store.add_vectors([[1.0, 0.0, 0.0]], ["b"])
+
+
+def test_buffer_grows_without_losing_rows(table_embeddings: type[TableEmbeddings]) -> None:
+    store = NumpyVectorStore(table_embeddings(VECTORS))
+    for n in range(40):
+        store.add_vectors([[float(n), 1.0]], [f"t{n}"])
+    assert store.matrix.shape == (40, 2)
+    assert store.similarity_search_by_vector([39.0, 1.0], k=1)[0].page_content == "t39"
+
+
+def test_relevance_scores_are_bounded(table_embeddings: type[TableEmbeddings]) -> None:
+    store = _store(table_embeddings(VECTORS))
+    scored = store.similarity_search_with_relevance_scores("north", k=4)
+    assert all(0.0 <= s <= 1.0 for _, s in scored)
+
+
+def test_save_and_load_roundtrip(tmp_path: Path, table_embeddings: type[TableEmbeddings]) -> None:
+    store = _store(table_embeddings(VECTORS))
+    store.save_local(str(tmp_path))
+    loaded = NumpyVectorStore.load_local(str(tmp_path), table_embeddings(VECTORS))
+    assert np.array_equal(loaded.matrix, store.matrix)
+    assert [d.page_content for d in loaded.similarity_search("east", k=2)] == ["east", "north-east"]
+    assert loaded.get_by_ids(["id-south"]) == [
+        Document(id="id-south", page_content="south", metadata={"source": "south"})
+    ]
+
+
+def test_resolve_factory_numpy_mode(monkeypatch: pytest.MonkeyPatch) -> None:
+    local._resolve_factory.cache_clear()
+    monkeypatch.setenv("RAG_BENCH_VECTORSTORE", "numpy")
+    monkeypatch.delenv("RAG_BENCH_DISABLE_FAISS", raising=False)
+    try:
+        assert local._resolve_factory() is NumpyVectorStore
+    finally:
+        local._resolve_factory.cache_clear()
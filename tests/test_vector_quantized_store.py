@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import gc
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag_bencher.vector import local, quantized_store
+from rag_bencher.vector.numpy_store import NumpyVectorStore
+from rag_bencher.vector.quantized_store import BinaryVectorStore, Int8VectorStore, QuantizedVectorStore
+
+pytestmark = [pytest.mark.unit, pytest.mark.offline]
+
+
+TEXTS = [f"chunk number {n}" for n in range(200)]
+IDS = [f"id{n}" for n in range(len(TEXTS))]
+
+
+def _build(embeddings: Embeddings, cls: type[QuantizedVectorStore], **kwargs: int) -> QuantizedVectorStore:
+    store = cls(embeddings, **kwargs)
+    store.add_texts(TEXTS, metadatas=[{"n": n} for n in range(len(TEXTS))], ids=IDS)
+    return store
+
+
+def test_codec_hooks_are_abstract(hash_embeddings: Callable[[int], Embeddings]) -> None:
+    assert QuantizedVectorStore.__abstractmethods__ == {"_code_dtype", "_code_width", "_encode", "_code_scores"}
+    with pytest.raises(TypeError):
+        QuantizedVectorStore(hash_embeddings(8))  # type: ignore[abstract]
+
+
+@pytest.mark.parametrize("cls", [BinaryVectorStore, Int8VectorStore])
+def test_rescored_hits_carry_exact_cosine_scores(
+    cls: type[QuantizedVectorStore], hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(64), cls)
+    exact = NumpyVectorStore.from_texts(TEXTS, hash_embeddings(64))
+    for query in ["chunk number 5", "chunk number 150"]:
+        hit, score = store.similarity_search_with_score(query, k=1)[0]
+        assert hit.page_content == query
+        assert hit.metadata == {"n": int(query.rsplit(" ", 1)[1])}
+        assert score == pytest.approx(exact.similarity_search_with_score(query, k=1)[0][1], abs=1e-5)
+
+
+@pytest.mark.parametrize("cls", [BinaryVectorStore, Int8VectorStore])
+def test_full_shortlist_matches_exact_search(
+    cls: type[QuantizedVectorStore], hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(64), cls, rescore_factor=len(TEXTS))
+    exact = NumpyVectorStore.from_texts(TEXTS, hash_embeddings(64))
+    got = store.similarity_search("unrelated query", k=5)
+    assert [d.page_content for d in got] == [d.page_content for d in exact.similarity_search("unrelated query", k=5)]
+
+
+def test_code_sizes(hash_embeddings: Callable[[int], Embeddings]) -> None:
+    assert _build(hash_embeddings(64), BinaryVectorStore).codes.shape == (len(TEXTS), 8)
+    int8 = _build(hash_embeddings(64), Int8VectorStore)
+    assert int8.codes.shape == (len(TEXTS), 64) and int8.codes.dtype == np.int8
+    approx = int8.codes.astype(np.float32) * int8._scales[: len(int8), None]
+    assert np.allclose(approx, int8.matrix, atol=0.01)
+
+
+def test_shortlist_merges_row_blocks(
+    monkeypatch: pytest.MonkeyPatch, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(64), BinaryVectorStore, rescore_factor=2)
+    whole = store._shortlist(store.matrix[17], 6)
+    monkeypatch.setattr(quantized_store, "_ROW_BLOCK", 7)
+    assert 17 in store._shortlist(store.matrix[17], 6)
+    assert len(store._shortlist(store.matrix[17], 6)) == len(whole) == 6
+
+
+def test_int8_scores_accumulate_in_integer_blocks(
+    monkeypatch: pytest.MonkeyPatch, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(64), Int8VectorStore)
+    query = store.matrix[42]
+    whole = store._code_scores(0, len(store), query)
+    assert np.allclose(whole, store.matrix @ query, atol=0.02)
+    monkeypatch.setattr(quantized_store, "_INT8_BLOCK", 7)
+    assert np.array_equal(store._code_scores(0, len(store), query), whole)
+    assert np.array_equal(store._code_scores(10, 30, query), whole[10:30])
+
+
+@pytest.mark.parametrize("cls", [BinaryVectorStore, Int8VectorStore])
+def test_from_texts_spills_floats_to_a_private_memmap(
+    cls: type[QuantizedVectorStore],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    hash_embeddings: Callable[[int], Embeddings],
+) -> None:
+    monkeypatch.setenv("RAG_BENCH_MMAP_DIR", str(tmp_path))
+    store = cls.from_texts(TEXTS, hash_embeddings(64), ids=IDS)
+    assert isinstance(store._buffer, np.memmap)
+    [folder] = list(tmp_path.iterdir())
+    assert store.similarity_search("chunk number 8", k=1)[0].id == "id8"
+    store.add_texts(["fresh"], ids=["fresh"])
+    assert store.get_by_ids(["fresh"])[0].page_content == "fresh"
+    del store
+    gc.collect()
+    assert not folder.exists()
+
+
+@pytest.mark.parametrize("cls", [BinaryVectorStore, Int8VectorStore])
+def test_delete_and_upsert_keep_codes_aligned(
+    cls: type[QuantizedVectorStore], hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    store = _build(hash_embeddings(64), cls)
+    assert store.delete(["id3", "id4"]) is True
+    store.add_texts(["chunk number 3"], ids=["id9"])
+    assert len(store) == len(store.codes) == len(TEXTS) - 2
+    assert store.similarity_search("chunk number 3", k=1)[0].id == "id9"
+    assert "chunk number 9" not in [d.page_content for d in store.similarity_search("chunk number 9", k=20)]
+    assert store.delete() is True
+    assert store.similarity_search("chunk number 1") == []
+
+
+@pytest.mark.parametrize("cls", [BinaryVectorStore, Int8VectorStore])
+def test_load_local_memory_maps_floats(
+    cls: type[QuantizedVectorStore], tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]
+) -> None:
+    _build(hash_embeddings(64), cls).save_local(str(tmp_path))
+    loaded = cls.load_local(str(tmp_path), hash_embeddings(64))
+    assert isinstance(loaded._buffer, np.memmap)
+    assert loaded.similarity_search("chunk number 42", k=1)[0].id == "id42"
+
+    before = (tmp_path / "vectors.npy").read_bytes()
+    loaded.add_texts(["fresh"], ids=["fresh"])
+    loaded.delete(["id1"])
+    assert loaded.get_by_ids(["fresh"])[0].page_content == "fresh"
+    assert (tmp_path / "vectors.npy").read_bytes() == before
+
+
+def test_load_local_rejects_other_codec(tmp_path: Path, hash_embeddings: Callable[[int], Embeddings]) -> None:
+    _build(hash_embeddings(64), BinaryVectorStore).save_local(str(tmp_path))
+    with pytest.raises(ValueError, match="binary"):
+        Int8VectorStore.load_local(str(tmp_path), hash_embeddings(64))
+
+
+@pytest.mark.parametrize(("mode", "cls"), [("int8", Int8VectorStore), ("binary", BinaryVectorStore)])
+def test_resolve_factory_quantized_modes(
+    mode: str, cls: type[QuantizedVectorStore], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    local._resolve_factory.cache_clear()
+    monkeypatch.setenv("RAG_BENCH_VECTORSTORE", mode)
+    monkeypatch.delenv("RAG_BENCH_DISABLE_FAISS", raising=False)
+    try:
+        assert local._resolve_factory() is cls
+    finally:
+        local._resolve_factory.cache_clear()